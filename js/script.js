@@ -18,17 +18,116 @@ themeToggleBtn.addEventListener('click', () => {
 });
 
 /* --------------------  QUOTE FETCH / PREP  ---------------------- */
+/* compact payload (scripts/quote_output.py): shared fields live in
+   `tables` and rows reference them by index */
+function expandCompact(p) {
+  return p.rows.map(row => {
+    const q = {};
+    p.fields.forEach((f, i) => {
+      const v = row[i];
+      if (v === null || v === undefined) return;
+      q[f] = p.tables[f] ? p.tables[f][v] : v;
+    });
+    return q;
+  });
+}
 async function fetchQuotes(path = 'data/quotes_hidden_words.json') {
   try {
     const res = await fetch(path);
-    return res.ok ? await res.json() : [];
+    if (!res.ok) return [];
+    const data = await res.json();
+    return Array.isArray(data) ? data : expandCompact(data);
   } catch {
     return [];
   }
 }
+/* build deltas (scripts/quote_ids.py): the corpus is kept in localStorage
+   with its version, and a newer build is reached by applying the deltas in
+   data/deltas/<corpus>/ instead of downloading the whole file again */
+const MAX_DELTA_HOPS = 20;
+async function fetchJSON(path) {
+  try {
+    const res = await fetch(path);
+    return res.ok ? await res.json() : null;
+  } catch {
+    return null;
+  }
+}
+async function corpusVersion(list) {
+  if (!(window.crypto && crypto.subtle)) return null;   /* not available on every origin */
+  const bytes = new TextEncoder().encode(list.map(q => q.id).join('\n'));
+  const hash = new Uint8Array(await crypto.subtle.digest('SHA-256', bytes));
+  return Array.from(hash.slice(0, 8), b => b.toString(16).padStart(2, '0')).join('');
+}
+async function applyDelta(list, delta) {
+  const fresh = new Map(delta.added.map(q => [q.id, q]));
+  delta.modified.forEach(c => fresh.set(c.quote.id, c.quote));
+  let next;
+  if (delta.order) {
+    const byId = new Map(list.map(q => [q.id, q]));
+    fresh.forEach((q, id) => byId.set(id, q));
+    next = delta.order.map(id => byId.get(id));
+  } else {
+    const dropped = new Set([...delta.removed, ...delta.modified.map(c => c.replaces)]);
+    next = list.filter(q => !dropped.has(q.id));
+    delta.positions.forEach(([pos, id]) => next.splice(pos, 0, fresh.get(id)));
+  }
+  if (next.some(q => !q)) return null;
+  const version = await corpusVersion(next);
+  return version === null || version === delta.version ? next : null;
+}
+async function fetchCorpus(corpus = 'hidden_words') {
+  const key = `quotes:${corpus}`;
+  const latest = await fetchJSON(`data/deltas/${corpus}/latest.json`);
+  let cached = null;
+  try { cached = JSON.parse(localStorage.getItem(key)); } catch { /* unreadable: reload */ }
+  if (latest && cached && cached.quotes) {
+    let { version, quotes: list } = cached;
+    for (let hop = 0; list && version !== latest.version && hop < MAX_DELTA_HOPS; hop++) {
+      const delta = await fetchJSON(`data/deltas/${corpus}/${version}.json`);
+      list = delta && await applyDelta(list, delta);
+      version = delta && delta.version;
+    }
+    if (list && version === latest.version) {
+      if (version !== cached.version) storeCorpus(key, version, list);
+      return list;
+    }
+  }
+  const list = await fetchQuotes(`data/quotes_${corpus}.json`);
+  /* only a file with IDs whose order hashes to the latest version can be followed later */
+  if (latest && list.length && list.every(q => q.id) && await corpusVersion(list) === latest.version)
+    storeCorpus(key, latest.version, list);
+  return list;
+}
+function storeCorpus(key, version, list) {
+  try { localStorage.setItem(key, JSON.stringify({ version, quotes: list })); } catch { /* quota */ }
+}
 const countWords = (t) => (t || '').trim().split(/\s+/).length;
 function filterShort(list) { return list.filter(q => countWords(q.text) <= MAX_QUOTE_WORDS); }
-const dayOfYear = d => Math.floor((d - new Date(d.getFullYear(), 0, 0)) / 8.64e7);
+/* word-count index (scripts/word_index.py): lengths/ends are sorted, so
+   "at most MAX_QUOTE_WORDS" is a binary search plus a slice of `order` */
+async function fetchWordIndex(path = 'data/quotes_hidden_words.words.json') {
+  try {
+    const res = await fetch(path);
+    return res.ok ? await res.json() : null;
+  } catch {
+    return null;
+  }
+}
+function filterShortIndexed(list, idx) {
+  if (!idx || idx.count !== list.length) return filterShort(list);
+  let lo = 0, hi = idx.lengths.length;
+  while (lo < hi) {
+    const mid = (lo + hi) >> 1;
+    if (idx.lengths[mid] <= MAX_QUOTE_WORDS) lo = mid + 1; else hi = mid;
+  }
+  const end = lo ? idx.ends[lo - 1] : 0;
+  return idx.order.slice(0, end).sort((a, b) => a - b).map(i => list[i]);
+}
+/* calendar days since Dec 31 (1 for Jan 1), counted in UTC so a DST shift
+   cannot pull the local date back a day; day_of_year() in build_schedule.py */
+const dayOfYear = d =>
+  (Date.UTC(d.getFullYear(), d.getMonth(), d.getDate()) - Date.UTC(d.getFullYear(), 0, 0)) / 8.64e7;
 
 /* ----------------------  RENDER HELPERS  ------------------------ */
 function renderQuote(obj, suffix = '') {
@@ -51,14 +150,34 @@ function renderGregorian(d, elId){
 /* --------------------------  STATE  ----------------------------- */
 let quotes=[], todayObj=null, yestObj=null;
 
+/* precomputed by scripts/build_schedule.py: data/daily/YYYY-MM-DD.json */
+const localISODate = d =>
+  `${d.getFullYear()}-${String(d.getMonth()+1).padStart(2,'0')}-${String(d.getDate()).padStart(2,'0')}`;
+async function fetchDaily(d) {
+  try {
+    const res = await fetch(`data/daily/${localISODate(d)}.json`);
+    return res.ok ? await res.json() : null;
+  } catch {
+    return null;
+  }
+}
+
 /* ----------------------  INITIALISE PAGE  ----------------------- */
 async function initPage(){
-  const all = await fetchQuotes(); if(!all.length) return;
-  quotes = filterShort(all);
   const today=new Date(), yest=new Date(); yest.setDate(yest.getDate()-1);
 
-  todayObj = quotes[dayOfYear(today)%quotes.length];
-  yestObj  = quotes[dayOfYear(yest)%quotes.length];
+  const daily = await fetchDaily(today);
+  if (daily) {
+    todayObj = daily.today;
+    yestObj  = daily.yesterday;
+  } else {
+    /* no schedule file for today: fall back to the full corpus */
+    const [all, idx] = await Promise.all([fetchCorpus(), fetchWordIndex()]);
+    if(!all.length) return;
+    quotes = filterShortIndexed(all, idx);
+    todayObj = quotes[dayOfYear(today)%quotes.length];
+    yestObj  = quotes[dayOfYear(yest)%quotes.length];
+  }
 
   renderQuote(todayObj,'');
   renderQuote(yestObj,'-yesterday');  // citation prepopulated but hidden
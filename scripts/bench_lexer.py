@@ -0,0 +1,144 @@
+import argparse
+import io
+import re
+import statistics
+import sys
+import time
+
+import bench_parsers
+import pg_lexer
+import scrape_dhammapada_pg
+import scrape_gita_arnold_pg
+import scrape_kjv_bible_pg
+
+# --- Configuration ---
+# Times the line classification of the three Gutenberg parsers: the per-line
+# chains of regex matches and upper() scans they used before pg_lexer.py
+# (kept here as the reference) against one LineLexer pass. Both must produce
+# the same sequence of token kinds. The texts are the bench_parsers sources
+# (fixtures or HTTP cache copies).
+DEFAULT_REPEATS = 5
+
+_dhammapada_chapter = re.compile(r"Chapter\s+[IVXLCDM]+\.\s*(.*)", re.IGNORECASE)
+_dhammapada_verse = re.compile(r"^\s*(\d+)\.\s*(.+)")
+_gita_chapter = re.compile(r"^\s*CHAPTER\s+([IVXLCDM]+)\s*$", re.MULTILINE)
+_gita_speaker = re.compile(r"^\s*([A-Za-z\s]+(?:irashtra)?)\s*[:.]\s*(.*)", re.IGNORECASE)
+_kjv_verse = re.compile(r"^\s*(\d+):(\d+)\s+(.*)")
+
+
+# --- Function Definitions ---
+def legacy_dhammapada(lines):
+    kinds = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if _dhammapada_chapter.match(line):
+            kinds.append("chapter")
+            continue
+        kind = "verse" if _dhammapada_verse.match(line) else pg_lexer.CONTINUATION
+        if kind != "verse":
+            # The old loop re-checked continuation lines before appending them
+            _dhammapada_chapter.match(line)
+            re.match(r"^\s*End of the Project Gutenberg EBook", line, re.IGNORECASE)
+        if re.match(r"^\s*End of the Project Gutenberg EBook", line, re.IGNORECASE) or \
+           re.match(r"^\s*\*\*\* END OF THE PROJECT GUTENBERG EBOOK", line, re.IGNORECASE):
+            kind = "end"
+        kinds.append(kind)
+    return kinds
+
+
+def legacy_gita(paragraphs):
+    kinds = []
+    for para_text in paragraphs:
+        para_text = para_text.strip()
+        if not para_text:
+            continue
+        if "*** END OF THE PROJECT GUTENBERG EBOOK" in para_text.upper() or \
+           ("HERE ENDETH CHAPTER XVIII" in para_text.upper() and "OF THE BHAGAVAD-GITA" in para_text.upper()):
+            kinds.append("end")
+        elif "HERE ENDETH CHAPTER" in para_text.upper() and "OF THE BHAGAVAD-GITA" in para_text.upper():
+            kinds.append("chapter_end")
+        elif _gita_chapter.match(para_text):
+            kinds.append("chapter")
+        elif _gita_speaker.match(para_text):
+            kinds.append("speaker")
+        else:
+            kinds.append(pg_lexer.CONTINUATION)
+    return kinds
+
+
+def legacy_kjv(lines):
+    kinds = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if scrape_kjv_bible_pg.END_MARKER in line.upper():
+            kinds.append("end")
+        elif _kjv_verse.match(line):
+            kinds.append("verse")
+        else:
+            kinds.append(pg_lexer.CONTINUATION)
+    return kinds
+
+
+def lexer_kinds(lexer):
+    return lambda lines: [kind for kind, _, _ in lexer.tokens(lines)]
+
+
+def dhammapada_lines(text):
+    return (scrape_dhammapada_pg.find_relevant_content(text) or "").splitlines()
+
+
+def kjv_lines(text):
+    return list(scrape_kjv_bible_pg._skip_to_content(iter(io.StringIO(text))))
+
+
+# name -> (bench_parsers benchmark, prepare the text, legacy loop, lexer)
+CASES = {
+    "dhammapada": ("dhammapada", dhammapada_lines, legacy_dhammapada, scrape_dhammapada_pg.LEXER),
+    "gita_arnold": ("gita_arnold", scrape_gita_arnold_pg.split_paragraphs, legacy_gita, scrape_gita_arnold_pg.LEXER),
+    "kjv_bible": ("kjv_bible", kjv_lines, legacy_kjv, scrape_kjv_bible_pg.LEXER),
+}
+
+
+def median_time(func, lines, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(lines)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the per-line regex chains with the pg_lexer master pattern.")
+    parser.add_argument("names", nargs="*", help=f"Texts to use (default: all). Known: {', '.join(CASES)}")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    args = parser.parse_args(argv)
+
+    mismatches = measured = 0
+    print(f"{'text':<14}{'lines':>9}{'legacy ms':>11}{'lexer ms':>10}{'speedup':>9}")
+    for name in args.names or CASES:
+        benchmark, prepare, legacy, lexer = CASES[name]
+        raw = bench_parsers.load_source(benchmark)
+        if raw is None:
+            print(f"{name}: no fixture and nothing cached, skipping (see bench_parsers.py --save-fixtures).")
+            continue
+        lines = prepare(bench_parsers.decode(raw))
+        classify = lexer_kinds(lexer)
+        if legacy(lines) != classify(lines):
+            print(f"MISMATCH {name}: the lexer classifies some lines differently")
+            mismatches += 1
+        legacy_s = median_time(legacy, lines, args.repeats)
+        lexer_s = median_time(classify, lines, args.repeats)
+        print(f"{name:<14}{len(lines):>9}{legacy_s * 1000:>11.1f}{lexer_s * 1000:>10.1f}{legacy_s / lexer_s:>8.2f}x")
+        measured += 1
+    if not measured:
+        print("Nothing was measured.")
+    return 1 if mismatches or not measured else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
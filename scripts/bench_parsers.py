@@ -0,0 +1,260 @@
+import argparse
+import functools
+import gc
+import json
+import logging
+import os
+import shutil
+import statistics
+import sys
+import time
+import tracemalloc
+
+import http_cache
+import instrumentation
+import parallel_parse
+import scrape_dhammapada_pg
+import scrape_gita_arnold_pg
+import scrape_hidden_words
+import scrape_kjv_bible_pg
+
+# --- Configuration ---
+# Each benchmark runs a parser on a raw source saved under fixtures/; without
+# a fixture the copy in the HTTP cache is used. The committed Gutenberg
+# fixtures are small synth_corpus.py texts in each book's layout (regenerate
+# with e.g. `python synth_corpus.py kjv fixtures/kjv_bible.txt --scale 0.05`)
+# and --save-fixtures replaces them with the real downloads. A baseline entry
+# measured on a different input size is not compared.
+# Record counts and the tracemalloc peak do not depend on the machine, so
+# only they fail the run; a slower p50 than the baseline (which may come from
+# another machine) is printed as a warning.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(SCRIPT_DIR, 'fixtures')
+BASELINE_PATH = os.path.join(FIXTURES_DIR, 'bench_baseline.json')
+DEFAULT_REPEATS = 5
+DEFAULT_TOLERANCE = 0.25 # allowed slowdown / memory growth before it is reported
+
+BENCHMARKS = {
+    "hidden_words": {
+        "parse": scrape_hidden_words.parse_hidden_words,
+        "fixture": "hidden_words.xhtml",
+        "url": scrape_hidden_words.URL,
+    },
+    # The BeautifulSoup fallback on the same page, to compare against the lxml fast path
+    "hidden_words_bs4": {
+        "parse": scrape_hidden_words.parse_hidden_words_bs4,
+        "fixture": "hidden_words.xhtml",
+        "url": scrape_hidden_words.URL,
+    },
+    "dhammapada": {
+        "parse": scrape_dhammapada_pg.parse_dhammapada_text,
+        "fixture": "dhammapada.txt",
+        "url": scrape_dhammapada_pg.URL_TEXT,
+        "segmented": True, # accepts jobs=N, see --jobs
+    },
+    "gita_arnold": {
+        "parse": scrape_gita_arnold_pg.parse_gita_text,
+        "fixture": "gita_arnold.txt",
+        "url": scrape_gita_arnold_pg.URL_TEXT,
+        "segmented": True, # accepts jobs=N, see --jobs
+    },
+    "kjv_bible": {
+        "parse": scrape_kjv_bible_pg.parse_kjv_bible_text,
+        "fixture": "kjv_bible.txt",
+        "url": scrape_kjv_bible_pg.URL_TEXT,
+        "segmented": True, # accepts jobs=N, see --jobs
+    },
+    # The same text memory-mapped from the file, to compare against decoding it whole
+    "kjv_bible_mmap": {
+        "parse": scrape_kjv_bible_pg.parse_kjv_bible_file,
+        "fixture": "kjv_bible.txt",
+        "url": scrape_kjv_bible_pg.URL_TEXT,
+        "segmented": True,
+        "mapped": True, # parse gets the file path instead of the decoded text
+    },
+}
+
+
+# --- Function Definitions ---
+def fixture_path(name):
+    return os.path.join(FIXTURES_DIR, BENCHMARKS[name]["fixture"])
+
+
+def source_path(name):
+    """The fixture, falling back to the HTTP cache copy; None if there is neither."""
+    path = fixture_path(name)
+    if not os.path.exists(path):
+        entry = http_cache.load_entry(BENCHMARKS[name]["url"])
+        if entry is None:
+            return None
+        path = http_cache.object_path(entry["sha256"])
+    return path
+
+
+def load_source(name):
+    """Raw bytes of the fixture, falling back to the HTTP cache copy; None if there is neither."""
+    path = source_path(name)
+    if path is None:
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def decode(raw):
+    try:
+        return raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return raw.decode('iso-8859-1')
+
+
+def save_fixtures():
+    """Copies the cached downloads into fixtures/ so benchmarks no longer depend on the cache."""
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for name, bench in BENCHMARKS.items():
+        entry = http_cache.load_entry(bench["url"])
+        if entry is None:
+            print(f"{name}: not in the HTTP cache; run the scraper once to download it.")
+            continue
+        shutil.copyfile(http_cache.object_path(entry["sha256"]), fixture_path(name))
+        print(f"{name}: saved {entry['size'] / 1024:.0f} KB to {fixture_path(name)}")
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+
+def measure(parse, text, input_bytes, repeats=DEFAULT_REPEATS):
+    """Runtime percentiles, throughput and tracemalloc peak of parse(text)."""
+    records = parse(text) # warm-up, also gives the record count
+    runtimes = []
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        parse(text)
+        runtimes.append(time.perf_counter() - start)
+    runtimes.sort()
+
+    # Peak memory is measured separately: tracemalloc slows the parser down.
+    # It only sees Python allocations, not lxml's C-side trees.
+    gc.collect()
+    tracemalloc.start()
+    parse(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    p50 = statistics.median(runtimes)
+    return {
+        "records": len(records),
+        "input_bytes": input_bytes,
+        "p50_s": p50,
+        "p95_s": percentile(runtimes, 0.95),
+        "records_per_s": len(records) / p50 if p50 else 0.0,
+        "mb_per_s": input_bytes / 1e6 / p50 if p50 else 0.0,
+        "peak_bytes": peak,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Returns (regressions, slowdowns): messages against the stored baseline.
+
+    Regressions are record counts or tracemalloc peaks that changed;
+    slowdowns are only warnings, since wall-clock time depends on the machine."""
+    problems = []
+    slowdowns = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base or base.get("input_bytes") != result["input_bytes"]:
+            continue
+        if result["records"] != base["records"]:
+            problems.append(f"{name}: {result['records']} records, baseline has {base['records']}")
+        if result["p50_s"] > base["p50_s"] * (1 + tolerance):
+            slowdowns.append(f"{name}: p50 {result['p50_s'] * 1000:.1f}ms vs baseline {base['p50_s'] * 1000:.1f}ms")
+        if result["peak_bytes"] > base["peak_bytes"] * (1 + tolerance):
+            problems.append(f"{name}: peak {result['peak_bytes'] / 1e6:.1f}MB vs baseline {base['peak_bytes'] / 1e6:.1f}MB")
+    return problems, slowdowns
+
+
+def print_results(results, baseline):
+    print(f"{'parser':<16}{'records':>9}{'p50 ms':>10}{'p95 ms':>10}{'rec/s':>11}{'MB/s':>8}{'peak MB':>9}{'vs base':>9}")
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base and base.get("input_bytes") != r["input_bytes"]:
+            base = None # measured on another input, e.g. the real text instead of the committed fixture
+        delta = f"{(r['p50_s'] / base['p50_s'] - 1) * 100:+.0f}%" if base and base["p50_s"] else "-"
+        print(f"{name:<16}{r['records']:>9}{r['p50_s'] * 1000:>10.1f}{r['p95_s'] * 1000:>10.1f}"
+              f"{r['records_per_s']:>11.0f}{r['mb_per_s']:>8.2f}{r['peak_bytes'] / 1e6:>9.1f}{delta:>9}")
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the quote parsers on offline fixtures.")
+    parser.add_argument("names", nargs="*", help=f"Benchmarks to run (default: all). Known: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Fractional slowdown (a warning) or memory growth (a failure) to report.")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline.")
+    parser.add_argument("--save-fixtures", action="store_true", help="Copy cached sources into fixtures/ and exit.")
+    parser.add_argument("--json", help="Also write the results to this file.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Parse the segmented Gutenberg texts on this many processes (0 = one per CPU).")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show the parsers' log output.")
+    args = parser.parse_args(argv)
+    # The parsers' progress messages would only be measured as noise
+    instrumentation.configure_logging(logging.DEBUG if args.verbose else logging.WARNING)
+
+    if args.save_fixtures:
+        save_fixtures()
+        return 0
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    jobs = parallel_parse.resolve_jobs(args.jobs)
+    results = {}
+    for name in args.names or BENCHMARKS:
+        raw = load_source(name)
+        if raw is None:
+            print(f"{name}: no fixture and nothing cached, skipping (see --save-fixtures).")
+            continue
+        parse = BENCHMARKS[name]["parse"]
+        if jobs != 1 and BENCHMARKS[name].get("segmented"):
+            parse = functools.partial(parse, jobs=jobs)
+        source = source_path(name) if BENCHMARKS[name].get("mapped") else decode(raw)
+        results[name] = measure(parse, source, len(raw), args.repeats)
+
+    if not results:
+        print("Nothing was measured.")
+        return 1
+    baseline = load_baseline(args.baseline)
+    print_results(results, baseline)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        baseline.update(results)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    problems, slowdowns = compare(results, baseline, args.tolerance)
+    for slowdown in slowdowns:
+        print(f"SLOWER {slowdown} (timings vary between machines; not a failure)")
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
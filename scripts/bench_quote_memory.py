@@ -0,0 +1,67 @@
+import argparse
+import gc
+import sys
+import tracemalloc
+
+import bench_parsers
+import quote_record
+
+# --- Configuration ---
+# Measures what the parsed records of each corpus keep alive: the list of
+# slotted quote_record.Quote objects the parsers return against the same
+# records as plain dicts (the shape they used to build, and still write).
+# to_dict() reuses the Quote's string objects, so both layouts hold the same
+# text; the difference is the per-record container. The texts are the
+# bench_parsers sources (fixtures or HTTP cache copies).
+NAMES = ("hidden_words", "dhammapada", "gita_arnold", "kjv_bible")
+
+
+# --- Function Definitions ---
+def retained_bytes(build):
+    """Bytes still allocated after build() returns, with its result kept alive."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def compare(quotes):
+    """(bytes held by the Quote list, bytes held by the same records as dicts)."""
+    slotted, slotted_bytes = retained_bytes(lambda: [quote_record.Quote.from_dict(quote.to_dict())
+                                                     for quote in quotes])
+    _, dict_bytes = retained_bytes(lambda: [quote.to_dict() for quote in slotted])
+    return slotted_bytes, dict_bytes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the memory of Quote records with plain dicts.")
+    parser.add_argument("names", nargs="*", help=f"Texts to use (default: all). Known: {', '.join(NAMES)}")
+    args = parser.parse_args(argv)
+
+    measured = 0
+    print(f"{'text':<14}{'records':>9}{'dict B/rec':>12}{'Quote B/rec':>13}{'saved':>8}")
+    for name in args.names or NAMES:
+        raw = bench_parsers.load_source(name)
+        if raw is None:
+            print(f"{name}: no fixture and nothing cached, skipping (see bench_parsers.py --save-fixtures).")
+            continue
+        quotes = bench_parsers.BENCHMARKS[name]["parse"](bench_parsers.decode(raw))
+        if not quotes:
+            print(f"{name}: the parser found no quotes, skipping.")
+            continue
+        slotted_bytes, dict_bytes = compare(quotes)
+        print(f"{name:<14}{len(quotes):>9}{dict_bytes / len(quotes):>12.0f}{slotted_bytes / len(quotes):>13.0f}"
+              f"{1 - slotted_bytes / dict_bytes:>8.0%}")
+        measured += 1
+    if not measured:
+        print("Nothing was measured.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+
+import bench_parsers
+import instrumentation
+import scrape_dhammapada_pg
+import scrape_gita_arnold_pg
+import scrape_kjv_bible_pg
+import synth_corpus
+
+# --- Configuration ---
+# Runs each Gutenberg parser on synthetic texts of growing size
+# (synth_corpus.py) and fits runtime and tracemalloc peak against input
+# size on a log-log scale. A parser that stays linear has a slope of about
+# 1; a slope above 1 + --tolerance is reported as super-linear and makes
+# the run exit non-zero. Each size is measured like bench_parsers.py does
+# (a warm-up, the median of --repeats runs, and a separate run for the
+# memory peak). --plot draws both curves per parser if matplotlib is installed.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+PLOT_PATH = os.path.join(PROJECT_ROOT, '.cache', 'reports', 'scaling.png')
+DEFAULT_SCALES = (0.25, 0.5, 1.0, 2.0) # multiples of the KJV download
+DEFAULT_REPEATS = 3
+DEFAULT_TOLERANCE = 0.2 # allowed excess of the fitted slope over 1
+
+PARSERS = {
+    "dhammapada": {"layout": "dhammapada", "parse": scrape_dhammapada_pg.parse_dhammapada_text},
+    "gita_arnold": {"layout": "gita", "parse": scrape_gita_arnold_pg.parse_gita_text},
+    "kjv_bible": {"layout": "kjv", "parse": scrape_kjv_bible_pg.parse_kjv_bible_text},
+    # The memory-mapped parsers of offline builds; parse gets the file path
+    "dhammapada_mmap": {"layout": "dhammapada", "parse": scrape_dhammapada_pg.parse_dhammapada_file, "mapped": True},
+    "gita_arnold_mmap": {"layout": "gita", "parse": scrape_gita_arnold_pg.parse_gita_file, "mapped": True},
+    "kjv_bible_mmap": {"layout": "kjv", "parse": scrape_kjv_bible_pg.parse_kjv_bible_file, "mapped": True},
+}
+DEFAULT_PARSERS = ("dhammapada", "gita_arnold", "kjv_bible")
+
+
+# --- Function Definitions ---
+def loglog_slope(sizes, values):
+    """Least-squares slope of log(values) over log(sizes): 1 is linear, 2 quadratic."""
+    points = [(math.log(size), math.log(value)) for size, value in zip(sizes, values) if size > 0 and value > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread if spread else None
+
+
+def text_path(directory, layout, shape, scale):
+    """The synthetic text for these settings, generated on first use."""
+    path = os.path.join(directory, f"{layout}-{shape}-{scale:g}.txt")
+    if not os.path.exists(path):
+        synth_corpus.write_text(path, layout, scale, shape)
+    return path
+
+
+def run_series(name, shape, scales, directory, repeats=DEFAULT_REPEATS):
+    """bench_parsers.measure() results for one parser and shape, one per scale."""
+    spec = PARSERS[name]
+    series = []
+    for scale in scales:
+        path = text_path(directory, spec["layout"], shape, scale)
+        if spec.get("mapped"):
+            source = path
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                source = f.read()
+        result = bench_parsers.measure(spec["parse"], source, os.path.getsize(path), repeats)
+        del source
+        result["scale"] = scale
+        series.append(result)
+    return series
+
+
+def summarize(series, tolerance=DEFAULT_TOLERANCE):
+    """Fitted time and memory slopes of a series, and which of them are super-linear."""
+    sizes = [result["input_bytes"] for result in series]
+    slopes = {
+        "time": loglog_slope(sizes, [result["p50_s"] for result in series]),
+        "memory": loglog_slope(sizes, [result["peak_bytes"] for result in series]),
+    }
+    flagged = [kind for kind, slope in slopes.items() if slope is not None and slope > 1 + tolerance]
+    return slopes, flagged
+
+
+def print_series(name, shape, series, slopes, flagged):
+    print(f"\n{name} ({shape})")
+    print(f"{'scale':>7}{'MB':>8}{'records':>10}{'p50 s':>9}{'MB/s':>8}{'peak MB':>9}{'peak/in':>9}")
+    for r in series:
+        print(f"{r['scale']:>7g}{r['input_bytes'] / 1e6:>8.1f}{r['records']:>10}{r['p50_s']:>9.3f}"
+              f"{r['mb_per_s']:>8.2f}{r['peak_bytes'] / 1e6:>9.1f}{r['peak_bytes'] / r['input_bytes']:>9.2f}")
+    described = ", ".join(f"{kind} {slope:.2f}" if slope is not None else f"{kind} -" for kind, slope in slopes.items())
+    verdict = f"SUPER-LINEAR ({', '.join(flagged)})" if flagged else "linear"
+    print(f"  log-log slope: {described} -> {verdict}")
+
+
+def plot(results, path):
+    """Runtime and peak memory against input size, log-log, one line per parser and shape."""
+    try:
+        import matplotlib # optional: pip install matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as pyplot
+    except ImportError:
+        print("matplotlib is not installed (pip install matplotlib); skipping the plot.")
+        return None
+    figure, (time_axis, memory_axis) = pyplot.subplots(1, 2, figsize=(12, 5))
+    for label, series in results.items():
+        sizes = [r["input_bytes"] / 1e6 for r in series]
+        time_axis.plot(sizes, [r["p50_s"] for r in series], marker="o", label=label)
+        memory_axis.plot(sizes, [r["peak_bytes"] / 1e6 for r in series], marker="o", label=label)
+    for axis, title in ((time_axis, "p50 runtime (s)"), (memory_axis, "tracemalloc peak (MB)")):
+        axis.set_xscale("log")
+        axis.set_yscale("log")
+        axis.set_xlabel("input (MB)")
+        axis.set_title(title)
+        axis.grid(True, which="both", alpha=0.3)
+    time_axis.legend(fontsize="small")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    figure.savefig(path, dpi=120, bbox_inches="tight")
+    pyplot.close(figure)
+    print(f"\nPlot: {path}")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that the Gutenberg parsers scale linearly with input size.")
+    parser.add_argument("names", nargs="*", help=f"Parsers to run (default: {', '.join(DEFAULT_PARSERS)}). "
+                        f"Known: {', '.join(PARSERS)}")
+    parser.add_argument("--scales", type=float, nargs="+", default=DEFAULT_SCALES,
+                        help="Input sizes as multiples of the KJV download (default: %(default)s).")
+    parser.add_argument("--shapes", nargs="+", choices=synth_corpus.SHAPES, default=["regular"],
+                        help="Layouts of the synthetic texts (see synth_corpus.py).")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="How far a fitted slope may exceed 1 before it counts as super-linear.")
+    parser.add_argument("--plot", nargs="?", const=PLOT_PATH, help=f"Write a plot (default path: {PLOT_PATH}).")
+    parser.add_argument("--json", help="Also write the results to this file.")
+    parser.add_argument("--keep-texts", metavar="DIR", help="Write the synthetic texts to DIR and keep them.")
+    args = parser.parse_args(argv)
+    # The parsers' progress messages would only be measured as noise
+    instrumentation.configure_logging(logging.WARNING)
+
+    unknown = [name for name in args.names if name not in PARSERS]
+    if unknown:
+        parser.error(f"unknown parser(s): {', '.join(unknown)}")
+    scales = sorted(set(args.scales))
+
+    results, report, super_linear = {}, {}, []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        directory = args.keep_texts or tmp_dir
+        os.makedirs(directory, exist_ok=True)
+        for shape in args.shapes:
+            for name in args.names or DEFAULT_PARSERS:
+                series = run_series(name, shape, scales, directory, args.repeats)
+                slopes, flagged = summarize(series, args.tolerance)
+                print_series(name, shape, series, slopes, flagged)
+                label = f"{name} ({shape})"
+                results[label] = series
+                report[label] = {"series": series, "slopes": slopes, "super_linear": flagged}
+                if flagged:
+                    super_linear.append(label)
+
+    if args.plot:
+        plot(results, args.plot)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if super_linear:
+        print(f"\nSUPER-LINEAR: {', '.join(super_linear)}")
+        return 1
+    print("\nAll parsers scale linearly.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import ast
+import hashlib
+import json
+import os
+
+# --- Configuration ---
+# The manifest remembers, per source, the hashes of everything that went into
+# its last successful build: the raw downloaded bytes, the parser module's
+# code and the JSON it produced. A source whose three hashes still match is
+# skipped, leaving its output file untouched. The parser's code is its
+# module plus every module next to it that it imports, directly or through
+# another one (quote_record, quote_output, pg_lexer, ...), found by reading
+# the import statements rather than importing anything.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+MANIFEST_PATH = os.path.join(PROJECT_ROOT, '.cache', 'build_manifest.json')
+
+
+# --- Function Definitions ---
+def file_digest(path):
+    """SHA-256 of a file's bytes, or None if it does not exist."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def local_imports(path):
+    """Paths of the modules in path's directory that path imports, directly or transitively, and path itself."""
+    directory = os.path.dirname(os.path.abspath(path))
+    found = {}
+    pending = [os.path.abspath(path)]
+    while pending:
+        module_path = pending.pop()
+        if module_path in found:
+            continue
+        found[module_path] = True
+        with open(module_path, 'rb') as f:
+            tree = ast.parse(f.read(), module_path)
+        for node in ast.walk(tree): # includes the imports deferred into functions
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                candidate = os.path.join(directory, name.split('.')[0] + '.py')
+                if os.path.exists(candidate):
+                    pending.append(candidate)
+    return sorted(found)
+
+
+def module_digest(path, options=""):
+    """Hash of a parser module and the local modules it imports, plus any output options that change what it writes."""
+    digest = hashlib.sha256()
+    for module_path in local_imports(path):
+        digest.update(f"{os.path.basename(module_path)}:{file_digest(module_path)}\n".encode('utf-8'))
+    digest = digest.hexdigest()
+    if options:
+        digest = hashlib.sha256(f"{digest}:{options}".encode('utf-8')).hexdigest()
+    return digest
+
+
+def load_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _output_digest(entry, output_path):
+    """Hashes the output, reusing the recorded hash when size and mtime are unchanged."""
+    try:
+        stat = os.stat(output_path)
+    except FileNotFoundError:
+        return None
+    if entry.get("output_size") == stat.st_size and entry.get("output_mtime_ns") == stat.st_mtime_ns:
+        return entry.get("output")
+    return file_digest(output_path)
+
+
+def is_up_to_date(manifest, name, source_digest, parser_digest, output_path):
+    """True when the source bytes, parser code and output all match the last build."""
+    entry = manifest.get(name)
+    if not entry or source_digest is None:
+        return False
+    return (entry.get("source") == source_digest
+            and entry.get("parser") == parser_digest
+            and _output_digest(entry, output_path) == entry.get("output"))
+
+
+def record_build(manifest, name, source_digest, parser_digest, output_path):
+    stat = os.stat(output_path)
+    manifest[name] = {
+        "source": source_digest,
+        "parser": parser_digest,
+        "output": file_digest(output_path),
+        "output_size": stat.st_size,
+        "output_mtime_ns": stat.st_mtime_ns,
+    }
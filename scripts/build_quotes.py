@@ -0,0 +1,298 @@
+import argparse
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import build_manifest
+import http_cache
+import instrumentation
+import parallel_parse
+import quote_output
+import quote_record
+import source_plugins
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# Every source goes through the same stages: fetch -> decode -> parse ->
+# dedup -> serialize, optionally followed by a cross-corpus near-duplicate
+# stage (near_dupes.py). Stage timings and record/byte counts are collected
+# with instrumentation.py and written to .cache/metrics/ after every run.
+# Fetching is network bound and runs on a thread pool; parsing is CPU bound
+# and runs on a process pool; dedup/emit is cheap and stays in this process.
+# Sources whose raw bytes, parser code and output match the build manifest
+# are skipped (in --offline mode before their cached copy is even read).
+# "segmented" parsers can additionally split one large text at book/chapter
+# headings and parse the pieces on their own process pool (--jobs, see
+# parallel_parse.py); the output is the same as a single-process parse.
+# In --offline mode, sources with a "parse_file" parser skip the read and
+# decode of their cached copy: only the file's location is passed on, and the
+# parser memory-maps it and decodes just the part it needs (mapped_source.py).
+# The sources come from the plugin registry (source_plugins.py); a scraper
+# module is only imported once its source is fetched or parsed.
+SOURCES = source_plugins.plugins()
+
+
+# --- Function Definitions ---
+def parse_source(parse, content, jobs=1):
+    """Runs a parser and counts its records; module level so worker processes can run it.
+
+    content is the decoded text, or (path, content type) for a "parse_file" parser."""
+    args = content if isinstance(content, tuple) else (content,)
+    quotes = parse(*args, jobs=jobs) if jobs != 1 else parse(*args)
+    instrumentation.count("records_in", len(quotes))
+    return quotes
+
+
+def locate_cached(url, offline=True):
+    """The "fetch" of a parse_file source in --offline mode: where its cached copy is."""
+    try:
+        with instrumentation.stage("fetch"):
+            return http_cache.cached_file(url)
+    except http_cache.CacheMiss as e:
+        logger.error("Error fetching URL %s: %s", url, e)
+        return None
+
+
+def select_sources(names):
+    return source_plugins.plugins(names)
+
+
+class BuildState:
+    """What both runners need to decide whether a source has to be rebuilt."""
+
+    def __init__(self, sources, offline=False, force=False, compact=False, jobs=1, stream=False):
+        self.offline = offline
+        self.force = force
+        self.compact = compact
+        self.jobs = jobs
+        self.stream = stream
+        self.manifest = build_manifest.load_manifest()
+        # Output options are part of the parser hash, so toggling them triggers a rebuild
+        options = " ".join(option for option, enabled in (("compact", compact), ("stream", stream)) if enabled)
+        self.parser_digests = {source["name"]: build_manifest.module_digest(source.module_path, options)
+                               for source in sources}
+        self.payload_sizes = {}
+        self.metrics = {source["name"]: instrumentation.new_record() for source in sources}
+        self.skipped = []
+
+    def up_to_date(self, source):
+        if self.force:
+            return False
+        return build_manifest.is_up_to_date(
+            self.manifest, source["name"], http_cache.cached_digest(source["url"]),
+            self.parser_digests[source["name"]], source["output"])
+
+    def skip(self, source):
+        logger.info("[%s] Source, parser and output unchanged, skipping.", source["name"])
+        self.skipped.append(source["name"])
+
+    def parse_jobs(self, source):
+        return self.jobs if source.get("segmented") else 1
+
+    def mapped(self, source):
+        return self.offline and "parse_file" in source
+
+    def fetch_function(self, source):
+        return locate_cached if self.mapped(source) else source["fetch"]
+
+    def parse_function(self, source):
+        return source["parse_file"] if self.mapped(source) else source["parse"]
+
+    def record(self, source, record):
+        instrumentation.merge(self.metrics[source["name"]], record)
+
+    def save(self, source, quotes):
+        name = source["name"]
+        sizes, record = instrumentation.measured(source["save"], quotes, source["output"], self.compact, self.stream)
+        metrics = self.metrics[name]
+        instrumentation.merge(metrics, {"stages": record["stages"], "counts": {}})
+        metrics["counts"].update(record["counts"]) # a re-save after --merge-near-dups replaces the output counts
+        if sizes:
+            self.payload_sizes[name] = sizes
+        if quotes and os.path.exists(source["output"]):
+            build_manifest.record_build(self.manifest, name, http_cache.cached_digest(source["url"]),
+                                        self.parser_digests[name], source["output"])
+
+
+def run_serial(sources, state):
+    """Runs every source one after another, exactly like the individual scripts."""
+    for source in sources:
+        if state.offline and state.up_to_date(source):
+            state.skip(source)
+            continue
+        content, record = instrumentation.measured(state.fetch_function(source), source["url"], state.offline)
+        state.record(source, record)
+        if not content:
+            logger.warning("[%s] Nothing fetched, skipping.", source["name"])
+            continue
+        if state.up_to_date(source):
+            state.skip(source)
+            continue
+        quotes, record = instrumentation.measured(parse_source, state.parse_function(source), content,
+                                                  state.parse_jobs(source), stage_name="parse")
+        state.record(source, record)
+        state.save(source, quotes)
+
+
+def run_pipelined(sources, state, fetch_workers, parse_workers, log_level=logging.INFO):
+    """Overlaps the fetches of all sources and parses each one as soon as it arrives."""
+    if state.offline:
+        for source in sources:
+            if state.up_to_date(source):
+                state.skip(source)
+        sources = [source for source in sources if source["name"] not in state.skipped]
+    if not sources:
+        return
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+         ProcessPoolExecutor(max_workers=parse_workers, initializer=instrumentation.configure_logging,
+                             initargs=(log_level,)) as parse_pool:
+        pending = {}
+        for source in sources:
+            future = fetch_pool.submit(instrumentation.measured, state.fetch_function(source), source["url"],
+                                       state.offline)
+            pending[future] = ("fetch", source)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, source = pending.pop(future)
+                result, record = future.result()
+                state.record(source, record)
+
+                if stage == "fetch":
+                    if not result:
+                        logger.warning("[%s] Nothing fetched, skipping.", source["name"])
+                    elif state.up_to_date(source):
+                        state.skip(source)
+                    else:
+                        future = parse_pool.submit(instrumentation.measured, parse_source, state.parse_function(source),
+                                                   result, state.parse_jobs(source), stage_name="parse")
+                        pending[future] = ("parse", source)
+                elif stage == "parse":
+                    state.save(source, result)
+
+
+def merge_near_duplicates(sources, state, threshold):
+    """Runs the cross-corpus MinHash/LSH stage and drops every near-duplicate but the first."""
+    import near_dupes # deferred, like the other optional stages in main()
+    records, clusters = near_dupes.run(quote_output.corpus_files(), threshold)
+    redundant = near_dupes.redundant_by_corpus(records, clusters)
+    for source in sources:
+        corpus = quote_output.corpus_name(source["output"])
+        if not redundant.get(corpus):
+            continue
+        with open(source["output"], 'r', encoding='utf-8') as f:
+            quotes = json.load(f)
+        kept = [quote_record.Quote.from_dict(quote) for index, quote in enumerate(quotes)
+                if index not in redundant[corpus]]
+        logger.info("[%s] Merging %d near-duplicate quotes.", source["name"], len(quotes) - len(kept))
+        state.save(source, kept)
+
+
+def print_report(metrics, wall_clock, mode, skipped=()):
+    stages = instrumentation.STAGES
+    print("\n--- Build timings (seconds) ---")
+    print(f"{'source':<14}" + "".join(f"{stage:>10}" for stage in stages) + f"{'total':>10}{'records':>9}{'KB in':>9}")
+    serial_baseline = 0.0
+    for name, record in metrics.items():
+        timings, counts = record["stages"], record["counts"]
+        total = sum(timings.values())
+        serial_baseline += total
+        row = "".join(f"{timings[stage]:>10.2f}" if stage in timings else f"{'-':>10}" for stage in stages)
+        records = counts.get("records_out", counts.get("records_in", "-"))
+        kb_in = f"{counts['bytes_in'] / 1024:.0f}" if "bytes_in" in counts else "-"
+        print(f"{name:<14}{row}{total:>10.2f}{records:>9}{kb_in:>9}")
+    if skipped:
+        print(f"\nUp to date, not rebuilt: {', '.join(skipped)}")
+    print(f"\nWall-clock ({mode}): {wall_clock * 1000:.1f}ms" if wall_clock < 1 else f"\nWall-clock ({mode}): {wall_clock:.2f}s")
+    print(f"Serial baseline (sum of all stages): {serial_baseline:.2f}s")
+    if wall_clock > 0 and mode != "serial":
+        print(f"Speedup: {serial_baseline / wall_clock:.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch, parse and emit every quote corpus in one build.")
+    parser.add_argument("sources", nargs="*", help="Sources to build (default: all). "
+                        f"Known: {', '.join(source['name'] for source in SOURCES)}")
+    parser.add_argument("--serial", action="store_true", help="Run the sources one after another (baseline).")
+    parser.add_argument("--offline", action="store_true", help="Parse only from the HTTP cache; no network I/O.")
+    parser.add_argument("--compact", action="store_true",
+                        help="Also write minified, field-hoisted .min.json payloads with .gz/.br siblings.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write each corpus record by record, plus a quotes_x.ndjson copy for tooling.")
+    parser.add_argument("--schedule-days", type=int, default=0,
+                        help="Also precompute data/daily/ quote files for this many days from today.")
+    parser.add_argument("--near-dups", action="store_true",
+                        help="Report near-identical quotes across all corpora (MinHash/LSH).")
+    parser.add_argument("--merge-near-dups", action="store_true",
+                        help="Like --near-dups, but keep only the first quote of each cluster.")
+    parser.add_argument("--near-dup-threshold", type=float,
+                        help="Jaccard similarity for --near-dups (default: near_dupes.DEFAULT_THRESHOLD, 0.8).")
+    parser.add_argument("--search-index", action="store_true",
+                        help="Also rebuild data/search_index.json (full-text index over all corpora).")
+    parser.add_argument("--sqlite", action="store_true",
+                        help="Also rebuild data/quotes.db (SQLite with filter indexes and FTS5 over all corpora).")
+    parser.add_argument("--related", action="store_true",
+                        help="Also rebuild data/related_quotes.json (the most similar quotes of every quote, TF-IDF).")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the build manifest says nothing changed.")
+    parser.add_argument("--fetch-workers", type=int, default=len(SOURCES), help="Concurrent downloads.")
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count() or 1, help="Parser processes.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Processes per large Gutenberg text, split at book/chapter headings (0 = one per CPU).")
+    instrumentation.add_logging_arguments(parser)
+    args = parser.parse_args(argv)
+    log_level = instrumentation.log_level(args.verbose, args.quiet)
+    instrumentation.configure_logging(log_level)
+
+    sources = select_sources(args.sources)
+    started_at = time.time()
+    start = time.perf_counter()
+    mode = "serial" if args.serial else "pipelined"
+    state = BuildState(sources, offline=args.offline, force=args.force, compact=args.compact,
+                       jobs=parallel_parse.resolve_jobs(args.jobs), stream=args.stream)
+    if args.serial:
+        run_serial(sources, state)
+    else:
+        run_pipelined(sources, state, args.fetch_workers, args.parse_workers, log_level)
+    # The optional stages import their modules only when they run, so a plain build starts without them
+    if args.near_dups or args.merge_near_dups:
+        import near_dupes
+        threshold = near_dupes.DEFAULT_THRESHOLD if args.near_dup_threshold is None else args.near_dup_threshold
+        if args.merge_near_dups:
+            merge_near_duplicates(sources, state, threshold)
+        else:
+            near_dupes.run(quote_output.corpus_files(), threshold)
+    if args.search_index:
+        import search_index
+        search_index.write_index()
+    if args.sqlite:
+        import corpus_db # loads sqlite3
+        corpus_db.write_database()
+    if args.related:
+        import related_quotes # loads numpy and scipy if installed; deferred so that other builds start without them
+        related_quotes.write_table()
+    build_manifest.save_manifest(state.manifest)
+    if args.schedule_days:
+        import build_schedule
+        build_schedule.write_schedule(source_plugins.get("hidden_words")["output"], days=args.schedule_days)
+    if state.payload_sizes:
+        quote_output.print_size_report(state.payload_sizes)
+    wall_clock = time.perf_counter() - start
+    metrics_path = instrumentation.write_metrics({
+        "started_at": started_at,
+        "mode": mode,
+        "offline": args.offline,
+        "wall_clock_s": wall_clock,
+        "skipped": state.skipped,
+        "sources": state.metrics,
+    })
+    print_report(state.metrics, wall_clock, mode, state.skipped)
+    print(f"Metrics: {metrics_path}")
+
+
+if __name__ == "__main__":
+    main()
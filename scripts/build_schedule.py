@@ -0,0 +1,90 @@
+import argparse
+import datetime
+import json
+import os
+
+import word_index
+
+# --- Configuration ---
+# Precomputes the quotes js/script.js would pick for each day, so the
+# homepage can fetch a ~1 KB file for today instead of the whole corpus.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DEFAULT_CORPUS_PATH = os.path.join(PROJECT_ROOT, 'data', 'quotes_hidden_words.json')
+DAILY_DIR = os.path.join(PROJECT_ROOT, 'data', 'daily')
+MAX_QUOTE_WORDS = 75 # keep in sync with MAX_QUOTE_WORDS in js/script.js
+DEFAULT_DAYS = 366
+
+
+# --- Function Definitions ---
+def filter_short(quotes, max_words=MAX_QUOTE_WORDS):
+    """Python twin of filterShort() in js/script.js; keeps the original order."""
+    return [quote for quote in quotes if word_index.count_words(quote.get("text")) <= max_words]
+
+
+def day_of_year(day):
+    """dayOfYear() in js/script.js: 1 for January 1st, by calendar date (no time of day or DST)."""
+    return day.timetuple().tm_yday
+
+
+def quote_for_day(quotes, day):
+    return quotes[day_of_year(day) % len(quotes)]
+
+
+def daily_selection(quotes, day):
+    """The today/yesterday pair js/script.js shows on `day`."""
+    yesterday = day - datetime.timedelta(days=1)
+    return {
+        "date": day.isoformat(),
+        "today": quote_for_day(quotes, day),
+        "yesterday": quote_for_day(quotes, yesterday),
+    }
+
+
+def write_schedule(corpus_path=DEFAULT_CORPUS_PATH, start=None, days=DEFAULT_DAYS,
+                   output_dir=DAILY_DIR, max_words=MAX_QUOTE_WORDS):
+    """Writes output_dir/YYYY-MM-DD.json for `days` days from `start`; returns the file count."""
+    with open(corpus_path, 'r', encoding='utf-8') as f:
+        quotes = filter_short(json.load(f), max_words)
+    if not quotes:
+        print(f"No quotes of at most {max_words} words in {corpus_path}; nothing scheduled.")
+        return 0
+
+    start = start or datetime.date.today()
+    os.makedirs(output_dir, exist_ok=True)
+    written = 0
+    for offset in range(days):
+        day = start + datetime.timedelta(days=offset)
+        payload = json.dumps(daily_selection(quotes, day), ensure_ascii=False, separators=(',', ':'))
+        path = os.path.join(output_dir, f"{day.isoformat()}.json")
+        # Leave files that already hold the right selection alone
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                if f.read() == payload:
+                    continue
+        except FileNotFoundError:
+            pass
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        written += 1
+
+    end = start + datetime.timedelta(days=days - 1)
+    print(f"Daily schedule {start.isoformat()} .. {end.isoformat()} in {output_dir} "
+          f"({written} of {days} files updated, {len(quotes)} quotes in rotation)")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the homepage's daily quote files.")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_PATH, help="Scraper output to schedule from.")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=None,
+                        help="First day (YYYY-MM-DD, default: today).")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="Number of days to write.")
+    parser.add_argument("--max-words", type=int, default=MAX_QUOTE_WORDS, help="Same as MAX_QUOTE_WORDS.")
+    parser.add_argument("--output-dir", default=DAILY_DIR)
+    args = parser.parse_args(argv)
+    write_schedule(args.corpus, args.start, args.days, args.output_dir, args.max_words)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import time
+
+import quote_ids
+import quote_output
+import quote_stream
+import search_index
+import word_index
+
+# --- Configuration ---
+# All corpora in one SQLite database, for analysis without loading every
+# JSON file. quotes has one row per quote with the columns worth filtering
+# on, B-tree indexes on those, and quotes_fts is an FTS5 index over the text
+# (external content, so the text is stored once). The database is built in a
+# temporary file with one bulk insert per corpus inside a single
+# transaction, indexed after loading, and renamed over DB_PATH when done.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DB_PATH = os.path.join(PROJECT_ROOT, 'data', 'quotes.db')
+SCHEMA = """
+CREATE TABLE quotes (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    corpus TEXT NOT NULL,
+    position INTEGER NOT NULL, -- index in data/quotes_<corpus>.json
+    tradition TEXT,
+    author TEXT,
+    book TEXT,
+    chapter INTEGER,
+    verse INTEGER,
+    speaker TEXT,
+    reference TEXT,
+    source TEXT,
+    word_count INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE quotes_fts USING fts5(
+    text, content='quotes', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+);
+"""
+# Created after the bulk load, which is faster than maintaining them row by row
+INDEXES = (
+    "CREATE UNIQUE INDEX quotes_by_id ON quotes(id)",
+    "CREATE INDEX quotes_by_corpus ON quotes(corpus, word_count)",
+    "CREATE INDEX quotes_by_tradition ON quotes(tradition, word_count)",
+    "CREATE INDEX quotes_by_word_count ON quotes(word_count)",
+    "CREATE INDEX quotes_by_book ON quotes(book, chapter, verse)",
+    "CREATE INDEX quotes_by_speaker ON quotes(speaker)",
+)
+COLUMNS = ("id", "corpus", "position", "tradition", "author", "book", "chapter", "verse", "speaker",
+           "reference", "source", "word_count", "text")
+
+
+# --- Function Definitions ---
+def _rows(corpus, path):
+    # IDs are recomputed like quote_ids.load_quotes does, for files saved before there were IDs
+    for position, quote in enumerate(quote_ids.iter_with_ids(quote_stream.iter_quotes(path), path)):
+        yield (quote["id"], corpus, position, quote.get("tradition"), quote.get("author"), quote.get("book"),
+               quote.get("chapter"), quote.get("verse"), quote.get("speaker"), quote.get("reference"),
+               quote.get("source"), word_index.count_words(quote["text"]), quote["text"])
+
+
+def write_database(paths=None, db_path=DB_PATH):
+    """Builds the database from data/quotes_*.json (or paths); returns the number of quotes."""
+    paths = paths or quote_output.corpus_files()
+    start = time.perf_counter()
+    tmp_path = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = sqlite3.connect(tmp_path, isolation_level=None)
+    try:
+        # The file only becomes visible after the rename, so crash safety is not needed while loading
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.executescript(SCHEMA)
+        insert = f"INSERT INTO quotes ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        connection.execute("BEGIN")
+        for path in paths:
+            connection.executemany(insert, _rows(quote_output.corpus_name(path), path))
+        for statement in INDEXES: # not executescript(), which would commit first
+            connection.execute(statement)
+        connection.execute("INSERT INTO quotes_fts(quotes_fts) VALUES ('rebuild')")
+        connection.execute("INSERT INTO quotes_fts(quotes_fts) VALUES ('optimize')")
+        connection.execute("COMMIT")
+        connection.execute("ANALYZE")
+        count = connection.execute("SELECT count(*) FROM quotes").fetchone()[0]
+        connection.close()
+        os.replace(tmp_path, db_path)
+    finally:
+        connection.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    print(f"Corpus database: {count} quotes from {len(paths)} corpora, "
+          f"{os.path.getsize(db_path) / 1024:.1f} KB, built in {time.perf_counter() - start:.2f}s -> {db_path}")
+    return count
+
+
+def connect(db_path=DB_PATH):
+    """A read-only connection to the database, with rows as sqlite3.Row."""
+    if not os.path.exists(db_path):
+        raise SystemExit(f"{db_path} does not exist; run `python corpus_db.py build` first.")
+    connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def match_expression(query, prefix=False):
+    """An FTS5 MATCH string requiring every word of query (the last as a prefix if prefix=True).
+
+    The words are tokenized like search_index.py and quoted, so FTS5 operators
+    in user input are treated as plain text. None if query has no words."""
+    terms = search_index.tokenize(query)
+    if not terms:
+        return None
+    expression = " ".join(f'"{term}"' for term in terms)
+    return expression + "*" if prefix else expression
+
+
+def find(connection, text=None, prefix=False, corpus=None, tradition=None, min_words=None, max_words=None,
+         limit=10):
+    """Quotes matching all the given filters: full-text matches best first, otherwise shortest first."""
+    conditions, parameters = [], []
+    for column, operator, value in (("corpus", "=", corpus), ("tradition", "=", tradition),
+                                    ("word_count", ">=", min_words), ("word_count", "<=", max_words)):
+        if value is not None:
+            conditions.append(f"quotes.{column} {operator} ?")
+            parameters.append(value)
+    if text is None:
+        sql = "SELECT quotes.* FROM quotes"
+        # Shortest first: the order of the (filter, word_count) indexes, so no sort is needed
+        order = "quotes.word_count, quotes.rowid"
+    else:
+        expression = match_expression(text, prefix)
+        if expression is None:
+            return []
+        sql = "SELECT quotes.* FROM quotes_fts JOIN quotes ON quotes.rowid = quotes_fts.rowid"
+        conditions.insert(0, "quotes_fts MATCH ?")
+        parameters.insert(0, expression)
+        order = "quotes_fts.rank"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {order} LIMIT ?"
+    return connection.execute(sql, parameters + [limit]).fetchall()
+
+
+def benchmark(connection, queries=200, seed=1):
+    """Median and p95 latency in microseconds for filter, full-text and combined lookups."""
+    rng = random.Random(seed)
+    connection.execute("CREATE VIRTUAL TABLE temp.quotes_vocab USING fts5vocab(main, quotes_fts, 'row')")
+    terms = [row[0] for row in connection.execute("SELECT term FROM temp.quotes_vocab")]
+    traditions = [row[0] for row in connection.execute("SELECT DISTINCT tradition FROM quotes")]
+    kinds = {
+        "tradition": lambda: dict(tradition=rng.choice(traditions), max_words=rng.randint(5, 40)),
+        "term": lambda: dict(text=rng.choice(terms)),
+        "two terms": lambda: dict(text=f"{rng.choice(terms)} {rng.choice(terms)}"),
+        "prefix": lambda: dict(text=rng.choice(terms)[:3], prefix=True),
+        "term+filter": lambda: dict(text=rng.choice(terms), tradition=rng.choice(traditions), max_words=30),
+    }
+    results = {}
+    for kind, make_query in kinds.items():
+        timings = []
+        for _ in range(queries):
+            filters = make_query()
+            start = time.perf_counter()
+            find(connection, **filters)
+            timings.append((time.perf_counter() - start) * 1e6)
+        timings.sort()
+        results[kind] = (statistics.median(timings), timings[int(0.95 * (len(timings) - 1))])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the SQLite database of all quote corpora.")
+    parser.add_argument("--db", default=DB_PATH, help="Database file (default: data/quotes.db).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Load data/quotes_*.json into the database.")
+    build_parser.add_argument("paths", nargs="*")
+    query_parser = subparsers.add_parser("query", help="Print quotes by full-text match and/or filters.")
+    query_parser.add_argument("text", nargs="?", help="Words that must all occur (full-text search).")
+    query_parser.add_argument("--prefix", action="store_true", help="Treat the last word as a prefix.")
+    query_parser.add_argument("--corpus")
+    query_parser.add_argument("--tradition")
+    query_parser.add_argument("--min-words", type=int)
+    query_parser.add_argument("--max-words", type=int)
+    query_parser.add_argument("--limit", type=int, default=10)
+    subparsers.add_parser("bench", help="Measure query latency.")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        write_database(args.paths, args.db)
+        return
+
+    connection = connect(args.db)
+    if args.command == "bench":
+        for kind, (p50, p95) in benchmark(connection).items():
+            print(f"  {kind:<12} p50 {p50:8.1f}us   p95 {p95:8.1f}us")
+        return
+
+    start = time.perf_counter()
+    rows = find(connection, args.text, args.prefix, args.corpus, args.tradition, args.min_words, args.max_words,
+                args.limit)
+    elapsed_us = (time.perf_counter() - start) * 1e6
+    print(f"{len(rows)} quotes in {elapsed_us:.0f}us")
+    for row in rows:
+        print(f"- {row['text']}\n  ({row['source'] or row['corpus']}, {row['word_count']} words)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import DecodeError, ProtocolError, ReadTimeoutError
+
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# Every download goes through one FetchClient: a pooled requests.Session
+# (connections to a host are reused), at most MAX_CONCURRENT transfers at
+# a time, a minimum interval between requests to the same host, retries with
+# exponential backoff and jitter for connection errors and 429/5xx answers
+# (honouring Retry-After), and resumption with an HTTP Range request when a
+# connection drops partway through a body, so a long download continues
+# where it stopped instead of starting over.
+USER_AGENT = "bahai-homepage-quotes/1.0 (+https://github.com/mschwar/bahai-homepage)"
+# bahai.org has always been fetched with a browser user agent; keep it that way
+HOST_USER_AGENTS = {
+    "www.bahai.org": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+}
+DEFAULT_TIMEOUT = (10, 30) # seconds to connect, seconds between received bytes
+MAX_CONCURRENT = 4
+# Seconds between the starts of two requests to the same host
+HOST_INTERVALS = {
+    "www.gutenberg.org": 2.0,
+    "www.bahai.org": 1.0,
+}
+DEFAULT_INTERVAL = 0.5
+# Per request, and for consecutive resumptions of a dropped body that bring
+# no new bytes; a resumption that makes progress starts the count again
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CHUNK_SIZE = 64 * 1024
+RETRYABLE_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError)
+
+
+# --- Function Definitions ---
+def _retry_after(response):
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _resume_validator(headers):
+    """The If-Range value that makes a Range request safe, or None if there is none.
+
+    Weak ETags may not be used with If-Range; Last-Modified is the fallback."""
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return headers.get('Last-Modified')
+
+
+def _iter_body(response, chunk_size):
+    """response.iter_content(), but every byte that arrived before a dropped connection is yielded.
+
+    iter_content() fills a whole chunk before handing it over, so a drop
+    loses the part of the chunk that did arrive; at the end of a body that
+    is everything the resumed request got. urllib3 2's read1() returns what
+    is there. Errors are raised as iter_content() raises them."""
+    raw = response.raw
+    if not hasattr(raw, 'read1'):
+        yield from response.iter_content(chunk_size)
+        return
+    try:
+        while True:
+            chunk = raw.read1(chunk_size, decode_content=True)
+            if not chunk:
+                return
+            yield chunk
+    except ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    except DecodeError as e:
+        raise requests.exceptions.ContentDecodingError(e)
+    except ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e)
+
+
+class Download:
+    """The part of requests.Response that http_cache uses, with a resumable body.
+
+    iter_content() holds one of the client's transfer slots until the body
+    has been read (or the iterator is closed)."""
+
+    def __init__(self, client, url, headers, timeout, response):
+        self.url = url
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self._client = client
+        self._request_headers = headers
+        self._timeout = timeout
+        self._response = response
+        self._content = None
+
+    def raise_for_status(self):
+        self._response.raise_for_status()
+
+    def close(self):
+        self._response.close()
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = b"".join(self.iter_content())
+        return self._content
+
+    def iter_content(self, chunk_size=CHUNK_SIZE):
+        received = 0
+        skip = 0 # bytes a full (200) re-download repeats from the start of the body
+        resumes = 0 # since the body last grew
+        received_at_drop = 0
+        with self._client.slots:
+            while True:
+                try:
+                    for chunk in _iter_body(self._response, chunk_size):
+                        if skip:
+                            dropped = min(skip, len(chunk))
+                            chunk = chunk[dropped:]
+                            skip -= dropped
+                        if chunk:
+                            received += len(chunk)
+                            yield chunk
+                    if skip:
+                        raise requests.exceptions.ChunkedEncodingError(f"{self.url} got shorter on resume")
+                    return
+                except RETRYABLE_ERRORS as e:
+                    self._response.close()
+                    if received > received_at_drop:
+                        # A flaky connection that keeps delivering is not out of retries
+                        resumes = 0
+                        received_at_drop = received
+                    if resumes >= self._client.retries:
+                        raise
+                    self._client.backoff(resumes, self.url, f"connection lost after {received} bytes ({e})")
+                    resumes += 1
+                    self._response, skip = self._client.resume(self.url, self._request_headers, self._timeout,
+                                                               self.headers, received)
+
+
+class FetchClient:
+    """Pooled, rate-limited HTTP GETs with retries and resumable bodies."""
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT, host_intervals=None, default_interval=DEFAULT_INTERVAL,
+                 retries=MAX_RETRIES, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX, timeout=DEFAULT_TIMEOUT):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max_concurrent)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.host_intervals = HOST_INTERVALS if host_intervals is None else host_intervals
+        self.default_interval = default_interval
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._next_start = {}
+
+    def wait_turn(self, host):
+        """Sleeps until host may be sent the next request; the turns are reserved under a lock."""
+        interval = self.host_intervals.get(host, self.default_interval)
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, 0.0))
+            self._next_start[host] = start + interval
+        if start > now:
+            time.sleep(start - now)
+
+    def backoff(self, attempt, url, reason, retry_after=None):
+        """Sleeps before retry number attempt + 1: full jitter over an exponentially growing window."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        logger.warning("Retrying %s in %.1fs after %s (attempt %d of %d).", url, delay, reason, attempt + 2,
+                       self.retries + 1)
+        instrumentation.count("http_retries")
+        time.sleep(delay)
+
+    def _send(self, url, headers, timeout):
+        """One GET with the retry loop for connection errors and retryable statuses (body not read yet)."""
+        host = urlsplit(url).hostname
+        request_headers = {'User-Agent': HOST_USER_AGENTS.get(host, USER_AGENT)}
+        request_headers.update(headers or {})
+        for attempt in range(self.retries + 1):
+            self.wait_turn(host)
+            try:
+                response = self.session.get(url, headers=request_headers, timeout=timeout or self.timeout,
+                                            stream=True)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.retries:
+                    raise
+                self.backoff(attempt, url, e)
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                response.close()
+                self.backoff(attempt, url, f"HTTP {response.status_code}", _retry_after(response))
+                continue
+            return response
+
+    def get(self, url, headers=None, timeout=None):
+        """GETs url; the body is read lazily through the returned Download."""
+        return Download(self, url, headers, timeout, self._send(url, headers, timeout))
+
+    def resume(self, url, headers, timeout, original_headers, received):
+        """Re-requests the rest of a body after received bytes: (response, bytes to skip).
+
+        A Range request is only made when the body was not content-encoded
+        (received counts decoded bytes) and a validator guarantees the same
+        representation; a 200 answer is a full body whose first bytes are skipped."""
+        resume_headers = dict(headers or {})
+        validator = _resume_validator(original_headers)
+        encoded = original_headers.get('Content-Encoding', 'identity') != 'identity'
+        if received and validator and not encoded:
+            resume_headers['Range'] = f"bytes={received}-"
+            resume_headers['If-Range'] = validator
+        response = self._send(url, resume_headers, timeout)
+        if response.status_code == 206 and response.headers.get('Content-Range', '').startswith(f"bytes {received}-"):
+            logger.info("Resuming %s at byte %d.", url, received)
+            instrumentation.count("http_resumed_bytes", received)
+            return response, 0
+        response.raise_for_status()
+        if response.status_code == 206:
+            response.close()
+            raise requests.exceptions.ChunkedEncodingError(f"{url} answered the resume with an unexpected range")
+        return response, received
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def default_client():
+    """The process-wide client, so every fetch shares its pool and rate limits."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = FetchClient()
+        return _default_client
+
+
+def get(url, headers=None, timeout=None):
+    return default_client().get(url, headers=headers, timeout=timeout)
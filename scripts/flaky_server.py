@@ -0,0 +1,226 @@
+import argparse
+import hashlib
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fetch_client
+import instrumentation
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# A local stand-in for gutenberg.org/bahai.org to exercise fetch_client
+# against: it serves the files of a directory with ETag/Last-Modified
+# (answering conditional requests with 304 and Range/If-Range requests with
+# 206) and, chosen by a seeded random generator, delays answers, fails them
+# with 503 or 429 + Retry-After, or drops the connection partway through the
+# body. Run it as a server, or with --self-test to download generated files
+# through a FetchClient and check that every byte arrives intact.
+DEFAULT_PORT = 8765
+DEFAULT_LATENCY = 0.05 # maximum seconds added before each answer
+DEFAULT_ERROR_RATE = 0.2 # share of requests answered with 503 or 429
+DEFAULT_DROP_RATE = 0.3 # share of bodies cut off partway
+WRITE_SIZE = 16 * 1024
+
+
+# --- Function Definitions ---
+class FlakyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug("%s " + format, self.address_string(), *args)
+
+    def _fail(self, status, headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        server = self.server
+        path = os.path.join(server.root, self.path.lstrip('/').split('?')[0])
+        with server.lock:
+            server.requests += 1
+            roll = server.rng.random()
+            latency = server.rng.uniform(0, server.latency)
+            drop_at = server.rng.random()
+        time.sleep(latency)
+        if roll < server.error_rate / 2:
+            return self._fail(503)
+        if roll < server.error_rate:
+            return self._fail(429, [('Retry-After', '0')])
+        if not os.path.isfile(path):
+            return self._fail(404)
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+        mtime = int(os.path.getmtime(path))
+        last_modified = formatdate(mtime, usegmt=True)
+        if self.headers.get('If-None-Match') == etag:
+            return self._fail(304, [('ETag', etag)])
+
+        status, start, end = 200, 0, len(body)
+        range_header = self.headers.get('Range', '')
+        if_range = self.headers.get('If-Range')
+        if range_header.startswith('bytes=') and (if_range is None or self._validates(if_range, etag, mtime)):
+            first, _, last = range_header[len('bytes='):].partition('-')
+            start = int(first)
+            end = min(int(last) + 1, len(body)) if last else len(body)
+            if start >= len(body):
+                return self._fail(416, [('Content-Range', f"bytes */{len(body)}")])
+            status = 206
+            with server.lock:
+                server.ranges += 1
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(end - start))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f"bytes {start}-{end - 1}/{len(body)}")
+        self.end_headers()
+
+        cut = end
+        if drop_at < server.drop_rate and end - start > 1:
+            cut = start + int((end - start) * server.rng.random())
+            with server.lock:
+                server.drops += 1
+        for offset in range(start, cut, WRITE_SIZE):
+            self.wfile.write(body[offset:min(offset + WRITE_SIZE, cut)])
+        if cut < end:
+            self.wfile.flush()
+            self.close_connection = True
+
+    @staticmethod
+    def _validates(if_range, etag, mtime):
+        if if_range.startswith('"'):
+            return if_range == etag
+        try:
+            return parsedate_to_datetime(if_range).timestamp() >= mtime
+        except (TypeError, ValueError):
+            return False
+
+
+class FlakyServer:
+    """The stand-in server on a background thread: `with FlakyServer(root) as server: server.url(name)`."""
+
+    def __init__(self, root, port=0, latency=DEFAULT_LATENCY, error_rate=DEFAULT_ERROR_RATE,
+                 drop_rate=DEFAULT_DROP_RATE, seed=0):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), FlakyHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.root = root
+        self.httpd.latency = latency
+        self.httpd.error_rate = error_rate
+        self.httpd.drop_rate = drop_rate
+        self.httpd.rng = random.Random(seed)
+        self.httpd.lock = threading.Lock()
+        self.httpd.requests = self.httpd.ranges = self.httpd.drops = 0
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def url(self, name):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/{name}"
+
+    def stats(self):
+        return {"requests": self.httpd.requests, "ranges": self.httpd.ranges, "drops": self.httpd.drops}
+
+
+def self_test(files, size, seed, **server_options):
+    """Downloads files random files through a FetchClient; returns True if all arrive intact."""
+    rng = random.Random(seed)
+    client = fetch_client.FetchClient(max_concurrent=2, host_intervals={}, default_interval=0,
+                                      retries=8, backoff_base=0.01, backoff_max=0.1)
+    ok = True
+    with tempfile.TemporaryDirectory() as root:
+        expected = {}
+        for number in range(files):
+            name = f"text_{number}.txt"
+            body = "".join(f"{line}:{rng.random()}\n" for line in range(size // 24)).encode('utf-8')
+            with open(os.path.join(root, name), 'wb') as f:
+                f.write(body)
+            expected[name] = hashlib.sha256(body).hexdigest()
+
+        with FlakyServer(root, seed=seed, **server_options) as server:
+            results = {}
+            errors = {}
+            records = []
+
+            def download(name):
+                with instrumentation.collect() as record:
+                    try:
+                        response = client.get(server.url(name))
+                        response.raise_for_status()
+                        results[name] = hashlib.sha256(response.content).hexdigest()
+                    except fetch_client.requests.exceptions.RequestException as e:
+                        errors[name] = e
+                records.append(record)
+
+            threads = [threading.Thread(target=download, args=(name,)) for name in expected]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            stats = server.stats()
+
+    for name, digest in expected.items():
+        if results.get(name) != digest:
+            print(f"FAILED {name}: {errors.get(name, 'missing') if name not in results else 'content differs'}")
+            ok = False
+    counts = {}
+    for record in records:
+        counts = instrumentation.merge({"stages": {}, "counts": counts}, record)["counts"]
+    print(f"{len(results)}/{files} files intact; server saw {stats['requests']} requests, "
+          f"dropped {stats['drops']} bodies, answered {stats['ranges']} range requests; "
+          f"client retried {counts.get('http_retries', 0)} times, "
+          f"resumed {counts.get('http_resumed_bytes', 0)} bytes")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a directory with injected latency and failures.")
+    parser.add_argument("root", nargs="?", default=".", help="Directory to serve (default: current directory)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="Maximum added delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_ERROR_RATE)
+    parser.add_argument("--drop-rate", type=float, default=DEFAULT_DROP_RATE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--self-test", action="store_true", help="Download generated files through fetch_client")
+    parser.add_argument("--files", type=int, default=6)
+    parser.add_argument("--size", type=int, default=2 * 1024 * 1024, help="Bytes per generated file")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR if args.self_test else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    options = dict(latency=args.latency, error_rate=args.error_rate, drop_rate=args.drop_rate)
+    if args.self_test:
+        return 0 if self_test(args.files, args.size, args.seed, **options) else 1
+    with FlakyServer(args.root, port=args.port, seed=args.seed, **options) as server:
+        print(f"Serving {os.path.abspath(args.root)} at {server.url('')} (Ctrl-C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
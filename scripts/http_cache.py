@@ -0,0 +1,261 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import instrumentation
+import text_decoding
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# Raw response bodies are stored once per distinct content (keyed by their
+# SHA-256) under objects/, and each URL gets a small index entry pointing at
+# its current object together with the validators needed for revalidation.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache', 'http')
+OBJECTS_DIR = os.path.join(CACHE_DIR, 'objects')
+INDEX_DIR = os.path.join(CACHE_DIR, 'index')
+
+
+class CacheMiss(Exception):
+    """Raised in offline mode when a URL has never been fetched."""
+
+
+class CachedResponse:
+    """The subset of requests.Response the scrapers use, backed by the cache.
+
+    Text is decoded with the encoding text_decoding detects (BOM, Content-Type
+    charset or Gutenberg header line), once, instead of trial decodes."""
+
+    def __init__(self, url, headers, path, from_cache, content=None):
+        self.url = url
+        self.headers = headers
+        self.path = path
+        self.from_cache = from_cache
+        self._content = content
+        self._encoding = None
+
+    @property
+    def content(self):
+        # Cache hits are only read from disk when the body is actually needed.
+        if self._content is None:
+            with open(self.path, 'rb') as f:
+                self._content = f.read()
+        return self._content
+
+    @property
+    def encoding(self):
+        if self._encoding is None:
+            if self._content is not None:
+                head = self._content[:text_decoding.SNIFF_BYTES]
+            else:
+                with open(self.path, 'rb') as f:
+                    head = f.read(text_decoding.SNIFF_BYTES)
+            self._encoding, _ = text_decoding.detect_encoding(head, self.headers.get('Content-Type', ''))
+        return self._encoding
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors='replace')
+
+    def iter_content(self, chunk_size=text_decoding.CHUNK_SIZE):
+        if self._content is not None:
+            for start in range(0, len(self._content), chunk_size):
+                yield self._content[start:start + chunk_size]
+        else:
+            yield from text_decoding.iter_file_chunks(self.path, chunk_size)
+
+    def iter_lines(self):
+        """Decoded lines of the body, read from disk a chunk at a time."""
+        return text_decoding.iter_lines(self.iter_content(), self.headers.get('Content-Type', ''))
+
+    def open_text(self):
+        """Opens the cached body as a text stream, so it can be consumed line by line."""
+        return io.TextIOWrapper(open(self.path, 'rb'), encoding=self.encoding, errors='replace')
+
+
+class StreamingResponse:
+    """A download that is handed to the caller chunk by chunk as it arrives.
+
+    The body is written to the cache while it is being read; the object and
+    index entry are only stored once the whole body has arrived. A reader that
+    stops early (the KJV parser stops at the end marker) still gets the
+    download cached: closing the iterator reads the rest of the body first."""
+
+    def __init__(self, url, response):
+        self.url = url
+        self.headers = response.headers
+        self.from_cache = False
+        self._response = response
+
+    def iter_content(self, chunk_size=text_decoding.CHUNK_SIZE):
+        os.makedirs(OBJECTS_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=OBJECTS_DIR, suffix='.part')
+        digest = hashlib.sha256()
+        size = 0
+        reading = True
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in self._response.iter_content(chunk_size):
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+                    if reading:
+                        try:
+                            yield chunk
+                        except GeneratorExit:
+                            # The reader is done; keep downloading (without yielding) to cache the body
+                            reading = False
+            path = object_path(digest.hexdigest())
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            _write_entry(self.url, self.headers, digest.hexdigest(), size)
+            instrumentation.count("bytes_in", size)
+        except Exception as e:
+            if reading:
+                raise
+            # Raised from close() the error would only be printed as ignored; the reader has its data
+            logger.warning("Could not cache %s, the rest of the body failed to download: %s", self.url, e)
+        finally:
+            # Left over when the download failed
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self._response.close()
+
+    def iter_lines(self):
+        """Decoded lines of the body, available while the download is still running."""
+        return text_decoding.iter_lines(self.iter_content(), self.headers.get('Content-Type', ''))
+
+
+# --- Function Definitions ---
+def fetch_errors():
+    """The exceptions a failed get() can raise, for `except http_cache.fetch_errors():`.
+
+    requests (through fetch_client) is only imported once something is
+    actually downloaded, so offline runs never load it; until then no
+    requests exception can have been raised either."""
+    requests = sys.modules.get('requests')
+    if requests is None:
+        return (CacheMiss,)
+    return (CacheMiss, requests.exceptions.RequestException)
+
+
+def _index_path(url):
+    return os.path.join(INDEX_DIR, hashlib.sha256(url.encode('utf-8')).hexdigest() + '.json')
+
+
+def object_path(digest):
+    return os.path.join(OBJECTS_DIR, digest[:2], digest)
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_entry(url):
+    """Returns the index entry for url, or None if it is not cached."""
+    try:
+        with open(_index_path(url), 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except (IOError, ValueError):
+        return None
+    if not os.path.exists(object_path(entry["sha256"])):
+        return None
+    return entry
+
+
+def cached_digest(url):
+    """SHA-256 of the cached body for url, without reading the body."""
+    entry = load_entry(url)
+    return entry["sha256"] if entry else None
+
+
+def cached_file(url):
+    """(path, content type) of the cached body for url, for parsers that map the file themselves.
+
+    Like an offline get(), but the body is not read; raises CacheMiss if url was never downloaded."""
+    entry = load_entry(url)
+    if entry is None:
+        raise CacheMiss(f"{url} is not in the cache; run once without --offline first")
+    instrumentation.count("bytes_in", entry["size"])
+    return object_path(entry["sha256"]), entry.get("content_type", '')
+
+
+def _write_entry(url, headers, digest, size):
+    entry = {
+        "url": url,
+        "sha256": digest,
+        "size": size,
+        "etag": headers.get('ETag'),
+        "last_modified": headers.get('Last-Modified'),
+        "content_type": headers.get('Content-Type', ''),
+        "fetched_at": time.time(),
+    }
+    _write_atomic(_index_path(url), json.dumps(entry, indent=2).encode('utf-8'))
+    return entry
+
+
+def _store(url, response):
+    digest = hashlib.sha256(response.content).hexdigest()
+    path = object_path(digest)
+    if not os.path.exists(path):
+        _write_atomic(path, response.content)
+    return _write_entry(url, response.headers, digest, len(response.content))
+
+
+def _response_from_entry(entry):
+    headers = {'Content-Type': entry.get("content_type", '')}
+    return CachedResponse(entry["url"], headers, object_path(entry["sha256"]), from_cache=True)
+
+
+def get(url, headers=None, timeout=None, offline=False, stream=False):
+    """Fetches url through the on-disk cache.
+
+    Online, a cached URL is revalidated with If-None-Match/If-Modified-Since
+    and a 304 is served from disk. Offline, only the cache is consulted and
+    CacheMiss is raised for URLs that were never downloaded. HTTP errors are
+    raised as requests exceptions, as with a plain requests.get. Downloads go
+    through fetch_client (shared session, rate limits, retries and resume);
+    headers and timeout override its defaults.
+    With stream=True a new download is returned as a StreamingResponse, to be
+    consumed with iter_content()/iter_lines() while it arrives."""
+    entry = load_entry(url)
+    if offline:
+        if entry is None:
+            raise CacheMiss(f"{url} is not in the cache; run once without --offline first")
+        logger.info("Offline: using cached copy of %s", url)
+        instrumentation.count("bytes_in", entry["size"])
+        return _response_from_entry(entry)
+
+    request_headers = dict(headers or {})
+    if entry:
+        if entry.get("etag"):
+            request_headers['If-None-Match'] = entry["etag"]
+        if entry.get("last_modified"):
+            request_headers['If-Modified-Since'] = entry["last_modified"]
+
+    import fetch_client # loads requests; deferred so that offline runs start without it
+    response = fetch_client.get(url, headers=request_headers, timeout=timeout)
+    if response.status_code == 304 and entry:
+        response.close()
+        logger.info("Not modified since last fetch, using cached copy of %s", url)
+        instrumentation.count("bytes_in", entry["size"])
+        return _response_from_entry(entry)
+    response.raise_for_status()
+    if stream:
+        return StreamingResponse(url, response)
+
+    entry = _store(url, response)
+    instrumentation.count("bytes_in", entry["size"])
+    return CachedResponse(url, response.headers, object_path(entry["sha256"]), from_cache=False,
+                          content=response.content)
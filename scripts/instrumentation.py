@@ -0,0 +1,131 @@
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+
+# --- Configuration ---
+# Stage timings and counters for one source are collected into a "record"
+# that is active for the current thread. Code on the build path marks its
+# work with `with instrumentation.stage("decode"):` and
+# instrumentation.count("bytes_in", n); outside collect() both are no-ops, so
+# the scrapers behave the same when run on their own.
+# Worker threads and processes each have their own active record, which
+# measured() hands back to the caller together with the result.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+METRICS_DIR = os.path.join(PROJECT_ROOT, '.cache', 'metrics')
+STAGES = ("fetch", "decode", "parse", "dedup", "serialize")
+LOG_FORMAT = "%(message)s"
+
+_active = threading.local()
+
+
+# --- Function Definitions ---
+def new_record():
+    return {"stages": {}, "counts": {}}
+
+
+@contextlib.contextmanager
+def collect(record=None):
+    """Makes record (a fresh one by default) the active record of this thread."""
+    record = record if record is not None else new_record()
+    previous = getattr(_active, "record", None)
+    _active.record = record
+    try:
+        yield record
+    finally:
+        _active.record = previous
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Adds the time spent in the block to stage `name` of the active record."""
+    record = getattr(_active, "record", None)
+    if record is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stages = record["stages"]
+        stages[name] = stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def count(name, amount=1):
+    record = getattr(_active, "record", None)
+    if record is not None:
+        record["counts"][name] = record["counts"].get(name, 0) + amount
+
+
+def measured(func, *args, stage_name=None):
+    """Runs func(*args) under a fresh record and returns (result, record).
+
+    With stage_name the whole call is timed as that stage as well. Kept at
+    module level so it can be shipped to worker processes."""
+    with collect() as record:
+        if stage_name is None:
+            return func(*args), record
+        with stage(stage_name):
+            result = func(*args)
+        return result, record
+
+
+def merge(into, record):
+    for name, seconds in record["stages"].items():
+        into["stages"][name] = into["stages"].get(name, 0.0) + seconds
+    for name, amount in record["counts"].items():
+        into["counts"][name] = into["counts"].get(name, 0) + amount
+    return into
+
+
+def write_metrics(run, metrics_dir=METRICS_DIR):
+    """Writes run to metrics_dir/<UTC timestamp>.json and latest.json; returns the first path."""
+    os.makedirs(metrics_dir, exist_ok=True)
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    payload = json.dumps(run, indent=2, sort_keys=True)
+    path = os.path.join(metrics_dir, f"{stamp}.json")
+    for target in (path, os.path.join(metrics_dir, 'latest.json')):
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(payload)
+    return path
+
+
+def log_level(verbose=0, quiet=False):
+    if quiet:
+        return logging.WARNING
+    return logging.DEBUG if verbose else logging.INFO
+
+
+def configure_logging(level=logging.INFO):
+    """Root logger setup shared by the scripts (and their worker processes)."""
+    logging.basicConfig(level=level, format=LOG_FORMAT, force=True)
+
+
+def add_logging_arguments(parser):
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="Show debug output.")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only show warnings and errors.")
+
+
+def scraper_args(description, jobs_help=None, argv=None):
+    """Parses the flags every scraper shares and sets up logging from them.
+
+    Returns the namespace with verbose, quiet, offline, compact and stream,
+    plus jobs (unresolved, as for parallel_parse.resolve_jobs) when the
+    scraper can split its text and passes jobs_help."""
+    parser = argparse.ArgumentParser(description=description)
+    add_logging_arguments(parser)
+    parser.add_argument("--offline", action="store_true",
+                        help="Parse the copy in the HTTP cache without touching the network.")
+    parser.add_argument("--compact", action="store_true", help="Also write the minified browser payload.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write the quotes record by record, with a .ndjson copy for tooling.")
+    if jobs_help:
+        parser.add_argument("--jobs", type=int, default=1, help=jobs_help)
+    args = parser.parse_args(argv)
+    configure_logging(log_level(args.verbose, args.quiet))
+    return args
@@ -0,0 +1,107 @@
+import mmap
+import re
+
+import text_decoding
+
+# --- Configuration ---
+# A local source file (a cached download or a fixture) is memory-mapped
+# instead of being read and decoded as a whole. The Gutenberg header and
+# footer markers and the chapter headings are located with byte regexes
+# directly on the mapping, and only the byte ranges a parser actually needs
+# are decoded, when it needs them. The pages of the file are shared with the
+# OS page cache, so opening even a large ebook costs next to nothing.
+#
+# Byte offsets only line up with characters for encodings in which ASCII
+# bytes always mean ASCII characters (UTF-8, Latin-1, cp1252, ...). For any
+# other encoding (UTF-16, UTF-32) byte_level is False and callers decode the
+# whole text instead.
+START_MARKER_REGEX = re.compile(rb"\*\*\* START OF THE PROJECT GUTENBERG EBOOK", re.IGNORECASE)
+END_MARKER_REGEX = re.compile(rb"\*\*\* END OF THE PROJECT GUTENBERG EBOOK", re.IGNORECASE)
+ASCII_PROBE = "\n\r\t *:.AZaz09"
+
+
+# --- Function Definitions ---
+def _ascii_compatible(encoding):
+    try:
+        return ASCII_PROBE.encode(encoding) == ASCII_PROBE.encode('ascii')
+    except (LookupError, UnicodeError):
+        return False
+
+
+class MappedSource:
+    """A read-only memory map of a raw source file, decoded on demand."""
+
+    def __init__(self, path, content_type=''):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # empty files cannot be mapped
+            self.data = b""
+        self.encoding, _ = text_decoding.detect_encoding(self.data[:text_decoding.SNIFF_BYTES], content_type)
+        self.byte_level = _ascii_compatible(self.encoding)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+    def __len__(self):
+        return len(self.data)
+
+    def _codec_at(self, start):
+        # The BOM is only at the very beginning of the file
+        return 'utf-8' if self.encoding == 'utf-8-sig' and start > 0 else self.encoding
+
+    def text(self, start=0, end=None):
+        """Decodes the bytes [start, end) of the file."""
+        end = len(self.data) if end is None else end
+        return self.data[start:end].decode(self._codec_at(start), errors='replace')
+
+    def iter_lines(self, start=0, end=None, chunk_size=text_decoding.CHUNK_SIZE):
+        """Decoded lines of [start, end), a chunk at a time, never holding the whole range."""
+        end = len(self.data) if end is None else end
+        chunks = (self.data[offset:min(offset + chunk_size, end)] for offset in range(start, end, chunk_size))
+        return text_decoding.iter_lines(chunks, encoding=self._codec_at(start))
+
+    def search(self, regex, start=0, end=None):
+        """The first match of a compiled bytes regex in [start, end), or None."""
+        return regex.search(self.data, start, len(self.data) if end is None else end)
+
+    def line_start(self, position):
+        return self.data.rfind(b"\n", 0, position) + 1
+
+    def next_line(self, position):
+        """Offset of the line after the one containing position (len() on the last line)."""
+        newline = self.data.find(b"\n", position)
+        return len(self.data) if newline == -1 else newline + 1
+
+    def gutenberg_range(self):
+        """Byte range between the Project Gutenberg start and end marker lines.
+
+        Starts after the line with the start marker and ends where the line
+        with the end marker begins (or at the end of the file). None when the
+        start marker is missing, so callers can fall back to their own rules."""
+        match = self.search(START_MARKER_REGEX)
+        if match is None:
+            return None
+        start = self.next_line(match.end())
+        end_match = self.search(END_MARKER_REGEX, start)
+        return start, (self.line_start(end_match.start()) if end_match else len(self.data))
+
+    def boundaries(self, regex, start=0, end=None):
+        """Offsets of the lines in [start, end) on which regex matches (e.g. chapter headings)."""
+        return [self.line_start(match.start()) for match in regex.finditer(self.data, start,
+                                                                           len(self.data) if end is None else end)]
+
+    def cut(self, starts, start=0, end=None):
+        """(start, end) byte ranges split at the given ascending offsets."""
+        end = len(self.data) if end is None else end
+        bounds = [start] + [offset for offset in starts if start < offset < end] + [end]
+        return list(zip(bounds, bounds[1:]))
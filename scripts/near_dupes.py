@@ -0,0 +1,225 @@
+import argparse
+import functools
+import json
+import logging
+import os
+import random
+import re
+import time
+import zlib
+from collections import defaultdict
+
+import quote_output
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# Near-duplicate detection across every corpus with MinHash + LSH: each quote
+# gets a short signature whose agreement estimates the Jaccard similarity of
+# its word 3-gram shingles, and quotes are only compared when some band of
+# their signatures collides, so the work grows roughly linearly with the corpus.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+REPORT_PATH = os.path.join(PROJECT_ROOT, '.cache', 'reports', 'near_duplicates.json')
+
+DEFAULT_THRESHOLD = 0.8
+NUM_PERM = 64
+SHINGLE_SIZE = 3
+# Buckets with more members than this are refrains shared by many quotes;
+# comparing every pair inside them would be quadratic, so their members are
+# sorted by signature and only neighbours in that order are paired. That can
+# miss true near-duplicates, so such buckets are counted, logged and reported.
+MAX_BUCKET_MEMBERS = 200
+PRIME = (1 << 31) - 1 # products of two values below it still fit in an int64
+
+_rng = random.Random(20250607) # fixed seed: signatures are stable between runs
+PERMUTATIONS = [(_rng.randrange(1, PRIME), _rng.randrange(0, PRIME)) for _ in range(NUM_PERM)]
+WORD_REGEX = re.compile(r"[^\W_]+(?:['’][^\W_]+)*")
+
+
+# --- Function Definitions ---
+def shingles(text):
+    words = WORD_REGEX.findall(text.casefold())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def shingle_hashes(shingle_set):
+    return [zlib.crc32(shingle.encode('utf-8')) % PRIME for shingle in shingle_set]
+
+
+@functools.lru_cache(maxsize=None)
+def _vectorized():
+    """(numpy, a, b) with the permutations as arrays, or None without numpy.
+
+    numpy is imported on the first signature, not with this module, so
+    build_quotes.py and quotes_cli.py start without it."""
+    try:
+        import numpy # optional: vectorizes the signatures, pip install numpy
+    except ImportError:
+        return None
+    return (numpy, numpy.array([a for a, _ in PERMUTATIONS], dtype=numpy.int64),
+            numpy.array([b for _, b in PERMUTATIONS], dtype=numpy.int64))
+
+
+def minhash_signature(hashes):
+    if not hashes:
+        return (PRIME,) * NUM_PERM
+    vectorized = _vectorized()
+    if vectorized is not None:
+        numpy, perm_a, perm_b = vectorized
+        values = numpy.array(hashes, dtype=numpy.int64)
+        mins = ((perm_a[:, None] * values[None, :] + perm_b[:, None]) % PRIME).min(axis=1)
+        return tuple(mins.tolist())
+    return tuple(min((a * x + b) % PRIME for x in hashes) for a, b in PERMUTATIONS)
+
+
+def choose_bands(threshold, num_perm=NUM_PERM):
+    """Picks bands x rows = num_perm whose S-curve midpoint (1/b)^(1/r) is closest to threshold."""
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def find_near_duplicates(records, threshold=DEFAULT_THRESHOLD):
+    """records: list of (corpus, index, quote). Returns (pairs, clusters, truncated).
+
+    pairs are (i, j, similarity) over positions in records, verified with the
+    exact shingle Jaccard; clusters are (positions, max similarity) with the
+    positions sorted, so the first one is the quote to keep; truncated is the
+    number of buckets over MAX_BUCKET_MEMBERS, where not every pair was compared."""
+    shingle_sets = [shingles(quote["text"]) for _, _, quote in records]
+    signatures = [minhash_signature(shingle_hashes(s)) for s in shingle_sets]
+    bands, rows = choose_bands(threshold)
+
+    candidates = set()
+    truncated = 0
+    for band in range(bands):
+        buckets = defaultdict(list)
+        lo = band * rows
+        for position, signature in enumerate(signatures):
+            if shingle_sets[position]:
+                buckets[signature[lo:lo + rows]].append(position)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            if len(members) > MAX_BUCKET_MEMBERS:
+                # Similar quotes agree on most of their signature, so they tend to sort next to each other
+                truncated += 1
+                members = sorted(members, key=lambda position: signatures[position])
+                candidates.update((min(i, j), max(i, j)) for i, j in zip(members, members[1:]))
+            else:
+                candidates.update((members[i], members[j])
+                                  for i in range(len(members)) for j in range(i + 1, len(members)))
+
+    pairs = []
+    for i, j in sorted(candidates):
+        similarity = jaccard(shingle_sets[i], shingle_sets[j])
+        if similarity >= threshold:
+            pairs.append((i, j, similarity))
+
+    # Union-find over the verified pairs
+    parent = list(range(len(records)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j, _ in pairs:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+    groups = defaultdict(set)
+    best = defaultdict(float)
+    for i, j, similarity in pairs:
+        root = find(i)
+        groups[root].update((i, j))
+        best[root] = max(best[root], similarity)
+    clusters = [(sorted(groups[root]), best[root]) for root in sorted(groups)]
+    if truncated:
+        logger.warning("%d LSH bucket(s) had more than %d members; only neighbouring signatures in them were "
+                       "compared, so some near-duplicates may be missed.", truncated, MAX_BUCKET_MEMBERS)
+    return pairs, clusters, truncated
+
+
+def build_report(records, pairs, clusters, threshold, elapsed, truncated=0):
+    bands, rows = choose_bands(threshold)
+
+    def describe(position):
+        corpus, index, quote = records[position]
+        return {"corpus": corpus, "index": index, "source": quote.get("source"), "text": quote["text"]}
+
+    return {
+        "threshold": threshold,
+        "num_perm": NUM_PERM,
+        "bands": bands,
+        "rows": rows,
+        "quotes": len(records),
+        "pairs": len(pairs),
+        "truncated_buckets": truncated, # over MAX_BUCKET_MEMBERS, not every pair compared
+        "seconds": round(elapsed, 3),
+        "clusters": [
+            {
+                "max_similarity": round(similarity, 3),
+                "cross_corpus": len({records[m][0] for m in members}) > 1,
+                "members": [describe(m) for m in members],
+            }
+            for members, similarity in clusters
+        ],
+    }
+
+
+def run(paths=None, threshold=DEFAULT_THRESHOLD, report_path=REPORT_PATH):
+    """Scans the corpora and writes the report; returns (records, clusters)."""
+    paths = paths or quote_output.corpus_files()
+    start = time.perf_counter()
+    records = quote_output.load_records(paths)
+    pairs, clusters, truncated = find_near_duplicates(records, threshold)
+    elapsed = time.perf_counter() - start
+    report = build_report(records, pairs, clusters, threshold, elapsed, truncated)
+
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    duplicates = sum(len(members) - 1 for members, _ in clusters)
+    print(f"Near-duplicates (Jaccard >= {threshold}): {len(clusters)} clusters, {duplicates} redundant quotes "
+          f"out of {len(records)} in {elapsed:.2f}s. Report: {report_path}")
+    return records, clusters
+
+
+def redundant_by_corpus(records, clusters):
+    """{corpus: set of indexes} for every cluster member but the first."""
+    redundant = defaultdict(set)
+    for members, _ in clusters:
+        for position in members[1:]:
+            corpus, index, _ = records[position]
+            redundant[corpus].add(index)
+    return redundant
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find near-identical quotes across all corpora (MinHash/LSH).")
+    parser.add_argument("paths", nargs="*", help="Corpus files (default: data/quotes_*.json).")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Jaccard similarity, 0-1.")
+    parser.add_argument("--report", default=REPORT_PATH)
+    args = parser.parse_args(argv)
+    run(args.paths, args.threshold, args.report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# --- Configuration ---
+# The Gutenberg parsers can cut their text at book/chapter headings, where
+# the parser state is reset anyway, and parse the pieces on a process pool.
+# The pieces are submitted largest first for better load balance, but the
+# results are always put back together in document order, so the output is
+# identical to the serial parse.
+
+
+# --- Function Definitions ---
+def resolve_jobs(jobs):
+    """0 or a negative number means one job per CPU."""
+    return jobs if jobs and jobs > 0 else os.cpu_count() or 1
+
+
+def parse_segments(parse_segment, segments, jobs, size=len):
+    """Runs parse_segment over every segment and concatenates the records in order.
+
+    parse_segment must be a module-level function so it can be sent to the
+    worker processes. With one job (or one segment) everything runs in-process.
+    size(segment) estimates the work in a segment, for the largest-first order."""
+    jobs = min(resolve_jobs(jobs), len(segments))
+    if jobs <= 1:
+        return [record for segment in segments for record in parse_segment(segment)]
+
+    results = [None] * len(segments)
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        order = sorted(range(len(segments)), key=lambda i: size(segments[i]), reverse=True)
+        futures = {pool.submit(parse_segment, segments[i]): i for i in order}
+        for future, i in futures.items():
+            results[i] = future.result()
+    return [record for result in results for record in result]
+
+
+def range_size(segment):
+    """size() for (path, content_type, start, end) byte-range segments."""
+    return segment[3] - segment[2]
+
+
+def cut(text, starts):
+    """Splits text at the given ascending offsets (the first piece starts at 0)."""
+    bounds = [0] + [start for start in starts if start > 0] + [len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:])]
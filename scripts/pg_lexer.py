@@ -0,0 +1,74 @@
+import re
+import sys
+
+# --- Configuration ---
+# The Project Gutenberg parsers classify every line (or paragraph) of their
+# text before deciding what to do with it. A LineLexer does that with one
+# compiled alternation of named patterns, tried in order at the start of the
+# stripped line, instead of a chain of separate regex matches and upper()
+# scans per line. The name of the alternative that matched is the token kind;
+# lines that match none are CONTINUATION. Patterns may define their own named
+# groups (prefixed with the kind, e.g. "verse_number") for the parsers to read.
+CONTINUATION = "continuation"
+ROMAN_NUMERAL = r"[IVXLCDM]+"
+
+# Inline Gita footnote markers like "[FN#12]" (with the spaces around them)
+# and the "_" of italicised words, removed from the text in a single pass.
+FOOTNOTE_REGEX = re.compile(r"\s*\[FN#\d+\]\s*|_")
+
+
+# --- Function Definitions ---
+def contains(literal):
+    """Pattern for "literal occurs anywhere in the line", ignoring case.
+
+    Equivalent to `literal.upper() in line.upper()` for the ASCII markers used
+    here, but the scan skips ahead with a case-sensitive class of everything
+    except the literal's first letter and never backtracks, which is several
+    times faster than `.*?literal` on lines that do not contain it. Possessive
+    quantifiers need Python 3.11; older versions get the `.*?literal` scan,
+    which matches the same lines."""
+    if sys.version_info < (3, 11):
+        return rf"(?is:.*?{re.escape(literal)})"
+    first = literal[0]
+    chars = re.escape(''.join(sorted({first.lower(), first.upper()})))
+    rest = f"(?i:{re.escape(literal[1:])})"
+    return rf"[^{chars}]*+(?:[{chars}](?!{rest})[^{chars}]*+)*+[{chars}]{rest}"
+
+
+# Matches the Project Gutenberg end marker anywhere in the line
+END_MARKER = contains("*** END OF THE PROJECT GUTENBERG EBOOK")
+
+
+class LineLexer:
+    """Classifies stripped lines with a single master regex."""
+
+    def __init__(self, rules):
+        # rules: (kind, pattern) pairs; the first that matches wins, like an if/elif chain
+        self.kinds = tuple(kind for kind, _ in rules)
+        self.regex = re.compile("|".join(f"(?P<{kind}>{pattern})" for kind, pattern in rules))
+
+    def classify(self, line):
+        """(kind, match) for one stripped line; match is None for continuation lines."""
+        match = self.regex.match(line)
+        if match is None:
+            return CONTINUATION, None
+        # The kind's group encloses all of its inner groups, so it is the last one to close
+        return match.lastgroup, match
+
+    def tokens(self, lines):
+        """(kind, match, stripped line) for every non-blank line."""
+        match_line = self.regex.match
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            match = match_line(line)
+            if match is None:
+                yield CONTINUATION, None, line
+            else:
+                yield match.lastgroup, match, line
+
+
+def remove_footnotes(text):
+    """Drops footnote markers and italics underscores and normalizes whitespace."""
+    return ' '.join(FOOTNOTE_REGEX.sub('', text).split())
@@ -0,0 +1,219 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+from collections import defaultdict
+
+import quote_output
+
+# --- Configuration ---
+# Every quote gets an ID derived from its corpus, reference and normalized
+# text, so it survives rebuilds that do not change the quote itself:
+#   id = sha256("<corpus>\x1f<reference>\x1f<normalized text>")[:ID_LENGTH]
+# The reference is the "reference" field, or "source" for corpora without one.
+#
+# A corpus version is the hash of its IDs in order. Whenever a save changes
+# the version, data/deltas/<corpus>/<old version>.json describes how to get
+# from the old to the new version, and data/deltas/<corpus>/latest.json names
+# the current one. A consumer holding version V fetches V.json and applies it
+# to its quote list (apply_delta, or applyDelta in js/script.js), repeating
+# until it reaches the latest version; when a delta is missing (pruned or
+# never written) or the result does not hash to the delta's version, it
+# reloads the full corpus. The order matters, since the word index, the
+# schedule and related_quotes.json refer to quotes by position: "positions"
+# gives the index of every added or modified quote in the new list, which is
+# enough while the other quotes keep their relative order; when they do not,
+# "order" lists all IDs of the new version.
+# Quotes are matched by their reference (plus occurrence number, since some
+# references repeat), so an edited quote shows up as "modified", not as an
+# unrelated removal and addition. Where references repeat across books (KJV
+# "3:5"), the "source" (which names the book) is matched instead.
+DELTAS_DIR = os.path.join(quote_output.DATA_DIR, 'deltas')
+DELTA_FORMAT = "quotes-delta/2"
+ID_LENGTH = 16 # 64 bits: collisions are not a concern at corpus sizes
+VERSION_LENGTH = 16
+MAX_DELTAS = 20 # older deltas are pruned; their holders fall back to the full corpus
+
+
+# --- Function Definitions ---
+def quote_reference(quote):
+    return quote.get("reference") or quote.get("source", "")
+
+
+def quote_id(corpus, quote):
+    normalized_text = ' '.join(quote["text"].split())
+    key = f"{corpus}\x1f{quote_reference(quote)}\x1f{normalized_text}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:ID_LENGTH]
+
+
+def iter_with_ids(quotes, filepath):
+    """Yields copies of the quotes with "id" as their first field.
+
+    Exact repeats of a quote at the same reference get a -2, -3, ... suffix."""
+    corpus = quote_output.corpus_name(filepath)
+    seen = defaultdict(int)
+    for quote in quotes:
+        base_id = quote_id(corpus, quote)
+        seen[base_id] += 1
+        new_quote = {"id": base_id if seen[base_id] == 1 else f"{base_id}-{seen[base_id]}"}
+        new_quote.update((key, value) for key, value in quote.items() if key != "id")
+        yield new_quote
+
+
+def with_ids(quotes, filepath):
+    """Copies of the quotes with "id" as their first field (see iter_with_ids)."""
+    return list(iter_with_ids(quotes, filepath))
+
+
+def corpus_version(quotes):
+    digest = hashlib.sha256("\n".join(quote["id"] for quote in quotes).encode('ascii'))
+    return digest.hexdigest()[:VERSION_LENGTH]
+
+
+def load_quotes(filepath):
+    """The quotes currently in filepath with their IDs (recomputed for files written before IDs), or None."""
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            quotes = json.load(f)
+    except (IOError, ValueError):
+        return None
+    return with_ids(quotes, filepath)
+
+
+def quote_keys(quotes, filepath):
+    """Each quote's "id", reference and source, for quotes read lazily from filepath
+    (IDs are recomputed for files written before IDs).
+
+    That is all compute_delta and corpus_version need of the previous build,
+    a fraction of the memory of the full records."""
+    return [{"id": quote["id"], "reference": quote_reference(quote), "source": quote.get("source", "")}
+            for quote in iter_with_ids(quotes, filepath)]
+
+
+def _references_unique(*quote_lists):
+    """True if no reference occurs twice within any of the lists."""
+    for quotes in quote_lists:
+        references = [quote_reference(quote) for quote in quotes]
+        if len(set(references)) != len(references):
+            return False
+    return True
+
+
+def _keyed_by_reference(quotes, use_source=False):
+    """{(reference, occurrence): quote}, or keyed by "source" with use_source."""
+    occurrences = defaultdict(int)
+    keyed = {}
+    for quote in quotes:
+        reference = quote.get("source", "") if use_source else quote_reference(quote)
+        occurrences[reference] += 1
+        keyed[(reference, occurrences[reference])] = quote
+    return keyed
+
+
+def compute_delta(previous, current):
+    """What changed from the previous to the current list of quotes (both with IDs)."""
+    previous_ids = {quote["id"] for quote in previous}
+    current_ids = {quote["id"] for quote in current}
+    use_source = not _references_unique(previous, current)
+    previous_by_key = _keyed_by_reference((quote for quote in previous if quote["id"] not in current_ids), use_source)
+    current_by_key = _keyed_by_reference((quote for quote in current if quote["id"] not in previous_ids), use_source)
+
+    added, modified = [], []
+    for key, quote in current_by_key.items():
+        old_quote = previous_by_key.pop(key, None)
+        if old_quote is None:
+            added.append(quote)
+        else:
+            modified.append({"replaces": old_quote["id"], "quote": quote})
+    removed = [quote["id"] for quote in previous_by_key.values()]
+    delta = {
+        "format": DELTA_FORMAT,
+        "base": corpus_version(previous),
+        "version": corpus_version(current),
+        "added": added,
+        "removed": removed,
+        "modified": modified,
+        "positions": [[position, quote["id"]] for position, quote in enumerate(current)
+                      if quote["id"] not in previous_ids],
+    }
+    kept_in_previous = [quote["id"] for quote in previous if quote["id"] in current_ids]
+    kept_in_current = [quote["id"] for quote in current if quote["id"] in previous_ids]
+    if kept_in_previous != kept_in_current:
+        delta["order"] = [quote["id"] for quote in current]
+    return delta
+
+
+def apply_delta(quotes, delta):
+    """The new list of quotes from the old one (what a consumer does).
+
+    Raises ValueError when the result is not the delta's version, e.g. because
+    quotes was not its base; the consumer then reloads the full corpus."""
+    new_quotes = {quote["id"]: quote for quote in delta["added"]}
+    new_quotes.update((change["quote"]["id"], change["quote"]) for change in delta["modified"])
+    if "order" in delta:
+        by_id = {quote["id"]: quote for quote in quotes}
+        by_id.update(new_quotes)
+        result = [by_id[quote_id_] for quote_id_ in delta["order"] if quote_id_ in by_id]
+    else:
+        dropped = set(delta["removed"]) | {change["replaces"] for change in delta["modified"]}
+        result = [quote for quote in quotes if quote["id"] not in dropped]
+        for position, quote_id_ in delta["positions"]: # ascending, so each lands at its final index
+            result.insert(position, new_quotes[quote_id_])
+    if corpus_version(result) != delta["version"]:
+        raise ValueError(f"delta {delta['base']} -> {delta['version']} does not apply to these quotes")
+    return result
+
+
+def delta_dir(filepath, deltas_dir=DELTAS_DIR):
+    return os.path.join(deltas_dir, quote_output.corpus_name(filepath))
+
+
+def _prune_deltas(directory):
+    paths = [path for path in glob.glob(os.path.join(directory, '*.json'))
+             if os.path.basename(path) != 'latest.json']
+    paths.sort(key=os.path.getmtime, reverse=True)
+    for path in paths[MAX_DELTAS:]:
+        os.remove(path)
+
+
+def write_delta(previous, current, filepath, deltas_dir=DELTAS_DIR):
+    """Writes the delta from the previous build of filepath, if anything changed.
+
+    previous is quote_keys() of filepath from before the corpus was overwritten,
+    None on the first build. Returns the delta, or None when nothing was written."""
+    directory = delta_dir(filepath, deltas_dir)
+    version = corpus_version(current)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'latest.json'), 'w', encoding='utf-8') as f:
+        json.dump({"version": version, "count": len(current)}, f, separators=(',', ':'))
+    if previous is None or corpus_version(previous) == version:
+        return None
+
+    delta = compute_delta(previous, current)
+    with open(os.path.join(directory, f"{delta['base']}.json"), 'w', encoding='utf-8') as f:
+        json.dump(delta, f, ensure_ascii=False, separators=(',', ':'))
+    _prune_deltas(directory)
+    return delta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the delta between two builds of a corpus.")
+    parser.add_argument("old", help="Previous quotes_<name>.json")
+    parser.add_argument("new", help="Current quotes_<name>.json")
+    args = parser.parse_args(argv)
+    previous = load_quotes(args.old)
+    current = load_quotes(args.new)
+    if previous is None or current is None:
+        raise SystemExit("Both files must be readable quote corpora.")
+    # Both files are read as builds of the new file's corpus
+    previous = with_ids(previous, args.new)
+    delta = compute_delta(previous, current)
+    print(f"{delta['base']} -> {delta['version']}: {len(delta['added'])} added, "
+          f"{len(delta['removed'])} removed, {len(delta['modified'])} modified")
+    for change in delta["modified"]:
+        print(f"~ {change['replaces']} -> {change['quote']['id']} ({quote_reference(change['quote'])})")
+
+
+if __name__ == "__main__":
+    main()
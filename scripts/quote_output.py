@@ -0,0 +1,139 @@
+import glob
+import gzip
+import json
+import logging
+import os
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
+# Fields that repeat across a corpus ("author", "tradition", ...) are stored
+# once in a per-field table and referenced by index from every row.
+HOISTED_FIELDS = ("author", "speaker", "translator", "tradition", "book")
+COMPACT_FORMAT = "quotes-compact/1"
+
+
+# --- Function Definitions ---
+def compact_payload(quotes):
+    """Builds the compact browser payload for a list of quote dicts.
+
+    Layout: {"format", "fields", "tables", "rows"}. Each row lists the values
+    of "fields" in order; hoisted fields hold an index into tables[field].
+    Trailing missing values are dropped from a row, inner ones are null."""
+    fields = []
+    for quote in quotes:
+        for key in quote:
+            if key not in fields:
+                fields.append(key)
+
+    tables = {field: [] for field in fields if field in HOISTED_FIELDS}
+    table_positions = {field: {} for field in tables}
+    rows = []
+    for quote in quotes:
+        row = []
+        for field in fields:
+            value = quote.get(field)
+            if value is not None and field in tables:
+                positions = table_positions[field]
+                if value not in positions:
+                    positions[value] = len(tables[field])
+                    tables[field].append(value)
+                value = positions[value]
+            row.append(value)
+        while row and row[-1] is None:
+            row.pop()
+        rows.append(row)
+
+    return {"format": COMPACT_FORMAT, "fields": fields, "tables": tables, "rows": rows}
+
+
+def expand_payload(payload):
+    """Turns a compact payload back into the list of quote dicts."""
+    fields, tables = payload["fields"], payload["tables"]
+    quotes = []
+    for row in payload["rows"]:
+        quote = {}
+        for field, value in zip(fields, row):
+            if value is None:
+                continue
+            quote[field] = tables[field][value] if field in tables else value
+        quotes.append(quote)
+    return quotes
+
+
+def compact_path(filepath):
+    """data/quotes_x.json -> data/quotes_x.min.json"""
+    root, ext = os.path.splitext(filepath)
+    return f"{root}.min{ext}"
+
+
+def write_compact_payload(quotes, filepath):
+    """Writes the minified compact payload next to filepath plus .gz/.br siblings.
+
+    Returns {label: size in bytes} for the size report."""
+    payload = json.dumps(compact_payload(quotes), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    min_path = compact_path(filepath)
+    sizes = {}
+    if os.path.exists(filepath):
+        sizes["pretty"] = os.path.getsize(filepath)
+
+    with open(min_path, 'wb') as f:
+        f.write(payload)
+    sizes["min"] = len(payload)
+
+    # mtime=0 keeps the .gz byte-identical between builds of the same payload
+    gz_payload = gzip.compress(payload, compresslevel=9, mtime=0)
+    with open(min_path + '.gz', 'wb') as f:
+        f.write(gz_payload)
+    sizes["min.gz"] = len(gz_payload)
+
+    if brotli is not None:
+        br_payload = brotli.compress(payload, quality=11)
+        with open(min_path + '.br', 'wb') as f:
+            f.write(br_payload)
+        sizes["min.br"] = len(br_payload)
+    else:
+        logger.info("brotli is not installed; skipping the .br sibling (pip install brotli).")
+    return sizes
+
+
+def print_size_report(size_reports):
+    """Prints a per-corpus size comparison for {corpus: sizes} as returned above."""
+    labels = ("pretty", "min", "min.gz", "min.br")
+    print("\n--- Payload sizes (KB) ---")
+    print(f"{'corpus':<28}" + "".join(f"{label:>10}" for label in labels) + f"{'saved':>10}")
+    for corpus, sizes in size_reports.items():
+        row = "".join(f"{sizes[label] / 1024:>10.1f}" if label in sizes else f"{'-':>10}" for label in labels)
+        smallest = min(size for label, size in sizes.items() if label != "pretty")
+        saved = f"{100 * (1 - smallest / sizes['pretty']):.0f}%" if sizes.get("pretty") else "-"
+        print(f"{corpus:<28}{row}{saved:>10}")
+
+
+def corpus_files(data_dir=DATA_DIR):
+    """The scraper outputs, i.e. data/quotes_<name>.json without derived .min/.words files."""
+    paths = glob.glob(os.path.join(data_dir, 'quotes_*.json'))
+    return sorted(path for path in paths if '.' not in os.path.basename(path)[:-len('.json')])
+
+
+def corpus_name(filepath):
+    """data/quotes_x.json -> x"""
+    return os.path.basename(filepath)[len('quotes_'):-len('.json')]
+
+
+def load_records(paths):
+    """(corpus, index, quote) for every quote; corpus is <name> from quotes_<name>.json."""
+    records = []
+    for path in paths:
+        corpus = corpus_name(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            for index, quote in enumerate(json.load(f)):
+                records.append((corpus, index, quote))
+    return records
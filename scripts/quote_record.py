@@ -0,0 +1,63 @@
+import sys
+
+import quote_output
+
+# --- Configuration ---
+# The parsers build one Quote per verse or paragraph instead of a dict. A
+# Quote has __slots__, so it carries no per-instance __dict__ (a dict per
+# record costs more than its strings for short verses), and the fields that
+# repeat across a whole corpus ("author", "tradition", "book", ...) are
+# interned, so every record of a corpus points at the same string objects,
+# also after a round trip through a worker process. Fields a corpus does
+# not use stay None and are left out of to_dict(), which gives the JSON
+# shape the scrapers have always written; FIELDS is that key order.
+FIELDS = ("text", "source", "author", "speaker", "translator", "tradition", "book", "reference",
+          "book_number", "chapter", "verse")
+INTERNED_FIELDS = quote_output.HOISTED_FIELDS
+
+
+# --- Function Definitions ---
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class Quote:
+    """One quote record: text, source and the optional fields of FIELDS."""
+
+    __slots__ = FIELDS
+
+    def __init__(self, text, source, author=None, speaker=None, translator=None, tradition=None, book=None,
+                 reference=None, book_number=None, chapter=None, verse=None):
+        self.text = text
+        self.source = source
+        self.author = _intern(author)
+        self.speaker = _intern(speaker)
+        self.translator = _intern(translator)
+        self.tradition = _intern(tradition)
+        self.book = _intern(book)
+        self.reference = reference
+        self.book_number = book_number
+        self.chapter = chapter
+        self.verse = verse
+
+    def __reduce__(self):
+        # Rebuilt through __init__, so a parallel parse gets interned fields back
+        return Quote, tuple(getattr(self, field) for field in FIELDS)
+
+    def __eq__(self, other):
+        if not isinstance(other, Quote):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in FIELDS)
+
+    def __repr__(self):
+        return f"Quote({self.source!r}, {self.text[:40]!r})"
+
+    def to_dict(self):
+        """The JSON shape of the quote: the fields that are set, in FIELDS order."""
+        return {field: value for field in FIELDS if (value := getattr(self, field)) is not None}
+
+    @classmethod
+    def from_dict(cls, data):
+        """A Quote from a saved record; keys outside FIELDS (like "id") are dropped."""
+        return cls(**{field: data[field] for field in FIELDS if field in data})
+
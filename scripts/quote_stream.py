@@ -0,0 +1,209 @@
+import contextlib
+import itertools
+import json
+import logging
+import os
+import tempfile
+
+import instrumentation
+import quote_ids
+import quote_output
+import word_index
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# Corpus files are written record by record into a temporary file next to
+# the destination, which is renamed over it only once the last record is on
+# disk, so an interrupted build never leaves a truncated data/quotes_*.json
+# behind for fetchQuotes to choke on. write_corpus writes exactly the
+# indented array json.dump(..., indent=2) would, plus optionally a JSON
+# Lines sibling (quotes_x.ndjson, one compact record per line) for Python
+# tooling. iter_quotes reads either format lazily, one record at a time.
+# save_quotes is the save step of every scraper: deduplicate, assign IDs,
+# write the corpus and everything derived from it (delta, word index and,
+# with compact, the browser payload).
+CHUNK_SIZE = 1024 * 1024
+
+
+# --- Function Definitions ---
+@contextlib.contextmanager
+def atomic_open(path):
+    """Opens a temporary file for writing text that replaces path when the block succeeds."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def ndjson_path(filepath):
+    """data/quotes_x.json -> data/quotes_x.ndjson"""
+    return os.path.splitext(filepath)[0] + '.ndjson'
+
+
+def _array_item(record):
+    # A record as json.dump(list, indent=2) nests it: every line indented once more
+    return "  " + json.dumps(record, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+
+
+def _ndjson_line(record):
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+
+
+def write_corpus(records, filepath, ndjson=False):
+    """Streams records into filepath as an indented JSON array and, with ndjson,
+    into its .ndjson sibling as JSON Lines, in one pass.
+
+    Both files are replaced after the last record; returns the record count."""
+    count = 0
+    with contextlib.ExitStack() as stack:
+        array_file = stack.enter_context(atomic_open(filepath))
+        lines_file = stack.enter_context(atomic_open(ndjson_path(filepath))) if ndjson else None
+        array_file.write("[")
+        for record in records:
+            array_file.write(",\n" if count else "\n")
+            array_file.write(_array_item(record))
+            if lines_file is not None:
+                lines_file.write(_ndjson_line(record))
+            count += 1
+        array_file.write("\n]" if count else "]")
+    return count
+
+
+def _iter_ndjson(f):
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _iter_json_array(f, chunk_size):
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_size)
+    position = len(buffer) - len(buffer.lstrip())
+    if buffer[position:position + 1] != "[":
+        raise ValueError(f"{f.name} does not contain a JSON array")
+    position += 1
+    at_eof = False
+    while True:
+        # Skip the whitespace and comma between records
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        try:
+            if position == len(buffer):
+                raise json.JSONDecodeError("need more data", buffer, position)
+            record, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if at_eof:
+                raise
+            more = f.read(chunk_size)
+            at_eof = not more
+            buffer = buffer[position:] + more
+            position = 0
+            continue
+        yield record
+
+
+def iter_quotes(filepath, chunk_size=CHUNK_SIZE):
+    """Yields the records of a .ndjson or JSON-array corpus file one at a time."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        if filepath.endswith('.ndjson'):
+            yield from _iter_ndjson(f)
+        else:
+            yield from _iter_json_array(f, chunk_size)
+
+
+class QuoteFile:
+    """A corpus file as a re-iterable sequence of records, read lazily on every pass.
+
+    Stands in for the list of saved quotes (len() and repeated iteration) in
+    the outputs written after a streamed save."""
+
+    def __init__(self, filepath, count=None):
+        self.filepath = filepath
+        self._count = count
+
+    def __iter__(self):
+        return iter_quotes(self.filepath)
+
+    def __len__(self):
+        if self._count is None:
+            self._count = sum(1 for _ in self)
+        return self._count
+
+
+def normalized_text(quote):
+    """The default duplicate key: the quote's text with whitespace normalized."""
+    return ' '.join(quote.text.split())
+
+
+def unique_quotes(quotes, key=normalized_text):
+    """The quotes without repeats of the same key; lazy, so a streamed save never holds the corpus."""
+    seen_keys = set()
+    for quote in quotes:
+        unique_key = key(quote)
+        if unique_key not in seen_keys:
+            seen_keys.add(unique_key)
+            yield quote
+        else:
+            logger.debug("Duplicate text skipped: %s", quote.source)
+
+
+def load_previous_keys(filepath):
+    """quote_ids.quote_keys() of the corpus currently in filepath, or None if there is none."""
+    try:
+        return quote_ids.quote_keys(iter_quotes(filepath), filepath)
+    except (IOError, ValueError):
+        return None
+
+
+def save_quotes(quotes, filepath, compact=False, stream=False, key=normalized_text):
+    """Writes the deduplicated quote_record.Quote objects to filepath, each with a stable "id".
+
+    The file is written record by record and replaces filepath only when
+    complete. A word-count index (.words.json) and, when the corpus changed,
+    a delta against the previous build (data/deltas/, see quote_ids.py) are
+    always written alongside. With compact=True the minified browser payload
+    and its .gz/.br siblings are written as well, and their sizes are returned.
+    With stream=True quotes may be any iterable, e.g. a parser's generator:
+    the records are deduplicated and written one at a time, also to a
+    .ndjson sibling, and the other outputs read them back from it lazily.
+    Quotes with the same key(quote) as an earlier one are dropped."""
+    quotes = iter(quotes)
+    first_quote = next(quotes, None)
+    if first_quote is None:
+        logger.warning("No quotes to save.")
+        return
+    unique = unique_quotes(itertools.chain([first_quote], quotes), key)
+    if not stream:
+        with instrumentation.stage("dedup"):
+            unique = list(unique)
+    try:
+        with instrumentation.stage("serialize"):
+            previous_quotes = load_previous_keys(filepath)
+            records = quote_ids.iter_with_ids((quote.to_dict() for quote in unique), filepath)
+            lines_path = ndjson_path(filepath)
+            if stream:
+                saved_quotes = QuoteFile(lines_path, write_corpus(records, filepath, ndjson=True))
+            else:
+                # A .ndjson sibling from an earlier streamed save is kept up to date
+                saved_quotes = list(records)
+                write_corpus(saved_quotes, filepath, ndjson=os.path.exists(lines_path))
+            quote_ids.write_delta(previous_quotes, saved_quotes, filepath)
+            word_index.write_word_index(saved_quotes, filepath)
+            sizes = quote_output.write_compact_payload(saved_quotes, filepath) if compact else None
+        instrumentation.count("records_out", len(saved_quotes))
+        instrumentation.count("bytes_out", os.path.getsize(filepath))
+        logger.info("Quotes successfully saved to: %s (%d unique quotes)", filepath, len(saved_quotes))
+        return sizes
+    except IOError as e:
+        logger.error("Error saving quotes to %s: %s", filepath, e)
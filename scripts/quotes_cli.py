@@ -0,0 +1,132 @@
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+import build_manifest
+import build_quotes
+import instrumentation
+import parallel_parse
+import quote_output
+import quote_stream
+import source_plugins
+import word_index
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# One entry point for the corpus tooling:
+#   build  - build_quotes.py, with the same arguments
+#   parse  - run one source's parser, from the HTTP cache unless --online
+#   list   - the registered source plugins and whether their requirements are installed
+#   stats  - record and word counts of every corpus, plus the last build's metrics
+# Sources come from source_plugins.py, which imports a scraper module only
+# when its source actually runs, so list/stats and an offline parse of a
+# Gutenberg text start without loading requests, bs4 or lxml.
+SIZE_SUFFIXES = ('.min.json', '.min.json.gz', '.min.json.br', '.ndjson', '.words.json')
+
+
+# --- Function Definitions ---
+def parse_command(args):
+    plugin = source_plugins.get(args.source)
+    missing = plugin.missing_requirements(online=args.online)
+    if missing:
+        raise SystemExit(f"{plugin.name} needs {', '.join(missing)}; pip install {' '.join(missing)}")
+    state = build_quotes.BuildState([plugin], offline=not args.online, jobs=parallel_parse.resolve_jobs(args.jobs))
+    start = time.perf_counter()
+    content, fetch_record = instrumentation.measured(state.fetch_function(plugin), plugin["url"], state.offline)
+    if not content:
+        logger.error("[%s] Nothing fetched.", plugin.name)
+        return 1
+    quotes, parse_record = instrumentation.measured(build_quotes.parse_source, state.parse_function(plugin), content,
+                                                    state.parse_jobs(plugin), stage_name="parse")
+    elapsed = time.perf_counter() - start
+    timings = {**fetch_record["stages"], **parse_record["stages"]}
+    print(f"{plugin.name}: {len(quotes)} quotes in {elapsed:.2f}s ("
+          + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()) + ")")
+    for quote in quotes[:args.show]:
+        print(f"- {quote.text}\n  ({quote.source})")
+    if args.save:
+        state.save(plugin, quotes)
+        build_manifest.save_manifest(state.manifest)
+    return 0
+
+
+def list_command(args):
+    print(f"{'source':<14}{'module':<24}{'parse_file':>11}{'segmented':>10}  requires")
+    for plugin in source_plugins.plugins():
+        requires = [f"{name}{'' if source_plugins.is_installed(name) else ' (missing)'}"
+                    for name in plugin.get("requires", ()) + source_plugins.FETCH_REQUIRES]
+        print(f"{plugin.name:<14}{plugin.spec['module']:<24}{'yes' if 'parse_file' in plugin else '-':>11}"
+              f"{'yes' if plugin.get('segmented') else '-':>10}  {', '.join(requires)}")
+    print(f"\n({', '.join(source_plugins.FETCH_REQUIRES)} is only needed to download, not for offline parses.)")
+    return 0
+
+
+def corpus_stats(path):
+    """(records, total words, median words, longest quote in words) of a corpus file."""
+    counts = [word_index.count_words(quote["text"]) for quote in quote_stream.iter_quotes(path)]
+    if not counts:
+        return 0, 0, 0, 0
+    return len(counts), sum(counts), statistics.median(counts), max(counts)
+
+
+def stats_command(args):
+    paths = quote_output.corpus_files()
+    if not paths:
+        print(f"No corpora in {quote_output.DATA_DIR}; run `python quotes_cli.py build` first.")
+        return 1
+    print(f"{'corpus':<14}{'quotes':>8}{'words':>10}{'median':>8}{'max':>6}{'KB':>9}  derived files (KB)")
+    totals = [0, 0]
+    for path in paths:
+        records, words, median, longest = corpus_stats(path)
+        totals[0] += records
+        totals[1] += words
+        base = os.path.splitext(path)[0]
+        derived = [f"{suffix[1:]} {os.path.getsize(base + suffix) / 1024:.0f}"
+                   for suffix in SIZE_SUFFIXES if os.path.exists(base + suffix)]
+        print(f"{quote_output.corpus_name(path):<14}{records:>8}{words:>10}{median:>8g}{longest:>6}"
+              f"{os.path.getsize(path) / 1024:>9.0f}  {', '.join(derived)}")
+    print(f"{'total':<14}{totals[0]:>8}{totals[1]:>10}")
+
+    latest = os.path.join(instrumentation.METRICS_DIR, 'latest.json')
+    if os.path.exists(latest):
+        with open(latest, 'r', encoding='utf-8') as f:
+            run = json.load(f)
+        started = time.strftime('%Y-%m-%d %H:%M', time.localtime(run["started_at"]))
+        print(f"\nLast build: {started}, {run['mode']}{' offline' if run['offline'] else ''}, "
+              f"{run['wall_clock_s']:.2f}s wall-clock; skipped: {', '.join(run['skipped']) or 'none'}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build, parse and inspect the quote corpora.")
+    instrumentation.add_logging_arguments(parser)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    # Everything after `build` (including --help) is handed to build_quotes.py
+    subparsers.add_parser("build", add_help=False, help="Run build_quotes.py with the remaining arguments.")
+    parse_parser = subparsers.add_parser("parse", help="Parse one source and report what it found.")
+    parse_parser.add_argument("source", choices=list(source_plugins.PLUGINS))
+    parse_parser.add_argument("--online", action="store_true", help="Download the source instead of using the cache.")
+    parse_parser.add_argument("--jobs", type=int, default=1,
+                              help="Processes for a segmented source (0 = one per CPU).")
+    parse_parser.add_argument("--show", type=int, default=0, metavar="N", help="Print the first N quotes.")
+    parse_parser.add_argument("--save", action="store_true",
+                              help="Save the quotes like a build does (corpus file, word index, delta, manifest).")
+    subparsers.add_parser("list", help="Show the registered sources and their requirements.")
+    subparsers.add_parser("stats", help="Show quote and word counts per corpus and the last build's metrics.")
+    args, rest = parser.parse_known_args(argv)
+    if args.command == "build":
+        return build_quotes.main(rest)
+    if rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    instrumentation.configure_logging(instrumentation.log_level(args.verbose, args.quiet))
+    commands = {"parse": parse_command, "list": list_command, "stats": stats_command}
+    return commands[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+import argparse
+import json
+import math
+import os
+import time
+from collections import Counter
+
+import quote_output
+import search_index
+
+try:
+    import numpy # optional: with scipy, vectorizes the similarity search, pip install numpy scipy
+    import scipy.sparse
+except ImportError: # numpy without scipy is not enough either
+    numpy = None
+
+# --- Configuration ---
+# "More like this" for every quote, precomputed at build time. Each quote is
+# a TF-IDF vector over its words (tokenized like search_index.py, with
+# sublinear term frequency, 1 + log tf, and idf log(N / df)), normalized to
+# unit length, so the dot product of two quotes is their cosine similarity.
+# Terms in a single quote cannot relate two quotes and terms in more than
+# MAX_DF of all quotes ("and", "the") carry no meaning; both are dropped.
+# With numpy and scipy the similarities are computed as matrix products,
+# BLOCK_ROWS quotes against all quotes at a time, so memory stays at one
+# block of scores, from which the top k of each row are picked. Most of the
+# products come from the DENSE_TERMS most frequent terms; their weights form
+# a dense matrix multiplied by BLAS, and the remaining, rare terms a sparse
+# one whose product is mostly empty. Without numpy and scipy the same scores
+# are accumulated in Python through an inverted index, which is exact but
+# slow on the KJV.
+# Layout of data/related_quotes.json:
+#   corpora     corpus names, in data/quotes_<name>.json file order
+#   starts      quote index of each corpus's first quote: the quote at index
+#               i of corpora[c] has quote index starts[c] + i
+#   k           neighbours per quote
+#   terms       size of the TF-IDF vocabulary
+#   neighbours  flat list, k entries per quote index: the quote indexes of its
+#               most similar quotes, best first, padded with -1
+#   scores      cosine similarity of each of those in thousandths (0 for padding)
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+RELATED_PATH = os.path.join(PROJECT_ROOT, 'data', 'related_quotes.json')
+DEFAULT_K = 8
+BLOCK_ROWS = 256 # a block holds BLOCK_ROWS x quotes similarities as float32
+DENSE_TERMS = 64
+MAX_DF = 0.5
+MIN_SIMILARITY = 0.05 # weaker matches share only a word or two and are left out
+DUPLICATE_SIMILARITY = 0.999 # the same text again (a repeated verse) is not a related quote
+
+
+# --- Function Definitions ---
+def tfidf_vectors(records):
+    """One sparse unit vector per record, as (term ids, weights) lists; returns (vectors, vocabulary size)."""
+    counts = [Counter(search_index.tokenize(quote["text"])) for _, _, quote in records]
+    df = Counter(term for terms in counts for term in terms)
+    max_df = MAX_DF * len(records)
+    vocabulary = {}
+    for term in sorted(df):
+        if 1 < df[term] <= max_df:
+            vocabulary[term] = len(vocabulary)
+    vectors = []
+    for terms in counts:
+        weighted = [(vocabulary[term], (1 + math.log(tf)) * math.log(len(records) / df[term]))
+                    for term, tf in terms.items() if term in vocabulary]
+        norm = math.sqrt(sum(weight * weight for _, weight in weighted)) or 1.0
+        vectors.append(([term_id for term_id, _ in weighted], [weight / norm for _, weight in weighted]))
+    return vectors, len(vocabulary)
+
+
+def _top_k_numpy(vectors, vocabulary_size, k, block_rows):
+    indptr = numpy.cumsum([0] + [len(term_ids) for term_ids, _ in vectors])
+    matrix = scipy.sparse.csr_matrix(
+        (numpy.fromiter((w for _, weights in vectors for w in weights), dtype=numpy.float32, count=indptr[-1]),
+         numpy.fromiter((t for term_ids, _ in vectors for t in term_ids), dtype=numpy.int32, count=indptr[-1]),
+         indptr),
+        shape=(len(vectors), vocabulary_size))
+    df = numpy.bincount(matrix.indices, minlength=vocabulary_size)
+    frequent = numpy.zeros(vocabulary_size, dtype=bool)
+    frequent[numpy.argsort(-df, kind="stable")[:DENSE_TERMS]] = True
+    dense = numpy.ascontiguousarray(matrix[:, numpy.flatnonzero(frequent)].toarray())
+    rare = matrix[:, numpy.flatnonzero(~frequent)].tocsr()
+    rare_transposed = rare.T.tocsr()
+    count = len(vectors)
+    neighbours = numpy.full((count, k), -1, dtype=numpy.int64)
+    scores = numpy.zeros((count, k), dtype=numpy.float32)
+    if k == 0:
+        return neighbours.tolist(), scores.tolist()
+    for start in range(0, count, block_rows):
+        block = dense[start:start + block_rows] @ dense.T # row i: similarities of quote start + i
+        rare_part = (rare[start:start + block_rows] @ rare_transposed).tocoo()
+        block.reshape(-1)[rare_part.row.astype(numpy.int64) * count + rare_part.col] += rare_part.data
+        rows = numpy.arange(block.shape[0])
+        block[rows, start + rows] = 0.0 # a quote is not related to itself
+        block[block >= DUPLICATE_SIMILARITY] = 0.0
+        # k passes of argmax: for a short list cheaper than argpartition plus a
+        # sort, already best first, and ties go to the lower index as in _top_k_python
+        for rank in range(k):
+            best = block.argmax(axis=1)
+            neighbours[start + rows, rank] = best
+            scores[start + rows, rank] = block[rows, best]
+            block[rows, best] = -1.0
+    weak = scores < MIN_SIMILARITY
+    neighbours[weak] = -1
+    scores[weak] = 0.0
+    return neighbours.tolist(), scores.tolist()
+
+
+def _top_k_python(vectors, k):
+    postings = {}
+    for doc_id, (term_ids, weights) in enumerate(vectors):
+        for term_id, weight in zip(term_ids, weights):
+            postings.setdefault(term_id, []).append((doc_id, weight))
+    neighbours, scores = [], []
+    for doc_id, (term_ids, weights) in enumerate(vectors):
+        similarity = Counter()
+        for term_id, weight in zip(term_ids, weights):
+            for other, other_weight in postings[term_id]:
+                similarity[other] += weight * other_weight
+        del similarity[doc_id]
+        best = [(score, other) for other, score in similarity.items()
+                if MIN_SIMILARITY <= score < DUPLICATE_SIMILARITY]
+        best.sort(key=lambda item: (-item[0], item[1]))
+        best = best[:k]
+        neighbours.append([other for _, other in best] + [-1] * (k - len(best)))
+        scores.append([score for score, _ in best] + [0.0] * (k - len(best)))
+    return neighbours, scores
+
+
+def related_table(records, k=DEFAULT_K, block_rows=BLOCK_ROWS):
+    """The table written to data/related_quotes.json for (corpus, index, quote) records."""
+    vectors, vocabulary_size = tfidf_vectors(records)
+    k = max(0, min(k, len(records) - 1))
+    if numpy is not None:
+        neighbours, scores = _top_k_numpy(vectors, vocabulary_size, k, block_rows)
+    else:
+        neighbours, scores = _top_k_python(vectors, k)
+    corpora, starts = [], []
+    for position, (corpus, _, _) in enumerate(records):
+        if not corpora or corpora[-1] != corpus:
+            corpora.append(corpus)
+            starts.append(position)
+    return {
+        "version": 1,
+        "corpora": corpora,
+        "starts": starts,
+        "k": k,
+        "terms": vocabulary_size,
+        "neighbours": [other for row in neighbours for other in row],
+        "scores": [round(score * 1000) for row in scores for score in row],
+    }
+
+
+def write_table(paths=None, table_path=RELATED_PATH, k=DEFAULT_K, block_rows=BLOCK_ROWS):
+    paths = paths or quote_output.corpus_files()
+    start = time.perf_counter()
+    table = related_table(quote_output.load_records(paths), k, block_rows)
+    with open(table_path, 'w', encoding='utf-8') as f:
+        json.dump(table, f, separators=(',', ':'))
+    quotes = len(table["neighbours"]) // table["k"] if table["k"] else 0
+    engine = "numpy/scipy" if numpy is not None else "pure Python; pip install numpy scipy to vectorize"
+    print(f"Related quotes: top {table['k']} of {quotes} quotes over {table['terms']} terms, "
+          f"{os.path.getsize(table_path) / 1024:.1f} KB, built in {time.perf_counter() - start:.2f}s "
+          f"({engine}) -> {table_path}")
+    return table
+
+
+def related(table, corpus, index):
+    """[(corpus, index, similarity)] for the quote at index of corpus, best first."""
+    position = table["corpora"].index(corpus)
+    row = (table["starts"][position] + index) * table["k"]
+    result = []
+    for other, score in zip(table["neighbours"][row:row + table["k"]], table["scores"][row:row + table["k"]]):
+        if other < 0:
+            break
+        other_position = max(p for p, start in enumerate(table["starts"]) if start <= other)
+        result.append((table["corpora"][other_position], other - table["starts"][other_position], score / 1000))
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute or show the most similar quotes of every quote.")
+    parser.add_argument("--table", default=RELATED_PATH, help="Table file (default: data/related_quotes.json).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Compute the table over data/quotes_*.json.")
+    build_parser.add_argument("paths", nargs="*")
+    build_parser.add_argument("-k", type=int, default=DEFAULT_K, help="Neighbours per quote.")
+    build_parser.add_argument("--block-rows", type=int, default=BLOCK_ROWS,
+                              help="Quotes per block of the matrix product (bounds memory).")
+    show_parser = subparsers.add_parser("show", help="Print the quotes related to one quote.")
+    show_parser.add_argument("corpus")
+    show_parser.add_argument("index", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        write_table(args.paths, args.table, args.k, args.block_rows)
+        return
+
+    with open(args.table, 'r', encoding='utf-8') as f:
+        table = json.load(f)
+    texts = {}
+    for corpus in {args.corpus} | {corpus for corpus, _, _ in related(table, args.corpus, args.index)}:
+        with open(os.path.join(quote_output.DATA_DIR, f"quotes_{corpus}.json"), 'r', encoding='utf-8') as f:
+            texts[corpus] = json.load(f)
+    quote = texts[args.corpus][args.index]
+    print(f"{quote['text']}\n  ({quote.get('source')})\n")
+    for corpus, index, score in related(table, args.corpus, args.index):
+        other = texts[corpus][index]
+        print(f"{score:.3f}  {other['text']}\n       ({other.get('source')})")
+
+
+if __name__ == "__main__":
+    main()
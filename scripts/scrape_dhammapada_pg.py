@@ -1,9 +1,18 @@
-import requests
-from bs4 import BeautifulSoup
-import json
+import logging
 import os
 import re
 
+import http_cache
+import instrumentation
+import mapped_source
+import parallel_parse
+import pg_lexer
+import quote_output
+import quote_record
+import quote_stream
+
+logger = logging.getLogger(__name__)
+
 # --- Configuration ---
 # Using the HTML text directly for Project Gutenberg as they have plain text versions often
 # URL = "https://www.gutenberg.org/files/2017/2017-h/2017-h.htm" # The HTML version
@@ -17,44 +26,45 @@ AUTHOR = "Buddha" # Or "Unknown", or specific translator if preferred for attrib
 SOURCE_BOOK_TITLE = "The Dhammapada"
 TRADITION = "Buddhism"
 
+# Every stripped line is one of (see pg_lexer.py):
+#   chapter  "Chapter I. The Twin-Verses", capturing the name "The Twin-Verses"
+#   verse    a line starting with a number, like "1. All that we are...",
+#            capturing the number and the verse text
+#   end      the end of the ebook
+# or a continuation of the current verse.
+# Byte-level versions of the start marker, chapter heading and end marker
+# rules, for memory-mapped sources (see parse_dhammapada_file)
+START_REGEX = re.compile(rb"Chapter I\. The Twin-Verses", re.IGNORECASE)
+START_REGEX_ALT = re.compile(rb"DHAMMAPADA", re.IGNORECASE)
+CHAPTER_LINE_REGEX = re.compile(rb"^[ \t]*Chapter[ \t]+[IVXLCDM]+\.", re.IGNORECASE | re.MULTILINE)
+END_LINE_REGEX = re.compile(rb"^[ \t]*(?:End of the Project Gutenberg EBook|\*\*\* END OF THE PROJECT GUTENBERG EBOOK)",
+                            re.IGNORECASE | re.MULTILINE)
+
+LEXER = pg_lexer.LineLexer((
+    ("chapter", rf"(?i:Chapter\s+{pg_lexer.ROMAN_NUMERAL}\.\s*(?P<chapter_name>.*))"),
+    ("verse", r"(?P<verse_number>\d+)\.\s*(?P<verse_text>.+)"),
+    ("end", r"(?i:End of the Project Gutenberg EBook|\*\*\* END OF THE PROJECT GUTENBERG EBOOK)"),
+))
+
 # --- Main Script ---
-def fetch_page_content_text(url):
+def fetch_page_content_text(url, offline=False):
     """Fetches the plain text content of the given URL."""
-    print(f"Fetching content from: {url}")
+    logger.info("Fetching content from: %s", url)
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=20)
-        response.raise_for_status()
-        # Project Gutenberg text files are often ISO-8859-1 or similar, but let's try UTF-8 first
-        try:
-            text_content = response.content.decode('utf-8')
-        except UnicodeDecodeError:
-            print("UTF-8 decode failed, trying ISO-8859-1")
-            text_content = response.content.decode('iso-8859-1')
-        print("Content fetched successfully.")
+        with instrumentation.stage("fetch"):
+            response = http_cache.get(url, offline=offline)
+        # Project Gutenberg text files are often ISO-8859-1 or similar; the encoding is
+        # detected once (BOM, Content-Type, "Character set encoding:" line) and decoded in one pass
+        with instrumentation.stage("decode"):
+            text_content = response.text
+        logger.info("Content fetched successfully.")
         return text_content
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching URL {url}: {e}")
+    except http_cache.fetch_errors() as e:
+        logger.error("Error fetching URL %s: %s", url, e)
         return None
 
-def parse_dhammapada_text(text_content):
-    """Parses the plain text content to extract Dhammapada verses."""
-    if not text_content:
-        return []
-
-    quotes = []
-    current_chapter_name = ""
-    
-    # Regex to find chapter headings like "Chapter I. The Twin-Verses"
-    # It also tries to capture just the name like "The Twin-Verses"
-    chapter_regex = re.compile(r"Chapter\s+[IVXLCDM]+\.\s*(.*)", re.IGNORECASE)
-    
-    # Regex to find verse lines starting with a number, like "1. All that we are..."
-    # This captures the number and the verse text.
-    verse_regex = re.compile(r"^\s*(\d+)\.\s*(.+)")
-
+def find_relevant_content(text_content):
+    """The text from the first chapter on, or None if the start cannot be found."""
     # Skip the Project Gutenberg header and license before the actual content
     try:
         start_marker = "Chapter I. The Twin-Verses" # Or a more generic start like "DHAMMAPADA"
@@ -69,125 +79,166 @@ def parse_dhammapada_text(text_content):
 
 
         if content_start_index == -1:
-            print("Could not find the start of Dhammapada content (e.g., 'Chapter I' or 'DHAMMAPADA').")
-            return []
+            logger.warning("Could not find the start of Dhammapada content (e.g., 'Chapter I' or 'DHAMMAPADA').")
+            return None
         
-        relevant_content = text_content[content_start_index:]
+        return text_content[content_start_index:]
     except Exception as e:
-        print(f"Error finding start marker: {e}")
-        relevant_content = text_content # Process all if marker not found, might get junk
+        logger.warning("Error finding start marker: %s", e)
+        return text_content # Process all if marker not found, might get junk
+
 
-    lines = relevant_content.splitlines()
-    
+def _verse_record(chapter_name, verse_number, verse_lines):
+    verse_text = " ".join(verse_lines).strip()
+    verse_text = re.sub(r'\s+', ' ', verse_text) # Normalize whitespace
+    if not verse_text:
+        return None
+    return quote_record.Quote(
+        text=verse_text,
+        source=f"{SOURCE_BOOK_TITLE}, {chapter_name}, Verse {verse_number}",
+        author=AUTHOR,
+        tradition=TRADITION
+    )
+
+
+def _parse_dhammapada_lines(lines):
+    quotes = []
+    current_chapter_name = ""
     current_verse_lines = []
     current_verse_number = None
 
-    for line in lines:
-        line = line.strip()
-        if not line: # Skip empty lines
-            continue
-
-        # Check for chapter heading
-        chapter_match = chapter_regex.match(line)
-        if chapter_match:
-            # If we have a pending verse, save it
+    for kind, match, line in LEXER.tokens(lines):
+        if kind == "chapter" or kind == "verse":
+            # A chapter heading or a new verse number ends the pending verse
             if current_verse_number and current_verse_lines:
-                verse_text = " ".join(current_verse_lines).strip()
-                verse_text = re.sub(r'\s+', ' ', verse_text) # Normalize whitespace
-                if verse_text:
-                    source_detail = f"{SOURCE_BOOK_TITLE}, {current_chapter_name}, Verse {current_verse_number}"
-                    quotes.append({
-                        "text": verse_text,
-                        "source": source_detail,
-                        "author": AUTHOR,
-                        "tradition": TRADITION
-                    })
+                record = _verse_record(current_chapter_name, current_verse_number, current_verse_lines)
+                if record:
+                    quotes.append(record)
                 current_verse_lines = []
                 current_verse_number = None
 
-            current_chapter_name = chapter_match.group(1).strip()
-            print(f"\nProcessing Chapter: {current_chapter_name}")
-            continue # Move to next line after processing chapter heading
-
-        # Check for verse line
-        verse_match = verse_regex.match(line)
-        if verse_match:
-            # If we have a pending verse from a *previous* number, save it
-            if current_verse_number and current_verse_lines:
-                verse_text = " ".join(current_verse_lines).strip()
-                verse_text = re.sub(r'\s+', ' ', verse_text)
-                if verse_text:
-                    source_detail = f"{SOURCE_BOOK_TITLE}, {current_chapter_name}, Verse {current_verse_number}"
-                    quotes.append({
-                        "text": verse_text,
-                        "source": source_detail,
-                        "author": AUTHOR,
-                        "tradition": TRADITION
-                    })
-            
-            # Start a new verse
-            current_verse_number = verse_match.group(1).strip()
-            verse_line_text = verse_match.group(2).strip()
-            current_verse_lines = [verse_line_text]
-        elif current_verse_number: 
-            # This line is a continuation of the current verse (if not empty and not a new chapter/verse)
-            # Heuristic: if line doesn't start with typical chapter/verse markers and we are in a verse
-            if not chapter_regex.match(line) and not re.match(r"^\s*End of the Project Gutenberg EBook", line, re.IGNORECASE):
-                current_verse_lines.append(line)
-        
-        # Stop at the end marker
-        if re.match(r"^\s*End of the Project Gutenberg EBook", line, re.IGNORECASE) or \
-           re.match(r"^\s*\*\*\* END OF THE PROJECT GUTENBERG EBOOK", line, re.IGNORECASE) :
-            print("Found end of ebook marker.")
+            if kind == "chapter":
+                current_chapter_name = match.group("chapter_name").strip()
+                logger.debug("Processing Chapter: %s", current_chapter_name)
+            else:
+                current_verse_number = match.group("verse_number")
+                current_verse_lines = [match.group("verse_text").strip()]
+        elif kind == "end":
+            logger.debug("Found end of ebook marker.")
             break
+        elif current_verse_number:
+            # This line is a continuation of the current verse
+            current_verse_lines.append(line)
 
     # Save any last pending verse
     if current_verse_number and current_verse_lines:
-        verse_text = " ".join(current_verse_lines).strip()
-        verse_text = re.sub(r'\s+', ' ', verse_text)
-        if verse_text:
-            source_detail = f"{SOURCE_BOOK_TITLE}, {current_chapter_name}, Verse {current_verse_number}"
-            quotes.append({
-                "text": verse_text,
-                "source": source_detail,
-                "author": AUTHOR,
-                "tradition": TRADITION
-            })
-
-    print(f"\nSuccessfully parsed {len(quotes)} Dhammapada verses.")
+        record = _verse_record(current_chapter_name, current_verse_number, current_verse_lines)
+        if record:
+            quotes.append(record)
     return quotes
 
 
-def save_quotes_to_json(quotes, filepath):
-    if not quotes:
-        print("No quotes to save.")
-        return
-
-    # Simple duplicate check based on text, just in case
-    unique_quotes = []
-    seen_texts = set()
-    for quote in quotes:
-        normalized_text = ' '.join(quote["text"].split())
-        if normalized_text not in seen_texts:
-            unique_quotes.append(quote)
-            seen_texts.add(normalized_text)
-    
-    try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(unique_quotes, f, indent=2, ensure_ascii=False)
-        print(f"Quotes successfully saved to: {filepath} ({len(unique_quotes)} unique quotes)")
-    except IOError as e:
-        print(f"Error saving quotes to {filepath}: {e}")
+def split_dhammapada_segments(relevant_content):
+    """Cuts the text at every chapter heading, where a pending verse is flushed anyway.
+
+    Nothing after the end marker line becomes a segment of its own."""
+    starts = []
+    offset = 0
+    for line in relevant_content.splitlines(True):
+        line_stripped = line.strip()
+        if line_stripped:
+            kind, _ = LEXER.classify(line_stripped)
+            if kind == "chapter":
+                starts.append(offset)
+            elif kind == "end":
+                break
+        offset += len(line)
+    return parallel_parse.cut(relevant_content, starts)
+
+
+def parse_dhammapada_segment(segment_text):
+    return _parse_dhammapada_lines(segment_text.splitlines())
+
+
+def parse_dhammapada_text(text_content, jobs=1):
+    """Parses the plain text content to extract Dhammapada verses.
+
+    With jobs > 1 the chapters are parsed on a process pool."""
+    if not text_content:
+        return []
+    relevant_content = find_relevant_content(text_content)
+    if relevant_content is None:
+        return []
+
+    if jobs == 1:
+        quotes = _parse_dhammapada_lines(relevant_content.splitlines())
+    else:
+        segments = split_dhammapada_segments(relevant_content)
+        quotes = parallel_parse.parse_segments(parse_dhammapada_segment, segments, jobs)
+        logger.info("Parsed %d chapter segments in parallel.", len(segments))
+
+    logger.info("Successfully parsed %d Dhammapada verses.", len(quotes))
+    return quotes
+
+
+def parse_dhammapada_range(segment):
+    """Parses the byte range (path, content_type, start, end) of a local source file."""
+    path, content_type, start, end = segment
+    with mapped_source.MappedSource(path, content_type) as source:
+        return _parse_dhammapada_lines(source.text(start, end).splitlines())
+
+
+def parse_dhammapada_file(path, content_type='', jobs=1):
+    """Like parse_dhammapada_text, for a local raw source file (e.g. a cached download).
+
+    The file is memory-mapped; the start marker, chapter headings and end
+    marker are found on the raw bytes and only the verses are decoded, line
+    by line (or one chapter per worker with jobs > 1)."""
+    with mapped_source.MappedSource(path, content_type) as source:
+        if not source.byte_level:
+            return parse_dhammapada_text(source.text(), jobs)
+        match = source.search(START_REGEX)
+        if match:
+            start = match.start()
+        else:
+            # Try finding just "DHAMMAPADA" as a major heading and start after its line
+            match = source.search(START_REGEX_ALT)
+            if match is None:
+                logger.warning("Could not find the start of Dhammapada content (e.g., 'Chapter I' or 'DHAMMAPADA').")
+                return []
+            start = source.next_line(match.end())
+        # The parser stops at the end marker line, so nothing after it is needed
+        end_match = source.search(END_LINE_REGEX, start)
+        end = source.line_start(end_match.start()) if end_match else len(source)
+
+        if jobs == 1:
+            quotes = _parse_dhammapada_lines(source.iter_lines(start, end))
+        else:
+            ranges = source.cut(source.boundaries(CHAPTER_LINE_REGEX, start, end), start, end)
+            segments = [(path, content_type, range_start, range_end) for range_start, range_end in ranges]
+            quotes = parallel_parse.parse_segments(parse_dhammapada_range, segments, jobs,
+                                                   size=parallel_parse.range_size)
+            logger.info("Parsed %d chapter segments in parallel.", len(segments))
+
+    logger.info("Successfully parsed %d Dhammapada verses.", len(quotes))
+    return quotes
+
+
+save_quotes_to_json = quote_stream.save_quotes
 
 if __name__ == "__main__":
+    args = instrumentation.scraper_args("Scrape the Dhammapada from Project Gutenberg.",
+                                        jobs_help="Parse the chapters on N processes (0 = one per CPU).")
     # Using the plain text URL for Project Gutenberg is generally easier
-    plain_text_content = fetch_page_content_text(URL_TEXT)
+    plain_text_content = fetch_page_content_text(URL_TEXT, offline=args.offline)
     if plain_text_content:
-        dhammapada_quotes = parse_dhammapada_text(plain_text_content)
-        save_quotes_to_json(dhammapada_quotes, OUTPUT_QUOTES_PATH)
+        dhammapada_quotes = parse_dhammapada_text(plain_text_content, jobs=parallel_parse.resolve_jobs(args.jobs))
+        sizes = save_quotes_to_json(dhammapada_quotes, OUTPUT_QUOTES_PATH, compact=args.compact, stream=args.stream)
+        if sizes:
+            quote_output.print_size_report({os.path.basename(OUTPUT_QUOTES_PATH): sizes})
     else:
-        print("Could not fetch Dhammapada content. Skipping HTML parsing attempt for now.")
+        logger.error("Could not fetch Dhammapada content. Skipping HTML parsing attempt for now.")
         # Optionally, you could try parsing the HTML you provided as a fallback
         # html_page_content = your_provided_html_string 
         # dhammapada_quotes_html = parse_dhammapada_html(html_page_content) # You'd need to write this function
-        # save_quotes_to_json(dhammapada_quotes_html, OUTPUT_QUOTES_PATH.replace('.json', '_html.json'))
\ No newline at end of file
+        # save_quotes_to_json(dhammapada_quotes_html, OUTPUT_QUOTES_PATH.replace('.json', '_html.json'))
@@ -1,8 +1,18 @@
-import requests
-import json
+import logging
 import os
 import re
 
+import http_cache
+import instrumentation
+import mapped_source
+import parallel_parse
+import pg_lexer
+import quote_output
+import quote_record
+import quote_stream
+
+logger = logging.getLogger(__name__)
+
 # --- Configuration ---
 URL_TEXT = "https://www.gutenberg.org/cache/epub/2388/pg2388.txt" 
 
@@ -17,42 +27,41 @@ SOURCE_BOOK_TITLE = "The Song Celestial (Bhagavad-Gita)"
 TRADITION = "Hinduism"
 NARRATIVE_LABEL = "Narrative" # Still useful for the 'speaker' field
 
+# Every stripped paragraph is one of (see pg_lexer.py):
+#   end          the end of the ebook, or the closing line of the last chapter
+#   chapter_end  "HERE ENDETH CHAPTER ... OF THE BHAGAVAD-GITA"
+#   chapter      "CHAPTER IV"
+#   speaker      "Arjuna: ...", capturing the speaker and what follows
+# or plain text.
+# "CHAPTER I" as raw bytes, for memory-mapped sources (see parse_gita_file)
+START_REGEX = re.compile(rb"CHAPTER I", re.IGNORECASE)
+
+LEXER = pg_lexer.LineLexer((
+    ("end", rf"{pg_lexer.END_MARKER}|(?={pg_lexer.contains('HERE ENDETH CHAPTER XVIII')})"
+            rf"(?={pg_lexer.contains('OF THE BHAGAVAD-GITA')})"),
+    ("chapter_end", rf"(?={pg_lexer.contains('HERE ENDETH CHAPTER')})(?={pg_lexer.contains('OF THE BHAGAVAD-GITA')})"),
+    ("chapter", rf"CHAPTER\s+(?P<chapter_number>{pg_lexer.ROMAN_NUMERAL})\s*$"),
+    # A run of letters and spaces right before ':' or '.'; the run and ':.' share
+    # no character, so each step of backtracking fails at once
+    ("speaker", r"(?i:(?P<speaker_name>[A-Za-z\s]+)[:.]\s*(?P<speaker_text>.*))"),
+))
+
 # --- Main Script ---
-def fetch_text_content(url):
-    print(f"Fetching content from: {url}")
+def fetch_text_content(url, offline=False):
+    logger.info("Fetching content from: %s", url)
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 YourAppName/1.0 (Contact: youremail@example.com)'
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        try:
-            text_content = response.content.decode('utf-8')
-        except UnicodeDecodeError:
-            try:
-                text_content = response.content.decode('iso-8859-1')
-            except UnicodeDecodeError:
-                text_content = response.content.decode('cp1252')
-        print("Content fetched successfully.")
+        with instrumentation.stage("fetch"):
+            response = http_cache.get(url, offline=offline)
+        with instrumentation.stage("decode"):
+            text_content = response.text # single decode with the detected encoding
+        logger.info("Content fetched successfully.")
         return text_content
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching URL {url}: {e}")
+    except http_cache.fetch_errors() as e:
+        logger.error("Error fetching URL %s: %s", url, e)
         return None
 
-def parse_gita_text(text_content):
-    if not text_content:
-        return []
-
-    quotes = []
-    current_chapter_title_short = "Unknown Chapter"
-    current_chapter_name_long = ""
-    current_speaker_label = NARRATIVE_LABEL 
-    paragraph_counter_within_chapter_section = 0
-
-    chapter_heading_regex = re.compile(r"^\s*CHAPTER\s+([IVXLCDM]+)\s*$", re.MULTILINE)
-    chapter_name_regex = re.compile(r"^\s*([A-Z0-9\s'-]+[A-Z0-9'-])\s*$", re.MULTILINE)
-    speaker_regex = re.compile(r"^\s*([A-Za-z\s]+(?:irashtra)?)\s*[:.]\s*(.*)", re.IGNORECASE)
-
+def split_paragraphs(text_content):
+    """Blank-line separated paragraphs from the first "CHAPTER I" on, each joined into one line."""
     start_marker = "CHAPTER I" 
     content_start_index = text_content.upper().find(start_marker)
     if content_start_index == -1:
@@ -60,9 +69,10 @@ def parse_gita_text(text_content):
     else:
         content_start_index = text_content.rfind('\n', 0, content_start_index) + 1
         relevant_content = text_content[content_start_index:]
-        
-    lines = relevant_content.splitlines()
-    
+    return join_paragraphs(relevant_content.splitlines())
+
+
+def join_paragraphs(lines):
     paragraphs = []
     current_paragraph_lines = []
     for line in lines:
@@ -74,47 +84,48 @@ def parse_gita_text(text_content):
             current_paragraph_lines.append(line.strip())
     if current_paragraph_lines:
         paragraphs.append(" ".join(current_paragraph_lines))
+    return paragraphs
 
-    expecting_chapter_name = False
 
-    for para_text_original in paragraphs:
-        para_text = para_text_original.strip()
-        if not para_text:
-            continue
+def _parse_gita_paragraphs(paragraphs):
+    quotes = []
+    current_chapter_title_short = "Unknown Chapter"
+    current_chapter_name_long = ""
+    current_speaker_label = NARRATIVE_LABEL 
+    paragraph_counter_within_chapter_section = 0
+    expecting_chapter_name = False
 
-        if "*** END OF THE PROJECT GUTENBERG EBOOK" in para_text.upper() or \
-           ("HERE ENDETH CHAPTER XVIII" in para_text.upper() and "OF THE BHAGAVAD-GITA" in para_text.upper()):
-            print("Found end of ebook marker within paragraph processing.")
+    for kind, match, para_text in LEXER.tokens(paragraphs):
+        if kind == "end":
+            logger.debug("Found end of ebook marker within paragraph processing.")
             break
         
-        if "HERE ENDETH CHAPTER" in para_text.upper() and "OF THE BHAGAVAD-GITA" in para_text.upper():
+        if kind == "chapter_end":
             current_speaker_label = NARRATIVE_LABEL 
             continue
 
-        chapter_match = chapter_heading_regex.match(para_text)
-        if chapter_match:
-            current_chapter_title_short = f"Chapter {chapter_match.group(1).strip()}"
+        if kind == "chapter":
+            current_chapter_title_short = f"Chapter {match.group('chapter_number').strip()}"
             current_speaker_label = NARRATIVE_LABEL 
             current_chapter_name_long = "" 
             paragraph_counter_within_chapter_section = 0
             expecting_chapter_name = True
-            print(f"\nProcessing: {current_chapter_title_short}")
+            logger.debug("Processing: %s", current_chapter_title_short)
             continue
 
-        if expecting_chapter_name and not speaker_regex.match(para_text) and len(para_text.split()) > 1 and len(para_text.split()) < 10:
+        if expecting_chapter_name and kind != "speaker" and len(para_text.split()) > 1 and len(para_text.split()) < 10:
             if para_text.isupper() or (para_text.istitle() and "  " not in para_text):
                 current_chapter_name_long = para_text
-                print(f"  Chapter Name: {current_chapter_name_long}")
+                logger.debug("  Chapter Name: %s", current_chapter_name_long)
             expecting_chapter_name = False 
             continue
 
         speaker_text_from_line = ""
-        speaker_match = speaker_regex.match(para_text)
-        if speaker_match:
-            identified_speaker = speaker_match.group(1).strip()
+        if kind == "speaker":
+            identified_speaker = match.group("speaker_name").strip()
             if "Arjun" in identified_speaker: identified_speaker = "Arjuna" # Normalize
             current_speaker_label = identified_speaker 
-            speaker_text_from_line = speaker_match.group(2).strip()
+            speaker_text_from_line = match.group("speaker_text").strip()
             paragraph_counter_within_chapter_section = 0 
             if speaker_text_from_line:
                 para_text = speaker_text_from_line 
@@ -122,9 +133,7 @@ def parse_gita_text(text_content):
                 continue 
         
         if current_chapter_title_short != "Unknown Chapter":
-            cleaned_text = re.sub(r'\s*\[FN#\d+\]\s*', '', para_text) 
-            cleaned_text = re.sub(r'_', '', cleaned_text) 
-            cleaned_text = re.sub(r'\s+', ' ', cleaned_text).strip() 
+            cleaned_text = pg_lexer.remove_footnotes(para_text)
 
             if cleaned_text and len(cleaned_text.split()) > 3: 
                 paragraph_counter_within_chapter_section += 1
@@ -139,43 +148,85 @@ def parse_gita_text(text_content):
 
                 reference_speaker_part = current_speaker_label if current_speaker_label != NARRATIVE_LABEL else "Narrative"
 
-                quotes.append({
-                    "text": cleaned_text,
-                    "source": source_detail,
-                    "author": PRIMARY_AUTHOR,  # Consistently Krishna for all Gita quotes
-                    "speaker": current_speaker_label, # Who is narratively speaking
-                    "translator": TRANSLATOR_NAME,
-                    "tradition": TRADITION,
-                    "book": SOURCE_BOOK_TITLE,
-                    "reference": f"{current_chapter_title_short}, {reference_speaker_part} Para. {paragraph_counter_within_chapter_section}"
-                })
-
-    print(f"\nSuccessfully parsed {len(quotes)} paragraphs/stanzas from Bhagavad-Gita.")
+                quotes.append(quote_record.Quote(
+                    text=cleaned_text,
+                    source=source_detail,
+                    author=PRIMARY_AUTHOR,  # Consistently Krishna for all Gita quotes
+                    speaker=current_speaker_label, # Who is narratively speaking
+                    translator=TRANSLATOR_NAME,
+                    tradition=TRADITION,
+                    book=SOURCE_BOOK_TITLE,
+                    reference=f"{current_chapter_title_short}, {reference_speaker_part} Para. {paragraph_counter_within_chapter_section}"
+                ))
     return quotes
 
 
-def save_quotes_to_json(quotes, filepath):
-    if not quotes:
-        print("No quotes to save.")
-        return
-    unique_quotes = []
-    seen_texts = {} 
-    for quote in quotes:
-        normalized_text = ' '.join(quote["text"].split())
-        unique_key = normalized_text + "||" + quote["source"] 
-        if unique_key not in seen_texts:
-            unique_quotes.append(quote)
-            seen_texts[unique_key] = True
-    
-    try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(unique_quotes, f, indent=2, ensure_ascii=False)
-        print(f"Quotes successfully saved to: {filepath} ({len(unique_quotes)} unique quotes)")
-    except IOError as e:
-        print(f"Error saving quotes to {filepath}: {e}")
+def split_gita_segments(paragraphs):
+    """Cuts the paragraphs at every chapter heading, where all parser state is reset.
+
+    Paragraphs after the end marker are dropped, as the serial parse stops there."""
+    segments = [[]]
+    for para_text_original in paragraphs:
+        kind, _ = LEXER.classify(para_text_original.strip())
+        if kind == "end":
+            segments[-1].append(para_text_original)
+            break
+        if kind == "chapter" and segments[-1]:
+            segments.append([])
+        segments[-1].append(para_text_original)
+    return segments
+
+
+def parse_gita_segment(paragraphs):
+    return _parse_gita_paragraphs(paragraphs)
+
+
+def parse_gita_text(text_content, jobs=1):
+    """Parses the whole text; with jobs > 1 the chapters are parsed on a process pool."""
+    if not text_content:
+        return []
+    return _parse_paragraphs(split_paragraphs(text_content), jobs)
+
+
+def parse_gita_file(path, content_type='', jobs=1):
+    """Like parse_gita_text, for a local raw source file (e.g. a cached download).
+
+    The file is memory-mapped and "CHAPTER I" is found on the raw bytes, so
+    the Project Gutenberg header is never decoded; the rest is decoded line by line."""
+    with mapped_source.MappedSource(path, content_type) as source:
+        if not source.byte_level:
+            return parse_gita_text(source.text(), jobs)
+        match = source.search(START_REGEX)
+        start = source.line_start(match.start()) if match else 0
+        paragraphs = join_paragraphs(source.iter_lines(start))
+    return _parse_paragraphs(paragraphs, jobs)
+
+
+def _parse_paragraphs(paragraphs, jobs):
+    if jobs == 1:
+        quotes = _parse_gita_paragraphs(paragraphs)
+    else:
+        segments = split_gita_segments(paragraphs)
+        quotes = parallel_parse.parse_segments(parse_gita_segment, segments, jobs)
+        logger.info("Parsed %d chapter segments in parallel.", len(segments))
+
+    logger.info("Successfully parsed %d paragraphs/stanzas from Bhagavad-Gita.", len(quotes))
+    return quotes
+
+
+def _text_at_source(quote):
+    return ' '.join(quote.text.split()) + "||" + quote.source
+
+def save_quotes_to_json(quotes, filepath, compact=False, stream=False):
+    """quote_stream.save_quotes, keeping a repeated text when it is at another source."""
+    return quote_stream.save_quotes(quotes, filepath, compact, stream, key=_text_at_source)
 
 if __name__ == "__main__":
-    plain_text_content = fetch_text_content(URL_TEXT)
+    args = instrumentation.scraper_args("Scrape the Bhagavad Gita (Arnold) from Project Gutenberg.",
+                                        jobs_help="Parse the chapters on N processes (0 = one per CPU).")
+    plain_text_content = fetch_text_content(URL_TEXT, offline=args.offline)
     if plain_text_content:
-        gita_quotes = parse_gita_text(plain_text_content)
-        save_quotes_to_json(gita_quotes, OUTPUT_QUOTES_PATH)
\ No newline at end of file
+        gita_quotes = parse_gita_text(plain_text_content, jobs=parallel_parse.resolve_jobs(args.jobs))
+        sizes = save_quotes_to_json(gita_quotes, OUTPUT_QUOTES_PATH, compact=args.compact, stream=args.stream)
+        if sizes:
+            quote_output.print_size_report({os.path.basename(OUTPUT_QUOTES_PATH): sizes})
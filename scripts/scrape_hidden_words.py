@@ -1,9 +1,16 @@
-import requests
-from bs4 import BeautifulSoup
-import json
+from lxml import etree
+import logging
 import os
 import re
 
+import http_cache
+import instrumentation
+import quote_output
+import quote_record
+import quote_stream
+
+logger = logging.getLogger(__name__)
+
 # --- Configuration ---
 URL = "https://www.bahai.org/library/authoritative-texts/bahaullah/hidden-words/hidden-words.xhtml?28ffb3b6"
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -13,18 +20,17 @@ AUTHOR = "Bahá’u’lláh"
 SOURCE_PREFIX = "The Hidden Words"
 
 # --- Function Definitions ---
-def fetch_page_content(url):
-    print(f"Fetching content from: {url}")
+def fetch_page_content(url, offline=False):
+    logger.info("Fetching content from: %s", url)
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=20)
-        response.raise_for_status()
-        print("Content fetched successfully.")
-        return response.text
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching URL {url}: {e}")
+        with instrumentation.stage("fetch"):
+            response = http_cache.get(url, offline=offline)
+        with instrumentation.stage("decode"):
+            html_content = response.text
+        logger.info("Content fetched successfully.")
+        return html_content
+    except http_cache.fetch_errors() as e:
+        logger.error("Error fetching URL %s: %s", url, e)
         return None
 
 def parse_one_hidden_word_item(hw_item_div, part_name, quotes_list):
@@ -65,91 +71,86 @@ def parse_one_hidden_word_item(hw_item_div, part_name, quotes_list):
         full_quote_text_raw = quote_p_tag.get_text(strip=False) 
         text_parts = [line.strip() for line in full_quote_text_raw.split('\n') if line.strip()]
 
+    _append_quote(text_parts, part_name, number_str, quotes_list)
+
+def _append_quote(text_parts, part_name, number_str, quotes_list):
+    """Joins the collected text pieces of one Hidden Word and appends its record (both parsers)."""
     full_quote_text = ' '.join(part for part in text_parts if part).strip()
     full_quote_text = re.sub(r'[ \t]+', ' ', full_quote_text) 
     full_quote_text = full_quote_text.replace(' \n ', '\n').replace('\n ', '\n').replace(' \n', '\n') 
 
     if full_quote_text:
         source_detail = f"{SOURCE_PREFIX}, From the {part_name} #{number_str}"
-        quotes_list.append({
-            "text": full_quote_text,
-            "source": source_detail,
-            "author": AUTHOR
-        })
+        quotes_list.append(quote_record.Quote(
+            text=full_quote_text,
+            source=source_detail,
+            author=AUTHOR
+        ))
     else:
-        print(f"    Warning: Empty quote text for {part_name} #{number_str} after processing.")
+        logger.warning("Empty quote text for %s #%s after processing.", part_name, number_str)
 
-def parse_hidden_words(html_content):
+def parse_hidden_words_bs4(html_content):
+    """The original BeautifulSoup walk over the whole page; the fallback for parse_hidden_words."""
     if not html_content:
         return []
+    from bs4 import BeautifulSoup # only the fallback needs bs4; deferred so that the lxml path runs without it
     soup = BeautifulSoup(html_content, 'lxml')
     all_quotes = []
     
     top_level_div_b = soup.find('div', class_='b')
     if not top_level_div_b:
-        print("DEBUG: Could not find the top-level div with class 'b'.")
+        logger.warning("Could not find the top-level div with class 'b'.")
         return all_quotes
-    # print("DEBUG: Found top_level_div_b.")
 
     nav_and_title_wrapper = top_level_div_b.find('div', recursive=False)
     if not nav_and_title_wrapper:
-        print("DEBUG: Error finding first child div of div.b (nav_and_title_wrapper)")
+        logger.warning("Error finding first child div of div.b (nav_and_title_wrapper)")
         return all_quotes
-    # print("DEBUG: Found nav_and_title_wrapper.")
     
     content_wrapper = nav_and_title_wrapper.find_next_sibling('div')
     if not content_wrapper:
-        print("DEBUG: Error finding content_wrapper (sibling of nav_and_title_wrapper).")
+        logger.warning("Error finding content_wrapper (sibling of nav_and_title_wrapper).")
         return all_quotes
-    print(f"DEBUG: content_wrapper found. Let's list its direct 'div' children that will be sections:")
-    
     section_div_candidates = content_wrapper.find_all('div', recursive=False)
-    
-    # --- NEW DEBUG ---
-    candidate_idx = 0
-    for candidate in section_div_candidates:
-        if candidate.name == 'div': 
-            print(f"  Candidate Section Div {candidate_idx}: <{candidate.name}> class='{candidate.get('class', [])}' id='{candidate.get('id', '')}'")
-        candidate_idx += 1
-    # --- END NEW DEBUG ---
-    print(f"DEBUG: Found {len(section_div_candidates)} direct 'div' children of content_wrapper to check as sections.")
+
+    # Listing the candidates walks every section, so only do it when it will be shown
+    if logger.isEnabledFor(logging.DEBUG):
+        for candidate_idx, candidate in enumerate(section_div_candidates):
+            logger.debug("  Candidate Section Div %d: <%s> class='%s' id='%s'",
+                         candidate_idx, candidate.name, candidate.get('class', []), candidate.get('id', ''))
+    logger.debug("Found %d direct 'div' children of content_wrapper to check as sections.", len(section_div_candidates))
 
     for i, section_container_div_candidate in enumerate(section_div_candidates):
         # This candidate is the direct child of content_wrapper. 
         # The actual content (ic div, hw divs) is one level deeper inside it.
         actual_part_content_holder = section_container_div_candidate.find('div', recursive=False)
         if not actual_part_content_holder:
-            print(f"DEBUG: Outer Loop - Iteration {i} - No direct child div in section_container_div_candidate. Skipping.")
+            logger.debug("Outer Loop - Iteration %d - No direct child div in section_container_div_candidate. Skipping.", i)
             continue
 
-        print(f"\nDEBUG: Outer Loop - Iteration {i} - Examining an actual_part_content_holder.")
-        current_part_name = ""
+        logger.debug("Outer Loop - Iteration %d - Examining an actual_part_content_holder.", i)
         
         ic_div = actual_part_content_holder.find('div', class_='ic') 
         if not ic_div:
-            print(f"DEBUG: No div.ic found in this actual_part_content_holder. Skipping.")
+            logger.debug("No div.ic found in this actual_part_content_holder. Skipping.")
             continue 
         
         h2_header = ic_div.find('h2', class_='g')
         h3_lang_header = ic_div.find('h3', class_='j')
 
         if not h2_header or not h3_lang_header:
-            print(f"DEBUG: Missing H2 or H3 within ic_div for this part. Skipping.")
+            logger.debug("Missing H2 or H3 within ic_div for this part. Skipping.")
             continue
 
         part_text_h2 = h2_header.get_text(strip=True)
         lang_text_h3 = h3_lang_header.get_text(strip=True)
 
-        if "Arabic" in lang_text_h3:
-            current_part_name = "Arabic"
-        elif "Persian" in lang_text_h3:
-            current_part_name = "Persian"
-        
+        current_part_name = _part_name(lang_text_h3)
         if not current_part_name:
-            print(f"DEBUG: Could not determine language part for H2: '{part_text_h2}' / H3: '{lang_text_h3}'")
+            logger.debug("Could not determine language part for H2: '%s' / H3: '%s'", part_text_h2, lang_text_h3)
             continue
             
-        print(f"Processing: {SOURCE_PREFIX} - From the {current_part_name} (section found via '{part_text_h2}')")
+        logger.debug("Processing: %s - From the %s (section found via '%s')", SOURCE_PREFIX, current_part_name, part_text_h2)
         
         # The HW items (<div class="">) are direct children of actual_part_content_holder
         hw_items_processed_this_part = 0
@@ -159,34 +160,148 @@ def parse_hidden_words(html_content):
                 hw_items_processed_this_part +=1
         
         if hw_items_processed_this_part > 0:
-             print(f"DEBUG: Attempted to parse {hw_items_processed_this_part} <div class=''> items for {current_part_name}.")
+             logger.debug("Attempted to parse %d <div class=''> items for %s.", hw_items_processed_this_part, current_part_name)
         else:
-            print(f"DEBUG: No <div class=''> items (potential HWs) found as direct children of actual_part_content_holder for {current_part_name}.")
-
+            logger.debug("No <div class=''> items (potential HWs) found as direct children of actual_part_content_holder for %s.", current_part_name)
 
-    print(f"\nSuccessfully parsed a total of {len(all_quotes)} Hidden Words.")
     return all_quotes
 
-def save_quotes_to_json(quotes, filepath):
-    if not quotes:
-        print("No quotes to save.")
+def _part_name(lang_text_h3):
+    if "Arabic" in lang_text_h3:
+        return "Arabic"
+    if "Persian" in lang_text_h3:
+        return "Persian"
+    return ""
+
+def _class_test(*names):
+    """XPath predicate for an element carrying every one of the given classes."""
+    return "".join(f"[contains(concat(' ', normalize-space(@class), ' '), ' {name} ')]" for name in names)
+
+# The same walk as parse_hidden_words_bs4, as precompiled XPath: straight to
+# the content wrapper, then section -> holder -> (heading, items) -> number/quote.
+_CONTENT_WRAPPER = etree.XPath(f"(//div{_class_test('b')})[1]/div[1]/following-sibling::div[1]")
+_SECTIONS = etree.XPath("div")
+_PART_HOLDER = etree.XPath("div[1]")
+_IC_DIV = etree.XPath(f"(.//div{_class_test('ic')})[1]")
+_H2_HEADER = etree.XPath(f"(.//h2{_class_test('g')})[1]")
+_H3_LANG_HEADER = etree.XPath(f"(.//h3{_class_test('j')})[1]")
+_HW_ITEMS = etree.XPath("div[not(normalize-space(@class))]")
+_NUMBER_P = etree.XPath(f"p{_class_test('db', 'if', 'zd')}[1]")
+_QUOTE_DIV = etree.XPath("following-sibling::div[1]")
+_QUOTE_P = etree.XPath(f"(.//p{_class_test('dd', 'zd')})[1]")
+_KF_SPAN = etree.XPath(f"(.//span{_class_test('kf')})[1]")
+_TEXT_NODES = etree.XPath(".//text()")
+
+def _first(xpath, element):
+    found = xpath(element)
+    return found[0] if found else None
+
+def _stripped_text(element):
+    """BeautifulSoup's get_text(strip=True): every text node stripped, then concatenated."""
+    return "".join(text.strip() for text in _TEXT_NODES(element))
+
+def _is_verse_number_link(element):
+    return element.tag == 'a' and (" ".join(element.get('class', '').split()) == "td ff gf"
+                                   or 'sf' in element.get('class', '').split())
+
+def _text_with_breaks(element, pieces):
+    """get_text() with <br> as a newline and the verse-number links dropped, as the bs4 path does."""
+    if element.text:
+        pieces.append(element.text)
+    for child in element:
+        if child.tag == 'br':
+            pieces.append('\n')
+        elif isinstance(child.tag, str) and not _is_verse_number_link(child):
+            _text_with_breaks(child, pieces)
+        if child.tail:
+            pieces.append(child.tail)
+    return pieces
+
+def parse_one_hidden_word_item_lxml(hw_item_div, part_name, quotes_list):
+    """lxml twin of parse_one_hidden_word_item; produces the same text."""
+    number_p_tag = _first(_NUMBER_P, hw_item_div)
+    if number_p_tag is None:
         return
-    unique_quotes = []
-    seen_texts = set()
-    for quote in quotes:
-        normalized_text = ' '.join(quote["text"].split())
-        if normalized_text not in seen_texts:
-            unique_quotes.append(quote)
-            seen_texts.add(normalized_text)
-    try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(unique_quotes, f, indent=2, ensure_ascii=False)
-        print(f"Quotes successfully saved to: {filepath} ({len(unique_quotes)} unique quotes)")
-    except IOError as e:
-        print(f"Error saving quotes to {filepath}: {e}")
+    number_text_match = re.match(r'(\d+)\.', _stripped_text(number_p_tag))
+    if not number_text_match:
+        return
+    number_str = number_text_match.group(1)
+    inner_div_for_quote = _first(_QUOTE_DIV, number_p_tag)
+    if inner_div_for_quote is None:
+        return
+    quote_p_tag = _first(_QUOTE_P, inner_div_for_quote)
+    if quote_p_tag is None:
+        return
+
+    kf_span = _first(_KF_SPAN, quote_p_tag)
+    if kf_span is not None:
+        text_parts = [_stripped_text(kf_span), (kf_span.tail or '').strip()]
+        for sibling in kf_span.itersiblings():
+            if not isinstance(sibling.tag, str):
+                # BeautifulSoup treats comments as strings here
+                text_parts.append((sibling.text or '').strip())
+            elif not (sibling.tag == 'a' and 'td' in sibling.get('class', '').split()):
+                text_parts.append(_stripped_text(sibling))
+            text_parts.append((sibling.tail or '').strip())
+    else:
+        full_quote_text_raw = "".join(_text_with_breaks(quote_p_tag, []))
+        text_parts = [line.strip() for line in full_quote_text_raw.split('\n') if line.strip()]
+
+    _append_quote(text_parts, part_name, number_str, quotes_list)
+
+def parse_hidden_words_lxml(html_content):
+    """Fast path: lxml tree plus XPath, without building a BeautifulSoup tree.
+
+    Only the content wrapper's sections and items are visited. Returns []
+    when the expected page structure is not found."""
+    if not html_content:
+        return []
+    # lxml rejects str input that carries an XML encoding declaration
+    root = etree.fromstring(html_content.encode('utf-8'), etree.HTMLParser(encoding='utf-8'))
+    all_quotes = []
+    content_wrapper = _first(_CONTENT_WRAPPER, root) if root is not None else None
+    if content_wrapper is None:
+        logger.debug("lxml: content wrapper not found.")
+        return all_quotes
+
+    for section_container_div_candidate in _SECTIONS(content_wrapper):
+        actual_part_content_holder = _first(_PART_HOLDER, section_container_div_candidate)
+        if actual_part_content_holder is None:
+            continue
+        ic_div = _first(_IC_DIV, actual_part_content_holder)
+        if ic_div is None:
+            continue
+        h2_header = _first(_H2_HEADER, ic_div)
+        h3_lang_header = _first(_H3_LANG_HEADER, ic_div)
+        if h2_header is None or h3_lang_header is None:
+            continue
+        current_part_name = _part_name(_stripped_text(h3_lang_header))
+        if not current_part_name:
+            continue
+        logger.debug("Processing: %s - From the %s", SOURCE_PREFIX, current_part_name)
+        for element_in_part_holder in _HW_ITEMS(actual_part_content_holder):
+            parse_one_hidden_word_item_lxml(element_in_part_holder, current_part_name, all_quotes)
+    return all_quotes
+
+def parse_hidden_words(html_content):
+    """Parses the Hidden Words page with the lxml fast path, falling back to BeautifulSoup."""
+    if not html_content:
+        return []
+    all_quotes = parse_hidden_words_lxml(html_content)
+    if not all_quotes:
+        logger.warning("lxml fast path found no Hidden Words; falling back to BeautifulSoup.")
+        all_quotes = parse_hidden_words_bs4(html_content)
+    logger.info("Successfully parsed a total of %d Hidden Words.", len(all_quotes))
+    return all_quotes
+
+save_quotes_to_json = quote_stream.save_quotes
 
 if __name__ == "__main__":
-    html_page_content = fetch_page_content(URL)
+    args = instrumentation.scraper_args("Scrape The Hidden Words from bahai.org.")
+    html_page_content = fetch_page_content(URL, offline=args.offline)
     if html_page_content:
         hidden_words_quotes_list = parse_hidden_words(html_page_content)
-        save_quotes_to_json(hidden_words_quotes_list, OUTPUT_QUOTES_PATH)
\ No newline at end of file
+        sizes = save_quotes_to_json(hidden_words_quotes_list, OUTPUT_QUOTES_PATH, compact=args.compact,
+                                    stream=args.stream)
+        if sizes:
+            quote_output.print_size_report({os.path.basename(OUTPUT_QUOTES_PATH): sizes})
@@ -1,7 +1,19 @@
-import requests
-import json
+import io
+import logging
 import os
 import re
+import sys
+
+import http_cache
+import instrumentation
+import mapped_source
+import parallel_parse
+import pg_lexer
+import quote_output
+import quote_record
+import quote_stream
+
+logger = logging.getLogger(__name__)
 
 # --- Configuration ---
 # URL for the PLAIN TEXT version of the KJV Bible on Project Gutenberg
@@ -16,195 +28,356 @@ SOURCE_BOOK_TITLE = "The Holy Bible (King James Version)"
 TRADITION = "Christianity/Judaism" # KJV Old Testament is shared
 
 # --- Main Script ---
-def fetch_text_content(url):
+def fetch_text_content(url, offline=False):
     """Fetches the plain text content of the given URL."""
-    print(f"Fetching content from: {url}")
+    logger.info("Fetching content from: %s", url)
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 YourAppName/1.0 (Contact: youremail@example.com)' # Be a good internet citizen
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
+        with instrumentation.stage("fetch"):
+            response = http_cache.get(url, offline=offline)
         # PG text files are often UTF-8, but can vary.
         # The .txt.utf-8 URL should enforce UTF-8.
-        text_content = response.text # requests handles decoding based on headers/chardet
-        print("Content fetched successfully.")
+        with instrumentation.stage("decode"):
+            text_content = response.text # decoded with the charset detected by text_decoding
+        logger.info("Content fetched successfully.")
         return text_content
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching URL {url}: {e}")
+    except http_cache.fetch_errors() as e:
+        logger.error("Error fetching URL %s: %s", url, e)
         return None
 
-def parse_kjv_bible_text(text_content):
-    """Parses the plain text KJV Bible to extract verses."""
-    if not text_content:
-        return []
+def fetch_text_stream(url, offline=False):
+    """Fetches url through the HTTP cache and returns an iterator over its decoded lines.
 
-    quotes = []
-    current_book_name = ""
-    
-    # Regex to identify a book heading (e.g., "The First Book of Moses: Called Genesis")
-    # This is heuristic and might need adjustment based on the exact PG text file format.
-    # It looks for lines that are likely book titles (often all caps or title case, longer than typical verse lines)
-    book_title_regex = re.compile(r"^(The\s+(First|Second|Third|Fourth|Fifth)\s+Book\s+of\s+\w+.*?)$|^(The\s+Book\s+of\s+\w+.*?)$|^(The\s+(Gospel|Acts|Epistle|Lamentations|Revelation|Song)\s+.*?)$|^(Ezra|Nehemiah|Esther|Job|Psalms|Proverbs|Ecclesiastes|Hosea|Joel|Amos|Obadiah|Jonah|Micah|Nahum|Habakkuk|Zephaniah|Haggai|Zechariah|Malachi)$", re.MULTILINE | re.IGNORECASE)
-
-    # Regex to identify a verse line: "chapter:verse Text of the verse"
-    # It captures book (from state), chapter, verse number, and verse text.
-    # Example: "1:1 In the beginning God created..."
-    # Example: "10:15 And he said..."
-    verse_regex = re.compile(r"^\s*(\d+):(\d+)\s+(.*)")
-
-    # Find the start of the actual scripture content
-    # Typically after "*** START OF THE PROJECT GUTENBERG EBOOK..."
-    start_marker_1 = "*** START OF THE PROJECT GUTENBERG EBOOK"
-    start_marker_2 = "The Old Testament of the King James Version of the Bible" # More specific
-    
-    content_start_index = text_content.upper().find(start_marker_1.upper())
-    if content_start_index != -1:
-        # Find the next newline to get past the marker line itself
-        content_start_index = text_content.find('\n', content_start_index) + 1
-    else:
-        print(f"Warning: Could not find primary start marker '{start_marker_1}'. Trying alternative.")
-        content_start_index = text_content.upper().find(start_marker_2.upper())
-        if content_start_index != -1:
-            content_start_index = text_content.find('\n', content_start_index) + 1
-        else:
-            print("Warning: Could not find any start marker. Processing from beginning, may include header text.")
-            content_start_index = 0
-        
-    relevant_content = text_content[content_start_index:]
-    lines = relevant_content.splitlines()
-    
+    Lets iter_kjv_verses consume the Bible line by line instead of holding a
+    decoded copy of the whole text in memory. A fresh download is decoded
+    incrementally as it arrives, so parsing starts before it finishes.
+    Close the iterator when done: a download is cached once it is read to the
+    end, and close() reads what the parser left after the end marker."""
+    logger.info("Fetching content from: %s", url)
+    try:
+        with instrumentation.stage("fetch"):
+            response = http_cache.get(url, offline=offline, stream=True)
+        logger.info("Content fetched successfully.")
+        return response.iter_lines() # decoded while it is parsed, so there is no separate decode stage
+    except http_cache.fetch_errors() as e:
+        logger.error("Error fetching URL %s: %s", url, e)
+        return None
+
+# The 66 books in canonical order: (short name, heading as printed in the Project Gutenberg text).
+KJV_BOOKS = (
+    ("Genesis", "The First Book of Moses: Called Genesis"),
+    ("Exodus", "The Second Book of Moses: Called Exodus"),
+    ("Leviticus", "The Third Book of Moses: Called Leviticus"),
+    ("Numbers", "The Fourth Book of Moses: Called Numbers"),
+    ("Deuteronomy", "The Fifth Book of Moses: Called Deuteronomy"),
+    ("Joshua", "The Book of Joshua"),
+    ("Judges", "The Book of Judges"),
+    ("Ruth", "The Book of Ruth"),
+    ("1 Samuel", "The First Book of Samuel"),
+    ("2 Samuel", "The Second Book of Samuel"),
+    ("1 Kings", "The First Book of the Kings"),
+    ("2 Kings", "The Second Book of the Kings"),
+    ("1 Chronicles", "The First Book of the Chronicles"),
+    ("2 Chronicles", "The Second Book of the Chronicles"),
+    ("Ezra", "Ezra"),
+    ("Nehemiah", "The Book of Nehemiah"),
+    ("Esther", "The Book of Esther"),
+    ("Job", "The Book of Job"),
+    ("Psalms", "The Book of Psalms"),
+    ("Proverbs", "The Proverbs"),
+    ("Ecclesiastes", "Ecclesiastes"),
+    ("Song of Solomon", "The Song of Solomon"),
+    ("Isaiah", "The Book of the Prophet Isaiah"),
+    ("Jeremiah", "The Book of the Prophet Jeremiah"),
+    ("Lamentations", "The Lamentations of Jeremiah"),
+    ("Ezekiel", "The Book of the Prophet Ezekiel"),
+    ("Daniel", "The Book of Daniel"),
+    ("Hosea", "Hosea"),
+    ("Joel", "Joel"),
+    ("Amos", "Amos"),
+    ("Obadiah", "Obadiah"),
+    ("Jonah", "Jonah"),
+    ("Micah", "Micah"),
+    ("Nahum", "Nahum"),
+    ("Habakkuk", "Habakkuk"),
+    ("Zephaniah", "Zephaniah"),
+    ("Haggai", "Haggai"),
+    ("Zechariah", "Zechariah"),
+    ("Malachi", "Malachi"),
+    ("Matthew", "The Gospel According to Saint Matthew"),
+    ("Mark", "The Gospel According to Saint Mark"),
+    ("Luke", "The Gospel According to Saint Luke"),
+    ("John", "The Gospel According to Saint John"),
+    ("Acts", "The Acts of the Apostles"),
+    ("Romans", "The Epistle of Paul the Apostle to the Romans"),
+    ("1 Corinthians", "The First Epistle of Paul the Apostle to the Corinthians"),
+    ("2 Corinthians", "The Second Epistle of Paul the Apostle to the Corinthians"),
+    ("Galatians", "The Epistle of Paul the Apostle to the Galatians"),
+    ("Ephesians", "The Epistle of Paul the Apostle to the Ephesians"),
+    ("Philippians", "The Epistle of Paul the Apostle to the Philippians"),
+    ("Colossians", "The Epistle of Paul the Apostle to the Colossians"),
+    ("1 Thessalonians", "The First Epistle of Paul the Apostle to the Thessalonians"),
+    ("2 Thessalonians", "The Second Epistle of Paul the Apostle to the Thessalonians"),
+    ("1 Timothy", "The First Epistle of Paul the Apostle to Timothy"),
+    ("2 Timothy", "The Second Epistle of Paul the Apostle to Timothy"),
+    ("Titus", "The Epistle of Paul the Apostle to Titus"),
+    ("Philemon", "The Epistle of Paul the Apostle to Philemon"),
+    ("Hebrews", "The Epistle of Paul the Apostle to the Hebrews"),
+    ("James", "The General Epistle of James"),
+    ("1 Peter", "The First Epistle General of Peter"),
+    ("2 Peter", "The Second General Epistle of Peter"),
+    ("1 John", "The First Epistle General of John"),
+    ("2 John", "The Second Epistle General of John"),
+    ("3 John", "The Third Epistle General of John"),
+    ("Jude", "The General Epistle of Jude"),
+    ("Revelation", "The Revelation of Saint John the Divine"),
+)
+# Lines that separate the testaments; they end a verse but do not start a book.
+TESTAMENT_HEADINGS = (
+    "The Old Testament of the King James Version of the Bible",
+    "The New Testament of the King James Bible",
+)
+# In the PG text some books carry an older second title after this line,
+# e.g. 1 Samuel is "Otherwise Called: The First Book of the Kings".
+ALIAS_MARKER = "otherwise called"
+
+def normalize_heading(line):
+    """Case- and spacing-insensitive key for heading lookups."""
+    return " ".join(line.split()).rstrip(':').casefold()
+
+# normalized heading, bare book name or "The Book of <name>" -> 1-based canonical book number
+BOOK_INDEX = {}
+for _number, (_name, _heading) in enumerate(KJV_BOOKS, start=1):
+    for _key in (_heading, _name, f"The Book of {_name}"):
+        BOOK_INDEX[normalize_heading(_key)] = _number
+TESTAMENT_INDEX = {normalize_heading(heading) for heading in TESTAMENT_HEADINGS}
+# Anything longer than the longest heading is a verse line; skip the normalization for it
+MAX_HEADING_LENGTH = max(len(heading) for _, heading in KJV_BOOKS) + 10
+
+START_MARKER = "*** START OF THE PROJECT GUTENBERG EBOOK"
+START_MARKER_ALT = TESTAMENT_HEADINGS[0].upper()
+END_MARKER = "*** END OF THE PROJECT GUTENBERG EBOOK"
+END_MARKER_REGEX = re.compile(re.escape(END_MARKER), re.IGNORECASE)
+
+# Every stripped line is one of (see pg_lexer.py):
+#   end    the end marker, anywhere in the line
+#   verse  "chapter:verse Text of the verse", e.g. "1:1 In the beginning God created..."
+#          or "10:15 And he said...", capturing chapter, verse number and text
+# or a continuation line, which is a book/testament heading if classify_heading
+# finds it, or else more text of the current verse. The book comes from state.
+LEXER = pg_lexer.LineLexer((
+    ("end", pg_lexer.END_MARKER),
+    ("verse", r"(?P<chapter_number>\d+):(?P<verse_number>\d+)\s+(?P<verse_text>.*)"),
+))
+
+def _skip_to_content(lines):
+    """Yields the lines after the Project Gutenberg start marker.
+
+    Only the header before the marker is buffered; if the marker is missing
+    the buffered lines are replayed from the alternative marker (or from the
+    very beginning), as the whole-text parser did."""
+    header_lines = []
+    alt_start = None
+    for line in lines:
+        upper_line = line.upper()
+        if START_MARKER in upper_line:
+            yield from lines
+            return
+        if alt_start is None and START_MARKER_ALT in upper_line:
+            alt_start = len(header_lines) + 1
+        header_lines.append(line)
+
+    logger.warning("Could not find primary start marker '%s'. Trying alternative.", START_MARKER)
+    if alt_start is None:
+        logger.warning("Could not find any start marker. Processing from beginning, may include header text.")
+        alt_start = 0
+    yield from header_lines[alt_start:]
+
+def _verse_record(book_number, chapter, verse_num, verse_text_lines):
+    full_verse_text = " ".join(verse_text_lines).strip()
+    full_verse_text = re.sub(r'\s+', ' ', full_verse_text) # Normalize whitespace
+    if not full_verse_text: # Ensure it's not empty
+        return None
+    book_name = KJV_BOOKS[book_number - 1][0]
+    return quote_record.Quote(
+        text=full_verse_text,
+        source=f"{book_name}, {chapter}:{verse_num}",
+        author=AUTHOR,
+        tradition=TRADITION,
+        book=book_name, # Add specific book for easier filtering later
+        reference=f"{chapter}:{verse_num}",
+        book_number=book_number,
+        chapter=chapter,
+        verse=verse_num
+    )
+
+def classify_heading(line_stripped):
+    """Returns the book number for a book heading, 0 for a testament heading, None otherwise."""
+    if len(line_stripped) > MAX_HEADING_LENGTH:
+        return None
+    key = normalize_heading(line_stripped)
+    if key in TESTAMENT_INDEX:
+        return 0
+    return BOOK_INDEX.get(key)
+
+def iter_kjv_verses(lines):
+    """Yields KJV verses one at a time from an iterable of lines.
+
+    lines can be an open file, a streamed HTTP body or any other line
+    iterator, so memory use does not grow with the size of the source.
+    Books are identified by exact lookup of their heading in BOOK_INDEX."""
+    verse_count = 0
+    for record in _iter_kjv_segment(_skip_to_content(iter(lines))):
+        verse_count += 1
+        yield record
+    logger.info("Successfully parsed %d KJV Bible verses.", verse_count)
+
+def _iter_kjv_segment(lines):
+    """The verse loop over content lines (after the start marker), up to the end marker."""
+    current_book = 0 # canonical book number, 0 until the first heading
     # Variables to hold multi-line verses
     current_verse_text_lines = []
-    current_chapter = ""
-    current_verse_num = ""
+    current_chapter = 0
+    current_verse_num = 0
+    previous_line_key = ""
+    warned_no_book = False
 
-    for line_num, line_content in enumerate(lines):
-        line_stripped = line_content.strip()
+    for kind, match, line_stripped in LEXER.tokens(lines):
+        # Stop at the end marker
+        if kind == "end":
+            logger.debug("Found end of ebook marker.")
+            break
 
-        if not line_stripped: # Skip empty lines
+        if kind == "verse": # This line starts a verse (e.g., "1:1 ...")
+            if current_verse_num and current_verse_text_lines:
+                record = _verse_record(current_book, current_chapter, current_verse_num, current_verse_text_lines)
+                if record:
+                    yield record
+
+            current_chapter = int(match.group("chapter_number"))
+            current_verse_num = int(match.group("verse_number"))
+            current_verse_text_lines = [match.group("verse_text").strip()]
+            if not current_book:
+                # Verses before any recognised heading cannot be attributed to a book
+                if not warned_no_book:
+                    logger.warning("Verse %d:%d appears before any book heading; skipping.", current_chapter, current_verse_num)
+                    warned_no_book = True
+                current_verse_num = 0
+            previous_line_key = ""
             continue
 
-        # Stop at the end marker
-        if "*** END OF THE PROJECT GUTENBERG EBOOK" in line_stripped.upper():
-            print("Found end of ebook marker.")
-            break
-        
-        # Attempt to identify book titles
-        # This is tricky because book titles are just lines of text.
-        # We look for lines that are NOT verse lines and seem like titles.
-        # A more robust way would be to have a predefined list of KJV book names.
-        # For now, we'll try to infer it when a new C:V pattern appears after non-verse lines.
-        
-        verse_match = verse_regex.match(line_stripped)
-        
-        if verse_match: # This line starts a verse (e.g., "1:1 ...")
-            # If there was a pending verse, save it
-            if current_book_name and current_chapter and current_verse_num and current_verse_text_lines:
-                full_verse_text = " ".join(current_verse_text_lines).strip()
-                full_verse_text = re.sub(r'\s+', ' ', full_verse_text) # Normalize whitespace
-                if full_verse_text: # Ensure it's not empty
-                    source_detail = f"{current_book_name}, {current_chapter}:{current_verse_num}"
-                    quotes.append({
-                        "text": full_verse_text,
-                        "source": source_detail,
-                        "author": AUTHOR,
-                        "tradition": TRADITION,
-                        "book": current_book_name, # Add specific book for easier filtering later
-                        "reference": f"{current_chapter}:{current_verse_num}"
-                    })
-            
-            # Start the new verse
-            current_chapter = verse_match.group(1)
-            current_verse_num = verse_match.group(2)
-            verse_text_part = verse_match.group(3).strip()
-            current_verse_text_lines = [verse_text_part]
-
-            # Infer book name if current_book_name is not set or if chapter is "1"
-            # This needs a list of books or more sophisticated logic.
-            # For this example, we'll need a way to set current_book_name.
-            # The plain text file often has the book name on a line before its first chapter.
-            # Let's try a heuristic: if chapter is 1 and verse is 1, look at previous non-empty lines for book title.
-            if current_chapter == "1" and current_verse_num == "1":
-                # Look backwards for a potential book title line
-                # This is a simplified approach. A list of KJV books would be better.
-                potential_title_line_index = line_num -1 # Index in the *original* lines list
-                while potential_title_line_index >= 0:
-                    prev_line = lines[potential_title_line_index].strip()
-                    # Heuristic: A book title is often Title Cased or ALL CAPS, not starting with C:V,
-                    # and not part of the Gutenberg boilerplate.
-                    if prev_line and not verse_regex.match(prev_line) and \
-                       len(prev_line) > 3 and len(prev_line) < 100 and \
-                       "PROJECT GUTENBERG" not in prev_line.upper() and \
-                       "BIBLE" not in prev_line.upper() and \
-                       "TESTAMENT" not in prev_line.upper():
-                        # Check if it resembles a known book pattern
-                        book_match_attempt = book_title_regex.match(prev_line)
-                        if book_match_attempt:
-                            current_book_name = prev_line # Use the full line as the book name
-                            print(f"\nIdentified Book: {current_book_name}")
-                            break 
-                    if potential_title_line_index < line_num - 5: # Don't look back too far
-                        break
-                    potential_title_line_index -=1
-                if not current_book_name: # If still no book name after looking back
-                    print(f"Warning: Could not determine book name for {current_chapter}:{current_verse_num}. Using last known or 'Unknown'.")
-                    current_book_name = current_book_name or "Unknown Book" # Keep last or set to unknown
-
-
-        elif current_verse_num and current_book_name: 
-            # This line is a continuation of the current verse if we are already processing one.
-            # Only append if it doesn't look like a new verse from a different chapter (unlikely in KJV PG)
-            # or a new book title.
-             if not book_title_regex.match(line_stripped): # Avoid appending book titles as verse continuations
-                current_verse_text_lines.append(line_stripped)
-        # else:
-            # This line is not a verse start and we are not in a verse,
-            # it could be a book title or header info. We try to catch book titles above.
-            # print(f"Skipping line (not a verse start or continuation): {line_stripped[:100]}")
-
-
-    # Save any last pending verse
-    if current_book_name and current_chapter and current_verse_num and current_verse_text_lines:
-        full_verse_text = " ".join(current_verse_text_lines).strip()
-        full_verse_text = re.sub(r'\s+', ' ', full_verse_text)
-        if full_verse_text:
-            source_detail = f"{current_book_name}, {current_chapter}:{current_verse_num}"
-            quotes.append({
-                "text": full_verse_text,
-                "source": source_detail,
-                "author": AUTHOR,
-                "tradition": TRADITION,
-                "book": current_book_name,
-                "reference": f"{current_chapter}:{current_verse_num}"
-            })
-
-    print(f"\nSuccessfully parsed {len(quotes)} KJV Bible verses.")
+        heading = classify_heading(line_stripped)
+        if heading is not None:
+            # A heading always ends the verse in progress
+            if current_verse_num and current_verse_text_lines:
+                record = _verse_record(current_book, current_chapter, current_verse_num, current_verse_text_lines)
+                if record:
+                    yield record
+            current_verse_num = 0
+            current_verse_text_lines = []
+            if heading and not previous_line_key.startswith(ALIAS_MARKER):
+                if heading != current_book:
+                    logger.debug("Identified Book: %s", KJV_BOOKS[heading - 1][1])
+                current_book = heading
+        elif current_verse_num:
+            # This line is a continuation of the current verse
+            current_verse_text_lines.append(line_stripped)
+        previous_line_key = normalize_heading(line_stripped) if len(line_stripped) <= MAX_HEADING_LENGTH else ""
+
+    # Emit any last pending verse
+    if current_verse_num and current_verse_text_lines:
+        record = _verse_record(current_book, current_chapter, current_verse_num, current_verse_text_lines)
+        if record:
+            yield record
+
+def split_kjv_segments(text_content):
+    """Cuts the content after the start marker into pieces that each begin at a book heading.
+
+    A cheap pre-scan with the same heading rules as _iter_kjv_segment; every
+    piece can then be parsed on its own with identical results."""
+    return _split_kjv_content("".join(_skip_to_content(iter(io.StringIO(text_content)))))
+
+def _split_kjv_content(content):
+    # Nothing after the end marker is parsed, so no piece may start there
+    end_match = END_MARKER_REGEX.search(content)
+    scan_end = end_match.start() if end_match else len(content)
+    starts = []
+    offset = 0
+    after_alias = False
+    for line_content in content[:scan_end].split('\n'):
+        line_stripped = line_content.strip()
+        if line_stripped:
+            if line_stripped[0].isdigit() and LEXER.classify(line_stripped)[0] == "verse":
+                after_alias = False
+            elif len(line_stripped) <= MAX_HEADING_LENGTH:
+                key = normalize_heading(line_stripped)
+                if BOOK_INDEX.get(key) and not after_alias:
+                    starts.append(offset)
+                after_alias = key.startswith(ALIAS_MARKER)
+            else:
+                after_alias = False
+        offset += len(line_content) + 1
+    return parallel_parse.cut(content, starts)
+
+def parse_kjv_segment(segment_text):
+    return list(_iter_kjv_segment(io.StringIO(segment_text)))
+
+def parse_kjv_bible_text(text_content, jobs=1):
+    """Parses the plain text KJV Bible to extract verses.
+
+    With jobs > 1 the books are parsed in parallel worker processes."""
+    if not text_content:
+        return []
+    if jobs == 1:
+        return list(iter_kjv_verses(io.StringIO(text_content)))
+    quotes = parallel_parse.parse_segments(parse_kjv_segment, split_kjv_segments(text_content), jobs)
+    logger.info("Successfully parsed %d KJV Bible verses.", len(quotes))
     return quotes
 
-def save_quotes_to_json(quotes, filepath):
-    if not quotes:
-        print("No quotes to save.")
-        return
-    unique_quotes = []
-    seen_texts = {} # Using dict for more complex duplicate check if needed {text_normalized: source_detail}
-    for quote in quotes:
-        normalized_text = ' '.join(quote["text"].split())
-        if normalized_text not in seen_texts:
-            unique_quotes.append(quote)
-            seen_texts[normalized_text] = quote["source"]
-        # else:
-            # print(f"Duplicate text found ('{normalized_text[:30]}...'), first seen from {seen_texts[normalized_text]}, current: {quote['source']}")
-    
-    try:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(unique_quotes, f, indent=2, ensure_ascii=False)
-        print(f"Quotes successfully saved to: {filepath} ({len(unique_quotes)} unique quotes)")
-    except IOError as e:
-        print(f"Error saving quotes to {filepath}: {e}")
+def parse_kjv_bible_file(path, content_type='', jobs=1):
+    """Like parse_kjv_bible_text, for a local raw source file (e.g. a cached download).
+
+    The file is memory-mapped and the Project Gutenberg start and end markers
+    are found on the raw bytes, so neither the header nor the license footer
+    is decoded. With one job the verses are decoded and parsed line by line."""
+    with mapped_source.MappedSource(path, content_type) as source:
+        content_range = source.gutenberg_range() if source.byte_level else None
+        if content_range is None:
+            # No start marker: the text parser knows the fallbacks
+            return parse_kjv_bible_text(source.text(), jobs)
+        if jobs == 1:
+            quotes = list(_iter_kjv_segment(source.iter_lines(*content_range)))
+        else:
+            segments = _split_kjv_content(source.text(*content_range))
+            quotes = parallel_parse.parse_segments(parse_kjv_segment, segments, jobs)
+    logger.info("Successfully parsed %d KJV Bible verses.", len(quotes))
+    return quotes
+
+save_quotes_to_json = quote_stream.save_quotes
 
 if __name__ == "__main__":
-    plain_text_content = fetch_text_content(URL_TEXT)
-    if plain_text_content:
-        kjv_bible_quotes = parse_kjv_bible_text(plain_text_content)
-        save_quotes_to_json(kjv_bible_quotes, OUTPUT_QUOTES_PATH)
\ No newline at end of file
+    args = instrumentation.scraper_args(
+        "Scrape the King James Bible from Project Gutenberg.",
+        jobs_help="Parse the books on N processes (0 = one per CPU) instead of streaming the download.")
+    jobs = parallel_parse.resolve_jobs(args.jobs)
+    if jobs > 1:
+        text_content = fetch_text_content(URL_TEXT, offline=args.offline)
+        kjv_bible_quotes = parse_kjv_bible_text(text_content, jobs) if text_content else None
+    else:
+        text_lines = fetch_text_stream(URL_TEXT, offline=args.offline)
+        kjv_bible_quotes = iter_kjv_verses(text_lines) if text_lines else None
+    if kjv_bible_quotes is not None:
+        try:
+            # With --stream the verses are written as they are parsed
+            if not args.stream:
+                kjv_bible_quotes = list(kjv_bible_quotes)
+            sizes = save_quotes_to_json(kjv_bible_quotes, OUTPUT_QUOTES_PATH, compact=args.compact,
+                                        stream=args.stream)
+        except http_cache.fetch_errors() as e:
+            logger.error("Download of %s failed while parsing: %s", URL_TEXT, e)
+            sys.exit(1)
+        finally:
+            if jobs == 1:
+                # Parsing stops at the end marker; closing reads the license after it so the download gets cached
+                text_lines.close()
+        if sizes:
+            quote_output.print_size_report({os.path.basename(OUTPUT_QUOTES_PATH): sizes})
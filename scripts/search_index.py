@@ -0,0 +1,274 @@
+import argparse
+import base64
+import json
+import os
+import random
+import re
+import statistics
+import time
+import unicodedata
+from bisect import bisect_right
+from collections import defaultdict
+
+import quote_output
+
+# --- Configuration ---
+# A compact inverted index over every corpus. Layout of data/search_index.json:
+#   corpora   corpus names; docs[i] = [corpus position, index in that corpus]
+#   blocks    sorted term dictionary, front-coded in blocks of BLOCK_SIZE terms:
+#             [first term, [shared prefix length, suffix], ...]
+#   df        document frequency of each term, in dictionary order
+#   offsets   byte offset of each term's postings, plus a final end offset
+#   postings  base64 of the postings lists: ascending doc ids, delta-encoded
+#             as unsigned LEB128 varints
+# A lookup binary-searches the block heads and decodes only that term's bytes.
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
+INDEX_PATH = os.path.join(PROJECT_ROOT, 'data', 'search_index.json')
+BLOCK_SIZE = 16
+TOKEN_REGEX = re.compile(r"[^\W_]+")
+
+
+# --- Function Definitions ---
+def tokenize(text):
+    """Lowercased words with diacritics removed, so 'Bahá’u’lláh' matches 'bahaullah' parts."""
+    folded = unicodedata.normalize('NFKD', text.casefold())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return TOKEN_REGEX.findall(folded)
+
+
+def encode_varints(numbers, out):
+    for number in numbers:
+        while number >= 0x80:
+            out.append((number & 0x7F) | 0x80)
+            number >>= 7
+        out.append(number)
+
+
+def decode_varints(data, start, end):
+    numbers, number, shift = [], 0, 0
+    for byte in data[start:end]:
+        number |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            numbers.append(number)
+            number, shift = 0, 0
+    return numbers
+
+
+def _common_prefix_length(a, b):
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+
+def build_index(records):
+    """records: (corpus, index, quote) tuples as from quote_output.load_records()."""
+    corpora = []
+    docs = []
+    postings = defaultdict(list)
+    for doc_id, (corpus, index, quote) in enumerate(records):
+        if not corpora or corpora[-1] != corpus:
+            corpora.append(corpus)
+        docs.append([len(corpora) - 1, index])
+        for term in set(tokenize(quote["text"])):
+            postings[term].append(doc_id) # doc ids arrive in ascending order
+
+    terms = sorted(postings)
+    blob = bytearray()
+    offsets, df, blocks = [], [], []
+    for position, term in enumerate(terms):
+        doc_ids = postings[term]
+        offsets.append(len(blob))
+        df.append(len(doc_ids))
+        encode_varints([doc_ids[0]] + [b - a for a, b in zip(doc_ids, doc_ids[1:])], blob)
+        if position % BLOCK_SIZE == 0:
+            blocks.append([term])
+        else:
+            shared = _common_prefix_length(terms[position - 1], term)
+            blocks[-1].append([shared, term[shared:]])
+    offsets.append(len(blob))
+
+    return {
+        "version": 1,
+        "block_size": BLOCK_SIZE,
+        "corpora": corpora,
+        "docs": docs,
+        "blocks": blocks,
+        "df": df,
+        "offsets": offsets,
+        "postings": base64.b64encode(bytes(blob)).decode('ascii'),
+    }
+
+
+def write_index(paths=None, index_path=INDEX_PATH):
+    paths = paths or quote_output.corpus_files()
+    start = time.perf_counter()
+    index = build_index(quote_output.load_records(paths))
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+    print(f"Search index: {len(index['df'])} terms over {len(index['docs'])} quotes, "
+          f"{os.path.getsize(index_path) / 1024:.1f} KB, built in {time.perf_counter() - start:.2f}s -> {index_path}")
+    return index
+
+
+class SearchIndex:
+    """Query API over a file written by write_index()."""
+
+    def __init__(self, index):
+        self.corpora = index["corpora"]
+        self.docs = index["docs"]
+        self.df = index["df"]
+        self.offsets = index["offsets"]
+        self.postings = base64.b64decode(index["postings"])
+        self.block_size = index["block_size"]
+        self.blocks = index["blocks"]
+        self.block_heads = [block[0] for block in self.blocks]
+
+    @classmethod
+    def load(cls, index_path=INDEX_PATH):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _block_terms(self, block_number):
+        """Expands one front-coded block into (term id, term) pairs."""
+        block = self.blocks[block_number]
+        term = block[0]
+        first_id = block_number * self.block_size
+        yield first_id, term
+        for offset, (shared, suffix) in enumerate(block[1:], start=1):
+            term = term[:shared] + suffix
+            yield first_id + offset, term
+
+    def term_id(self, term):
+        block_number = bisect_right(self.block_heads, term) - 1
+        if block_number < 0:
+            return None
+        for term_id, candidate in self._block_terms(block_number):
+            if candidate == term:
+                return term_id
+            if candidate > term:
+                break
+        return None
+
+    def _postings(self, term_id):
+        doc_ids, current = [], 0
+        for delta in decode_varints(self.postings, self.offsets[term_id], self.offsets[term_id + 1]):
+            current += delta
+            doc_ids.append(current)
+        return doc_ids
+
+    def lookup(self, term):
+        """Doc ids containing the (already tokenized) term."""
+        term_id = self.term_id(term)
+        return [] if term_id is None else self._postings(term_id)
+
+    def prefix_terms(self, prefix):
+        block_number = max(bisect_right(self.block_heads, prefix) - 1, 0)
+        for number in range(block_number, len(self.blocks)):
+            for term_id, term in self._block_terms(number):
+                if term.startswith(prefix):
+                    yield term_id, term
+                elif term > prefix:
+                    return
+
+    def search(self, query, prefix=False):
+        """Doc ids containing every word of query (the last word as a prefix if prefix=True)."""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        term_ids = []
+        for term in terms[:-1] if prefix else terms:
+            term_id = self.term_id(term)
+            if term_id is None:
+                return []
+            term_ids.append(term_id)
+
+        # Intersect the rarest lists first so the candidate set shrinks fastest
+        term_ids.sort(key=self.df.__getitem__)
+        result = None
+        for term_id in term_ids:
+            doc_ids = self._postings(term_id)
+            result = doc_ids if result is None else sorted(set(result).intersection(doc_ids))
+            if not result:
+                return []
+        if prefix:
+            matches = set()
+            for term_id, _ in self.prefix_terms(terms[-1]):
+                matches.update(self._postings(term_id))
+            result = sorted(matches if result is None else matches.intersection(result))
+        return result
+
+    def locate(self, doc_id):
+        """(corpus, index in data/quotes_<corpus>.json) for a doc id."""
+        corpus_position, index = self.docs[doc_id]
+        return self.corpora[corpus_position], index
+
+
+def benchmark(index, queries=200, seed=1):
+    """Median and p95 latency in microseconds for single-term, two-term and prefix queries."""
+    rng = random.Random(seed)
+    terms = [term for number in range(len(index.blocks)) for _, term in index._block_terms(number)]
+    kinds = {
+        "term": lambda: rng.choice(terms),
+        "two terms": lambda: f"{rng.choice(terms)} {rng.choice(terms)}",
+        "prefix": lambda: rng.choice(terms)[:3],
+    }
+    results = {}
+    for kind, make_query in kinds.items():
+        timings = []
+        for _ in range(queries):
+            query = make_query()
+            start = time.perf_counter()
+            index.search(query, prefix=(kind == "prefix"))
+            timings.append((time.perf_counter() - start) * 1e6)
+        timings.sort()
+        results[kind] = (statistics.median(timings), timings[int(0.95 * (len(timings) - 1))])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the full-text index over all quote corpora.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Index data/quotes_*.json.")
+    build_parser.add_argument("paths", nargs="*")
+    query_parser = subparsers.add_parser("query", help="Print the quotes matching every word of a query.")
+    query_parser.add_argument("query")
+    query_parser.add_argument("--prefix", action="store_true", help="Treat the last word as a prefix.")
+    query_parser.add_argument("--limit", type=int, default=10)
+    subparsers.add_parser("bench", help="Measure query latency.")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        write_index(args.paths)
+        return
+
+    start = time.perf_counter()
+    index = SearchIndex.load()
+    load_ms = (time.perf_counter() - start) * 1000
+    if args.command == "bench":
+        print(f"Loaded {len(index.df)} terms in {load_ms:.1f}ms")
+        for kind, (p50, p95) in benchmark(index).items():
+            print(f"  {kind:<10} p50 {p50:8.1f}us   p95 {p95:8.1f}us")
+        return
+
+    start = time.perf_counter()
+    doc_ids = index.search(args.query, prefix=args.prefix)
+    elapsed_us = (time.perf_counter() - start) * 1e6
+    print(f"{len(doc_ids)} matches in {elapsed_us:.0f}us")
+    corpora = {}
+    for doc_id in doc_ids[:args.limit]:
+        corpus, quote_index = index.locate(doc_id)
+        if corpus not in corpora:
+            with open(os.path.join(quote_output.DATA_DIR, f"quotes_{corpus}.json"), 'r', encoding='utf-8') as f:
+                corpora[corpus] = json.load(f)
+        quote = corpora[corpus][quote_index]
+        print(f"- {quote['text']}\n  ({quote.get('source', corpus)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import importlib
+import importlib.util
+
+# --- Configuration ---
+# The registry of quote sources. Each plugin is a scraper module plus the
+# names of what the build needs from it: its URL and output path, a fetch, a
+# parse and a save function, and optionally a "parse_file" parser that maps
+# the cached copy itself (mapped_source.py). Modules are named as strings and
+# only imported when one of those attributes is first looked up, so a
+# command that never runs a source never pays for its imports (bs4 and lxml
+# for the Hidden Words page). "requires" lists the third-party modules a
+# plugin needs to parse; fetching online additionally needs FETCH_REQUIRES.
+# A new source is one more PLUGINS entry naming its module.
+PLUGINS = {
+    "hidden_words": {
+        "module": "scrape_hidden_words",
+        "url": "URL",
+        "fetch": "fetch_page_content",
+        "parse": "parse_hidden_words",
+        "save": "save_quotes_to_json",
+        "output": "OUTPUT_QUOTES_PATH",
+        "requires": ("bs4", "lxml"),
+    },
+    "dhammapada": {
+        "module": "scrape_dhammapada_pg",
+        "url": "URL_TEXT",
+        "fetch": "fetch_page_content_text",
+        "parse": "parse_dhammapada_text",
+        "save": "save_quotes_to_json",
+        "output": "OUTPUT_QUOTES_PATH",
+        "segmented": True,
+        "parse_file": "parse_dhammapada_file",
+    },
+    "gita_arnold": {
+        "module": "scrape_gita_arnold_pg",
+        "url": "URL_TEXT",
+        "fetch": "fetch_text_content",
+        "parse": "parse_gita_text",
+        "save": "save_quotes_to_json",
+        "output": "OUTPUT_QUOTES_PATH",
+        "segmented": True,
+        "parse_file": "parse_gita_file",
+    },
+    "kjv_bible": {
+        "module": "scrape_kjv_bible_pg",
+        "url": "URL_TEXT",
+        "fetch": "fetch_text_content",
+        "parse": "parse_kjv_bible_text",
+        "save": "save_quotes_to_json",
+        "output": "OUTPUT_QUOTES_PATH",
+        "segmented": True,
+        "parse_file": "parse_kjv_bible_file",
+    },
+}
+# Attributes looked up on the plugin's module; every other key is plain data
+MODULE_ATTRIBUTES = ("url", "fetch", "parse", "save", "output", "parse_file")
+FETCH_REQUIRES = ("requests",)
+
+
+# --- Function Definitions ---
+def is_installed(module_name):
+    """True if module_name can be imported, without importing it."""
+    return importlib.util.find_spec(module_name) is not None
+
+
+class SourcePlugin:
+    """One registered source, read like the source dicts build_quotes has always used
+    (plugin["parse"], "parse_file" in plugin, plugin.get("segmented")).
+
+    The plugin's module is imported on the first lookup of one of MODULE_ATTRIBUTES."""
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.spec = spec
+
+    @property
+    def module(self):
+        return importlib.import_module(self.spec["module"])
+
+    @property
+    def module_path(self):
+        """The module's source file, located without importing it."""
+        return importlib.util.find_spec(self.spec["module"]).origin
+
+    def missing_requirements(self, online=False):
+        requires = self.spec.get("requires", ()) + (FETCH_REQUIRES if online else ())
+        return [module_name for module_name in requires if not is_installed(module_name)]
+
+    def __getitem__(self, key):
+        if key == "name":
+            return self.name
+        if key in MODULE_ATTRIBUTES and key in self.spec:
+            return getattr(self.module, self.spec[key])
+        return self.spec[key]
+
+    def __contains__(self, key):
+        return key == "name" or key in self.spec
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def __repr__(self):
+        return f"SourcePlugin({self.name!r}, {self.spec['module']!r})"
+
+
+def plugins(names=None):
+    """The registered plugins (all of them, or those in names, in that order)."""
+    names = names or list(PLUGINS)
+    unknown = [name for name in names if name not in PLUGINS]
+    if unknown:
+        raise SystemExit(f"Unknown source(s): {', '.join(unknown)}. Choose from: {', '.join(PLUGINS)}")
+    return [SourcePlugin(name, PLUGINS[name]) for name in names]
+
+
+def get(name):
+    return plugins([name])[0]
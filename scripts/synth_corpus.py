@@ -0,0 +1,182 @@
+import argparse
+import itertools
+import os
+import random
+import sys
+
+import scrape_kjv_bible_pg
+
+# --- Configuration ---
+# Synthetic Project Gutenberg texts in the layout each Gutenberg parser
+# expects, at any size, for scaling tests (bench_scaling.py) without more
+# real books. Sizes are given as multiples of the KJV download (KJV_BYTES),
+# so --scale 100 is a text 100 times the size of the Bible. A text is the
+# Gutenberg header and start marker, the layout's divisions (the 26
+# Dhammapada chapters, the 18 Gita chapters, the 66 KJV books) sharing the
+# size equally, and the end marker plus some trailing license text. Verses
+# and paragraphs are random words from WORDS, wrapped at LINE_WIDTH like the
+# Gutenberg files; sentences open with a comma clause, so no paragraph reads
+# as a Gita speaker line by accident.
+# The shape changes how that size is laid out:
+#   regular       chapters and records of about the real books' length, so a
+#                 larger text has more chapters (more KJV chapters per book)
+#   long-chapters one chapter per division, holding all of its records
+#   long-records  records RECORD_LINES_LONG lines long, so far fewer of them
+KJV_BYTES = 4_451_000
+LAYOUTS = ("dhammapada", "gita", "kjv")
+SHAPES = ("regular", "long-chapters", "long-records")
+LINE_WIDTH = 72
+RECORD_LINES = (1, 4) # lines per verse/paragraph in the regular shapes
+RECORD_LINES_LONG = (40, 80)
+RECORDS_PER_CHAPTER = (8, 40)
+WORDS = ("and the of that he said unto them lord god shall is in be his for they was with not all "
+         "thou thy thee mind heart self path wise man fool virtue deed world truth light way works "
+         "know knoweth seek find peace joy sorrow desire hath come goeth spirit soul life death "
+         "law word king people house land day night fire water earth heaven").split()
+HEADER = ("The Project Gutenberg eBook of {title}\n\nThis eBook is for the use of anyone anywhere.\n\n"
+          "Title: {title}\n\nCharacter set encoding: UTF-8\n\n"
+          "*** START OF THE PROJECT GUTENBERG EBOOK {upper} ***\n\n\n")
+FOOTER = ("\n\n*** END OF THE PROJECT GUTENBERG EBOOK {upper} ***\n\n"
+          "Updated editions will replace the previous one.\n\n1. General Terms of Use\n")
+TITLES = {"dhammapada": "The Dhammapada", "gita": "The Bhagavad-Gita", "kjv": "The King James Bible"}
+DIVISIONS = {"dhammapada": 26, "gita": 18, "kjv": len(scrape_kjv_bible_pg.KJV_BOOKS)}
+
+
+# --- Function Definitions ---
+def roman(number):
+    numerals = (("M", 1000), ("CM", 900), ("D", 500), ("CD", 400), ("C", 100), ("XC", 90), ("L", 50),
+                ("XL", 40), ("X", 10), ("IX", 9), ("V", 5), ("IV", 4), ("I", 1))
+    result = ""
+    for numeral, value in numerals:
+        while number >= value:
+            result += numeral
+            number -= value
+    return result
+
+
+def _sentence(rng):
+    opening = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 5)))
+    rest = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 14)))
+    return f"{opening.capitalize()}, {rest}{rng.choice('.;.:')}"
+
+
+def _record_lines(rng, shape):
+    """One verse or paragraph, wrapped into lines."""
+    low, high = RECORD_LINES_LONG if shape == "long-records" else RECORD_LINES
+    target = rng.randint(low, high) * LINE_WIDTH
+    words = []
+    length = 0
+    while length < target:
+        sentence = _sentence(rng)
+        words.extend(sentence.split(" "))
+        length += len(sentence) + 1
+    lines, line = [], ""
+    for word in words:
+        if line and len(line) + 1 + len(word) > LINE_WIDTH:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    lines.append(line)
+    return lines
+
+
+def _chapters(rng, budget, shape):
+    """Lists of records (each a list of lines) filling about budget bytes, per chapter."""
+    chapter, size = [], 0
+    chapter_length = rng.randint(*RECORDS_PER_CHAPTER)
+    while size < budget:
+        record = _record_lines(rng, shape)
+        record_size = sum(len(line) + 1 for line in record) + 8
+        chapter.append(record)
+        size += record_size
+        if shape != "long-chapters" and len(chapter) >= chapter_length:
+            yield chapter
+            chapter = []
+            chapter_length = rng.randint(*RECORDS_PER_CHAPTER)
+    if chapter:
+        yield chapter
+
+
+def _dhammapada(rng, budget, shape):
+    verse = 1
+    chapters = (chapter for _ in range(DIVISIONS["dhammapada"]) for chapter in _chapters(rng, budget, shape))
+    for number, chapter in enumerate(chapters, 1):
+        name = "The Twin-Verses" if number == 1 else f"The {rng.choice(WORDS).capitalize()}"
+        yield f"Chapter {roman(number)}. {name}\n\n"
+        for lines in chapter:
+            yield f"{verse}. " + "\n".join(lines) + "\n\n"
+            verse += 1
+
+
+def _gita(rng, budget, shape):
+    speakers = ("Arjuna:", "Krishna:", "Sanjaya:")
+    chapters = (chapter for _ in range(DIVISIONS["gita"]) for chapter in _chapters(rng, budget, shape))
+    pending = next(chapters)
+    for number, following in enumerate(itertools.chain(chapters, [None]), 1):
+        chapter, pending = pending, following
+        yield f"CHAPTER {roman(number)}\n\nENTITLED \"{rng.choice(WORDS).upper()} {rng.choice(WORDS).upper()}\"\n\n"
+        for lines in chapter:
+            if rng.random() < 0.1:
+                yield rng.choice(speakers) + "\n\n"
+            yield "\n".join(lines) + " [FN#1]\n\n"
+        # The parser stops at the close of chapter XVIII, the real book's last
+        # chapter, so in longer texts every chapter but the last one ends plainly
+        if pending is None:
+            yield "HERE ENDETH CHAPTER XVIII OF THE BHAGAVAD-GITA,\n\nentitled \"Of the Way\"\n\n"
+        elif roman(number) != "XVIII":
+            yield f"HERE ENDETH CHAPTER {roman(number)} OF THE BHAGAVAD-GITA\n\n"
+
+
+def _kjv(rng, budget, shape):
+    for number, (_, heading) in enumerate(scrape_kjv_bible_pg.KJV_BOOKS, 1):
+        if number == 1:
+            yield scrape_kjv_bible_pg.TESTAMENT_HEADINGS[0] + "\n\n\n"
+        elif number == 40:
+            yield "\n\n" + scrape_kjv_bible_pg.TESTAMENT_HEADINGS[1] + "\n\n\n"
+        yield f"\n\n{heading}\n\n\n"
+        for chapter_number, chapter in enumerate(_chapters(rng, budget, shape), 1):
+            for verse_number, lines in enumerate(chapter, 1):
+                yield f"{chapter_number}:{verse_number} " + "\n".join(lines) + "\n\n"
+
+
+GENERATORS = {"dhammapada": _dhammapada, "gita": _gita, "kjv": _kjv}
+
+
+def iter_text(layout, scale=1.0, shape="regular", seed=1):
+    """Yields a synthetic text of about scale * KJV_BYTES in the given layout, piece by piece."""
+    rng = random.Random(seed)
+    title = TITLES[layout]
+    budget = scale * KJV_BYTES / DIVISIONS[layout]
+    yield HEADER.format(title=title, upper=title.upper())
+    yield from GENERATORS[layout](rng, budget, shape)
+    yield FOOTER.format(upper=title.upper())
+
+
+def make_text(layout, scale=1.0, shape="regular", seed=1):
+    return "".join(iter_text(layout, scale, shape, seed))
+
+
+def write_text(path, layout, scale=1.0, shape="regular", seed=1):
+    """Writes the text to path without holding it in memory; returns its size in bytes."""
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        for piece in iter_text(layout, scale, shape, seed):
+            f.write(piece)
+    return os.path.getsize(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic Project Gutenberg text for scaling tests.")
+    parser.add_argument("layout", choices=LAYOUTS)
+    parser.add_argument("output", help="File to write.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Size in multiples of the KJV download.")
+    parser.add_argument("--shape", choices=SHAPES, default="regular")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    size = write_text(args.output, args.layout, args.scale, args.shape, args.seed)
+    print(f"Wrote {size / 1e6:.1f} MB of {args.layout} ({args.shape}) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+import codecs
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+# The encoding of a download is decided once, from its first SNIFF_BYTES:
+#   1. a byte-order mark,
+#   2. the charset of the HTTP Content-Type header,
+#   3. Project Gutenberg's "Character set encoding: ..." header line,
+#   4. otherwise UTF-8 if the sniffed bytes are valid UTF-8, else cp1252.
+# The body is then decoded chunk by chunk with an incremental decoder, so a
+# streamed download can be parsed line by line while it is still arriving.
+SNIFF_BYTES = 16 * 1024
+CHUNK_SIZE = 64 * 1024
+FALLBACK_ENCODING = 'cp1252' # superset of ISO-8859-1 for the bytes Gutenberg texts actually use
+
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'), # checked before UTF-16 LE, whose BOM is its prefix
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+CHARSET_REGEX = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+GUTENBERG_CHARSET_REGEX = re.compile(rb"^Character set encoding:[ \t]*([^\r\n]+)", re.IGNORECASE | re.MULTILINE)
+# Spellings used in older Gutenberg headers that Python's codec registry does not know
+LABEL_ALIASES = {'iso latin-1': 'iso-8859-1', 'iso-latin-1': 'iso-8859-1'}
+# Labels that say nothing useful about bytes >= 0x80, so sniffing decides instead
+UNINFORMATIVE_LABELS = {'ascii', 'us-ascii'}
+
+
+# --- Function Definitions ---
+def _known_codec(label):
+    label = LABEL_ALIASES.get(label.strip().lower(), label.strip())
+    if not label or label.lower() in UNINFORMATIVE_LABELS:
+        return None
+    try:
+        return codecs.lookup(label).name
+    except LookupError:
+        logger.debug("Ignoring unknown charset label %r", label)
+        return None
+
+
+def _looks_like_utf8(head):
+    try:
+        # final=False: a multi-byte sequence cut off at the end of head is fine
+        codecs.getincrementaldecoder('utf-8')().decode(head, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def detect_encoding(head, content_type=''):
+    """Returns (codec name, how it was found) for a body starting with the bytes head."""
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding, "bom"
+    match = CHARSET_REGEX.search(content_type or '')
+    encoding = _known_codec(match.group(1)) if match else None
+    if encoding:
+        return encoding, "http"
+    match = GUTENBERG_CHARSET_REGEX.search(head)
+    encoding = _known_codec(match.group(1).decode('ascii', errors='replace')) if match else None
+    if encoding:
+        return encoding, "gutenberg"
+    return ('utf-8', "sniffed") if _looks_like_utf8(head) else (FALLBACK_ENCODING, "sniffed")
+
+
+def iter_text(chunks, content_type='', encoding=None):
+    """Decodes an iterable of byte chunks in a single pass, yielding str pieces.
+
+    The encoding is detected from the first chunks unless it is given."""
+    chunks = iter(chunks)
+    head = b""
+    if encoding is None:
+        for chunk in chunks:
+            head += chunk
+            if len(head) >= SNIFF_BYTES:
+                break
+        encoding, how = detect_encoding(head, content_type)
+        logger.debug("Decoding as %s (%s)", encoding, how)
+
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    text = decoder.decode(head)
+    if text:
+        yield text
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def iter_lines(chunks, content_type='', encoding=None):
+    """Like iter_text, but yields complete lines (with their line endings)."""
+    pending = ""
+    for text in iter_text(chunks, content_type, encoding):
+        lines = (pending + text).splitlines(True)
+        # The last line may continue in the next piece (even a lone '\r' may be half of '\r\n')
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def iter_file_chunks(path, chunk_size=CHUNK_SIZE):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def decode_bytes(data, content_type=''):
+    """Decodes a complete body with the detected encoding."""
+    encoding, _ = detect_encoding(data[:SNIFF_BYTES], content_type)
+    return data.decode(encoding, errors='replace')
@@ -0,0 +1,59 @@
+import json
+import os
+from bisect import bisect_right
+
+# --- Configuration ---
+# A word-count index lists the quote positions ordered by length, with a
+# cumulative table of how many quotes have at most each distinct length.
+# "Quotes of at most N words" is then a binary search plus a slice:
+#   {"count": 153, "order": [12, 40, ...], "lengths": [9, 11, ...], "ends": [1, 3, ...]}
+# order[:ends[i]] are the quotes with at most lengths[i] words.
+
+
+# --- Function Definitions ---
+def count_words(text):
+    """Same count as countWords() in js/script.js ("".split(/\\s+/) has one element)."""
+    return max(1, len((text or "").split()))
+
+
+def build_word_index(quotes):
+    counts = [count_words(quote["text"]) for quote in quotes]
+    order = sorted(range(len(quotes)), key=counts.__getitem__) # stable: ties keep corpus order
+    lengths, ends = [], []
+    for position, quote_index in enumerate(order, start=1):
+        length = counts[quote_index]
+        if lengths and lengths[-1] == length:
+            ends[-1] = position
+        else:
+            lengths.append(length)
+            ends.append(position)
+    return {"count": len(quotes), "order": order, "lengths": lengths, "ends": ends}
+
+
+def indices_at_most(index, max_words):
+    """Positions of the quotes with at most max_words words, in corpus order."""
+    i = bisect_right(index["lengths"], max_words)
+    end = index["ends"][i - 1] if i else 0
+    return sorted(index["order"][:end])
+
+
+def quotes_at_most(quotes, index, max_words):
+    if index["count"] != len(quotes):
+        raise ValueError(f"Word index covers {index['count']} quotes, corpus has {len(quotes)}")
+    return [quotes[i] for i in indices_at_most(index, max_words)]
+
+
+def word_index_path(filepath):
+    """data/quotes_x.json -> data/quotes_x.words.json"""
+    root, ext = os.path.splitext(filepath)
+    return f"{root}.words{ext}"
+
+
+def write_word_index(quotes, filepath):
+    with open(word_index_path(filepath), 'w', encoding='utf-8') as f:
+        json.dump(build_word_index(quotes), f, separators=(',', ':'))
+
+
+def load_word_index(filepath):
+    with open(word_index_path(filepath), 'r', encoding='utf-8') as f:
+        return json.load(f)
@@ -0,0 +1,71 @@
+import pytest
+
+import parallel_parse
+import scrape_dhammapada_pg
+import scrape_gita_arnold_pg
+import scrape_kjv_bible_pg
+import synth_corpus
+
+# Every way of running a Gutenberg parser must give the records of the plain
+# serial parse: its segments parsed in-process, the segments on a process
+# pool, and the memory-mapped file with one job and with two.
+SCALE = 0.02 # of the KJV download, about 90 KB of text
+CONTENT_TYPE = 'text/plain; charset=utf-8'
+
+PARSERS = {
+    "dhammapada": {
+        "text": scrape_dhammapada_pg.parse_dhammapada_text,
+        "file": scrape_dhammapada_pg.parse_dhammapada_file,
+        "segments": lambda text: scrape_dhammapada_pg.split_dhammapada_segments(
+            scrape_dhammapada_pg.find_relevant_content(text)),
+        "segment": scrape_dhammapada_pg.parse_dhammapada_segment,
+    },
+    "gita": {
+        "text": scrape_gita_arnold_pg.parse_gita_text,
+        "file": scrape_gita_arnold_pg.parse_gita_file,
+        "segments": lambda text: scrape_gita_arnold_pg.split_gita_segments(
+            scrape_gita_arnold_pg.split_paragraphs(text)),
+        "segment": scrape_gita_arnold_pg.parse_gita_segment,
+    },
+    "kjv": {
+        "text": scrape_kjv_bible_pg.parse_kjv_bible_text,
+        "file": scrape_kjv_bible_pg.parse_kjv_bible_file,
+        "segments": scrape_kjv_bible_pg.split_kjv_segments,
+        "segment": scrape_kjv_bible_pg.parse_kjv_segment,
+    },
+}
+
+
+@pytest.fixture(scope="module", params=[(layout, shape) for layout in synth_corpus.LAYOUTS
+                                        for shape in synth_corpus.SHAPES],
+                ids=lambda param: "-".join(param))
+def source(request, tmp_path_factory):
+    layout, shape = request.param
+    path = tmp_path_factory.mktemp("synth") / f"{layout}-{shape}.txt"
+    synth_corpus.write_text(str(path), layout, SCALE, shape)
+    text = path.read_text(encoding='utf-8')
+    parser = PARSERS[layout]
+    return parser, text, str(path), parser["text"](text)
+
+
+def test_serial_parse_finds_records(source):
+    _, _, _, serial = source
+    assert len(serial) > 10
+
+
+def test_segments_parsed_in_process_match_serial(source):
+    parser, text, _, serial = source
+    segments = parser["segments"](text)
+    assert len(segments) > 1
+    assert parallel_parse.parse_segments(parser["segment"], segments, jobs=1) == serial
+
+
+def test_two_jobs_match_serial(source):
+    parser, text, _, serial = source
+    assert parser["text"](text, jobs=2) == serial
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_mapped_file_matches_serial(source, jobs):
+    parser, _, path, serial = source
+    assert parser["file"](path, CONTENT_TYPE, jobs=jobs) == serial
@@ -0,0 +1,69 @@
+import pytest
+
+import quote_ids
+
+# KJV-like records: "reference" repeats across books ("1:3" in Genesis and in
+# Exodus), so the deltas have to match quotes by "source".
+FILEPATH = 'data/quotes_kjv_bible.json'
+
+
+def verse(book, chapter, verse_num, text):
+    return {"text": text, "source": f"{book}, {chapter}:{verse_num}", "reference": f"{chapter}:{verse_num}",
+            "book": book}
+
+
+def corpus(*quotes):
+    return quote_ids.with_ids(quotes, FILEPATH)
+
+
+GENESIS_1 = verse("Genesis", 1, 1, "In the beginning God created the heaven and the earth.")
+GENESIS_2 = verse("Genesis", 1, 2, "And the earth was without form, and void.")
+GENESIS_3 = verse("Genesis", 1, 3, "And God said, Let there be light: and there was light.")
+EXODUS_1 = verse("Exodus", 1, 1, "Now these are the names of the children of Israel.")
+EXODUS_3 = verse("Exodus", 1, 3, "Issachar, Zebulun, and Benjamin,")
+EXODUS_3_REVISED = verse("Exodus", 1, 3, "Issachar, Zebulun, and Benjamin.")
+EXODUS_4 = verse("Exodus", 1, 4, "Dan, and Naphtali, Gad, and Asher.")
+
+OLD = corpus(GENESIS_1, GENESIS_2, GENESIS_3, EXODUS_1, EXODUS_3)
+
+CHANGES = {
+    "reorder": corpus(GENESIS_2, GENESIS_1, GENESIS_3, EXODUS_3, EXODUS_1),
+    "replaced text at a repeated reference": corpus(GENESIS_1, GENESIS_2, GENESIS_3, EXODUS_1, EXODUS_3_REVISED),
+    "add and delete": corpus(GENESIS_1, GENESIS_3, EXODUS_1, EXODUS_3, EXODUS_4),
+    "all at once": corpus(EXODUS_4, GENESIS_3, GENESIS_1, EXODUS_1, EXODUS_3_REVISED),
+}
+
+
+@pytest.mark.parametrize("new", CHANGES.values(), ids=CHANGES.keys())
+def test_apply_delta_round_trip(new):
+    assert quote_ids.apply_delta(OLD, quote_ids.compute_delta(OLD, new)) == new
+
+
+@pytest.mark.parametrize("new", CHANGES.values(), ids=CHANGES.keys())
+def test_delta_from_previous_keys_applies_to_full_quotes(new):
+    # write_delta only keeps quote_keys() of the previous build
+    previous = quote_ids.quote_keys(OLD, FILEPATH)
+    assert quote_ids.apply_delta(OLD, quote_ids.compute_delta(previous, new)) == new
+
+
+def test_replaced_text_is_matched_by_source():
+    delta = quote_ids.compute_delta(OLD, CHANGES["replaced text at a repeated reference"])
+    assert not delta["added"] and not delta["removed"]
+    assert [change["quote"]["source"] for change in delta["modified"]] == ["Exodus, 1:3"]
+    assert delta["modified"][0]["replaces"] == OLD[4]["id"]
+
+
+def test_chain_of_deltas():
+    # What the browser does when it is several builds behind
+    versions = [OLD] + list(CHANGES.values())
+    deltas = [quote_ids.compute_delta(a, b) for a, b in zip(versions, versions[1:])]
+    quotes = OLD
+    for delta in deltas:
+        quotes = quote_ids.apply_delta(quotes, delta)
+    assert quotes == versions[-1]
+
+
+def test_delta_on_another_base_is_rejected():
+    delta = quote_ids.compute_delta(OLD, CHANGES["add and delete"])
+    with pytest.raises(ValueError):
+        quote_ids.apply_delta(CHANGES["reorder"], delta)
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("lxml")
+
+import scrape_hidden_words
+
+# The trimmed page in fixtures/ covers the span.kf opening, the <br> path, the
+# verse-number links (a.td.ff.gf and a.sf), a comment after the span.kf and
+# the items and sections the parsers skip.
+FIXTURE_PATH = os.path.join(scrape_hidden_words.SCRIPT_DIR, 'fixtures', 'hidden_words.xhtml')
+
+
+@pytest.fixture(scope="module")
+def page():
+    with open(FIXTURE_PATH, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.mark.filterwarnings("ignore::bs4.XMLParsedAsHTMLWarning")
+def test_lxml_fast_path_matches_bs4(page):
+    quotes = scrape_hidden_words.parse_hidden_words_lxml(page)
+    assert quotes == scrape_hidden_words.parse_hidden_words_bs4(page)
+    assert [quote.source for quote in quotes] == [
+        "The Hidden Words, From the Arabic #1",
+        "The Hidden Words, From the Arabic #2",
+        "The Hidden Words, From the Arabic #3",
+        "The Hidden Words, From the Arabic #4",
+        "The Hidden Words, From the Persian #81",
+        "The Hidden Words, From the Persian #82",
+    ]
+
+
+def test_verse_number_links_are_dropped(page):
+    texts = [quote.text for quote in scrape_hidden_words.parse_hidden_words_lxml(page)]
+    assert texts[2] == ("O Son of Man! Veiled in My immemorial being and in the ancient eternity of My essence, "
+                        "I knew My love for thee; therefore I created thee, have engraved on thee Mine image "
+                        "and revealed to thee My beauty.")
+    assert not any(text.endswith(("1", "*")) or "81" in text for text in texts)
+